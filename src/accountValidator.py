@@ -0,0 +1,143 @@
+# src/accountValidator.py
+"""
+后台校验全部已保存账号。
+
+以前只有在启动游戏时才发现 Token 已失效 (ensure_account_valid 标记 invalid 后再弹出向导)。
+现在向导打开时并发校验所有账号：
+  - 每个验证服务器主机一个 requests.Session (复用连接)，并用信号量限制同一主机的并发数
+  - validate 不通过的账号立即 refresh；refresh 被服务器拒绝 (400/401/403) 才标记 invalid，
+    网络不通、5xx、429 只记为 unreachable，不改动账号
+  - 每个结果先更新内存中的配置并回调 (界面据此实时刷新标记)，全部完成后只写一次配置文件
+"""
+import time
+import threading
+import concurrent.futures
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from src import constants, authAPI, tokenRefresh
+from src.configMGR import config_mgr
+from src.rateLimiter import PRIORITY_BACKGROUND
+
+STATUS_VALID = "valid"
+STATUS_REFRESHED = "refreshed"
+STATUS_INVALID = "invalid"
+STATUS_UNREACHABLE = "unreachable"
+
+
+class HostPool:
+    """同一主机共用的连接池与并发上限"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}  # netloc -> (Session, BoundedSemaphore)
+
+    def get(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=constants.HOST_MAX_CONCURRENCY)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                entry = (session, threading.BoundedSemaphore(constants.HOST_MAX_CONCURRENCY))
+                self._hosts[host] = entry
+            return entry
+
+    def close(self):
+        with self._lock:
+            for session, _ in self._hosts.values():
+                session.close()
+            self._hosts.clear()
+
+
+def _check_one(acc, hosts, account_lock=None, cancel_token=None, refresh_older_than=None):
+    """返回 (状态, 需要写入的字段)；已取消返回 (None, None)"""
+    base = config_mgr.get_api_for_account(acc)
+    session, slot = hosts.get(base)
+
+    # 预热模式：较久未刷新的 Token 不必先校验，直接提前刷新
+    due = refresh_older_than is not None and \
+        time.time() - acc.get("token_refreshed_at", 0) >= refresh_older_than
+
+    with slot:
+        if cancel_token is not None and cancel_token.cancelled: return None, None
+        try:
+            valid = not due and authAPI.validate(f"{base}/authserver/validate", acc.get("accessToken"),
+                                                 acc.get("clientToken"), session=session,
+                                                 priority=PRIORITY_BACKGROUND)
+        except requests.exceptions.RequestException as e:
+            # 服务器不可达：不据此判断 Token，也不尝试刷新
+            if constants.DEBUG_MODE:
+                print(f"[AccountValidator] {acc.get('name')}: {e}")
+            return STATUS_UNREACHABLE, {}
+        if valid:
+            # 记录校验时间：之后 TOKEN_TRUST_WINDOW 内启动不必再联网校验
+            return STATUS_VALID, {"invalid": None, "token_validated_at": time.time()}
+
+    # 刷新会让旧 Token 失效，与启动流程中同一账号的刷新串行执行
+    lock = account_lock(acc["uuid"]) if account_lock else threading.Lock()
+    with lock, slot:
+        if cancel_token is not None and cancel_token.cancelled: return None, None
+        current = config_mgr.get_account(acc["uuid"])
+        if current and current.get("accessToken") != acc.get("accessToken"):
+            # 等锁期间启动流程已经换过 Token
+            return STATUS_REFRESHED, {}
+        try:
+            new_data = tokenRefresh.refresh_token(f"{base}/authserver/refresh", acc, session=session,
+                                                  priority=PRIORITY_BACKGROUND)
+        except Exception as e:
+            if authAPI.is_credential_rejected(e):
+                return STATUS_INVALID, {"invalid": True}
+            # 5xx / 429 / 网络错误：服务器的问题，保留原 Token
+            if constants.DEBUG_MODE:
+                print(f"[AccountValidator] {acc.get('name')}: {e}")
+            return STATUS_UNREACHABLE, {}
+
+    fields = {"accessToken": new_data["accessToken"], "token_refreshed_at": time.time(), "invalid": None}
+    if new_data.get("clientToken"): fields["clientToken"] = new_data["clientToken"]
+    return STATUS_REFRESHED, fields
+
+
+def validate_all(accounts=None, on_result=None, account_lock=None, cancel_token=None, refresh_older_than=None):
+    """
+    并发校验账号 (默认全部)。on_result(uuid, status, auth_data) 在工作线程中回调，
+    auth_data 为更新后的账号数据。返回 {uuid: status}。
+    account_lock: uuid -> Lock，刷新某个账号时持有 (只与同一账号的其他刷新互斥)
+    refresh_older_than: 秒；距上次刷新超过该时长的账号跳过校验直接刷新 (0 表示全部刷新)
+    """
+    if accounts is None:
+        accounts = config_mgr.get_all_accounts()
+    if not accounts: return {}
+
+    hosts = HostPool()
+    results = {}
+    changed = False
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=constants.VALIDATE_MAX_WORKERS) as pool:
+            future_map = {
+                pool.submit(_check_one, acc, hosts, account_lock, cancel_token, refresh_older_than): acc
+                for acc in accounts
+            }
+            for future in concurrent.futures.as_completed(future_map):
+                acc = future_map[future]
+                try:
+                    status, fields = future.result()
+                except Exception:
+                    continue
+                if status is None: continue
+                results[acc["uuid"]] = status
+
+                # 先只改内存 (启动流程读到的就是新 Token)，最后统一写盘
+                if fields and config_mgr.update_account(acc["uuid"], fields, expected_token=acc.get("accessToken"),
+                                                        save=False):
+                    changed = True
+                if on_result:
+                    updated = config_mgr.get_account(acc["uuid"])
+                    if updated: on_result(acc["uuid"], status, dict(updated))
+    finally:
+        hosts.close()
+        if changed:
+            config_mgr.save()
+    return results
@@ -0,0 +1,73 @@
+# src/assetManifest.py
+"""
+内置资源清单 (assets-manifest.json)。
+
+构建时生成，记录 assets 目录下每个文件的大小与哈希，随程序一起打包：
+    python -m src.assetManifest            # 默认处理项目根目录下的 assets/
+    python -m src.assetManifest path/to/assets
+
+运行时由 runtimeMGR 读取，用于判断运行时目录中的文件是否需要升级。
+"""
+import os
+import sys
+import json
+import hashlib
+from src import constants
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """blake2b-128，比 sha256 快，足够用于内容校验"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_CHUNK_SIZE)
+            if not chunk: break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build_manifest(assets_dir):
+    files = {}
+    for name in sorted(os.listdir(assets_dir)):
+        path = os.path.join(assets_dir, name)
+        if name == constants.ASSET_MANIFEST_FILENAME or not os.path.isfile(path):
+            continue
+        files[name] = {"size": os.path.getsize(path), "hash": hash_file(path)}
+
+    return {"version": constants.PROXY_VERSION, "files": files}
+
+
+def write_manifest(assets_dir):
+    manifest = build_manifest(assets_dir)
+    out = os.path.join(assets_dir, constants.ASSET_MANIFEST_FILENAME)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4)
+    return out, manifest
+
+
+def load_manifest(assets_dir):
+    """读取清单，不存在或损坏时返回 None (源码运行时通常没有清单)"""
+    try:
+        with open(os.path.join(assets_dir, constants.ASSET_MANIFEST_FILENAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        assets_dir = argv[0]
+    else:
+        assets_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+    out, manifest = write_manifest(assets_dir)
+    for name, entry in manifest["files"].items():
+        print(f"{entry['hash']}  {entry['size']:>12}  {name}")
+    print(f"-> {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# src/assetPack.py
+"""
+外置资源包 (YggdrasilProxy.assets)。
+
+PyInstaller -F 构建会在每次进程启动时把内嵌的 YggProJAVA.zip 与 jar 解包到 _MEIPASS，
+游戏每次启动都要付出这笔开销。外置资源包放在可执行文件旁边，是一个带索引的 zip：
+  - 第一个成员固定为资源清单，读取清单只需解析文件头，不必加载整个索引
+  - 需要释放资源时才 mmap 打开并解析中央目录
+  - 按成员偏移直接从 mmap 读取 / 解压，多线程并行读取互不干扰
+  - JRE 的文件直接以 YggProJAVA/... 成员平铺在包内，无需二次解压
+
+构建：
+    python -m src.assetPack                       # assets/ -> dist/YggdrasilProxy.assets
+    python -m src.assetPack path/to/assets out.assets
+"""
+import io
+import os
+import sys
+import mmap
+import json
+import zlib
+import struct
+import zipfile
+import threading
+from src import constants, assetManifest
+
+_CHUNK_SIZE = 1024 * 1024
+_LOCAL_HEADER = struct.Struct("<4s5H3I2H")  # zip 本地文件头 (30 字节)
+_LOCAL_MAGIC = b"PK\x03\x04"
+
+_pack = None
+_pack_lock = threading.Lock()
+
+
+def get_pack_path():
+    """资源包位置：可执行文件旁 (打包后) / 项目根目录 (源码运行)"""
+    if getattr(sys, 'frozen', False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, constants.ASSET_PACK_FILENAME)
+
+
+def _read_local_header(read_at, offset):
+    """解析 offset 处的本地文件头，返回 (文件名, 数据起始偏移, 压缩方式, 压缩后大小)"""
+    raw = read_at(offset, _LOCAL_HEADER.size)
+    fields = _LOCAL_HEADER.unpack(raw)
+    if fields[0] != _LOCAL_MAGIC:
+        raise zipfile.BadZipFile("bad local file header")
+    method, comp_size, name_len, extra_len = fields[3], fields[7], fields[9], fields[10]
+    name = read_at(offset + _LOCAL_HEADER.size, name_len).decode("utf-8", "replace")
+    return name, offset + _LOCAL_HEADER.size + name_len + extra_len, method, comp_size
+
+
+def read_manifest(pack_path=None):
+    """
+    快速读取包内清单：只读第一个成员的文件头与数据 (构建时保证为未压缩的清单)，
+    不 mmap、不解析中央目录。资源包不存在或格式不符时返回 None。
+    """
+    pack_path = pack_path or get_pack_path()
+    try:
+        with open(pack_path, "rb") as f:
+            def read_at(offset, size):
+                f.seek(offset)
+                return f.read(size)
+
+            name, data_offset, method, comp_size = _read_local_header(read_at, 0)
+            if name != constants.ASSET_MANIFEST_FILENAME or method != zipfile.ZIP_STORED:
+                return None
+            return json.loads(read_at(data_offset, comp_size).decode("utf-8"))
+    except Exception:
+        return None
+
+
+class _MemberReader(io.RawIOBase):
+    """从 mmap 中按偏移流式读取 (并解压) 单个成员，读到结尾时校验 CRC 与大小"""
+
+    def __init__(self, mm, info, data_offset):
+        super().__init__()
+        if info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise NotImplementedError(f"compression {info.compress_type}")
+        self._mm = mm
+        self._info = info
+        self._pos = data_offset
+        self._end = data_offset + info.compress_size
+        self._decomp = zlib.decompressobj(-15) if info.compress_type == zipfile.ZIP_DEFLATED else None
+        self._buf = bytearray()
+        self._crc = 0
+        self._size = 0
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        if self._pos < self._end:
+            chunk = self._mm[self._pos:min(self._pos + _CHUNK_SIZE, self._end)]
+            self._pos += len(chunk)
+            data = self._decomp.decompress(chunk) if self._decomp else chunk
+        else:
+            data = self._decomp.flush() if self._decomp else b""
+            self._eof = True
+
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        self._buf += data
+
+        if self._eof and (self._crc != self._info.CRC or self._size != self._info.file_size):
+            raise zipfile.BadZipFile(f"Bad CRC-32 for file {self._info.filename!r}")
+
+    def readinto(self, b):
+        while len(self._buf) < len(b) and not self._eof:
+            self._fill()
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        del self._buf[:n]
+        return n
+
+
+class AssetPack:
+    """mmap 打开的资源包，中央目录只在首次打开时解析一次"""
+
+    def __init__(self, pack_path):
+        self.path = pack_path
+        self._file = open(pack_path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        with zipfile.ZipFile(self._mm) as zf:
+            self._infos = zf.infolist()
+        self._by_name = {i.filename: i for i in self._infos}
+        self._data_offsets = {}
+        self._offsets_lock = threading.Lock()
+
+    def _read_at(self, offset, size):
+        return self._mm[offset:offset + size]
+
+    def _data_offset(self, info):
+        with self._offsets_lock:
+            offset = self._data_offsets.get(info.filename)
+        if offset is None:
+            _, offset, _, _ = _read_local_header(self._read_at, info.header_offset)
+            with self._offsets_lock:
+                self._data_offsets[info.filename] = offset
+        return offset
+
+    def has(self, name):
+        return name in self._by_name
+
+    def infolist(self, prefix=""):
+        return [i for i in self._infos if i.filename.startswith(prefix)]
+
+    def open(self, info):
+        if isinstance(info, str):
+            info = self._by_name[info]
+        return _MemberReader(self._mm, info, self._data_offset(info))
+
+    def extract_to(self, name, dest_path):
+        """把单个成员写到 dest_path (调用方负责原子替换)"""
+        with self.open(name) as src, open(dest_path, "wb") as dst:
+            while True:
+                chunk = src.read(_CHUNK_SIZE)
+                if not chunk: break
+                dst.write(chunk)
+
+
+class PackSource:
+    """供 jreExtractor 使用的资源包视图，只包含 prefix 下的成员"""
+
+    def __init__(self, pack, prefix):
+        self._pack = pack
+        self._prefix = prefix
+
+    def infolist(self):
+        return self._pack.infolist(self._prefix)
+
+    def open(self, info):
+        return self._pack.open(info)
+
+    def close(self):
+        # 资源包在进程内共享，不在这里关闭
+        pass
+
+
+def open_pack():
+    """懒加载：首次需要释放资源时才 mmap 并解析索引；资源包不存在返回 None"""
+    global _pack
+    with _pack_lock:
+        if _pack is None:
+            pack_path = get_pack_path()
+            if not os.path.isfile(pack_path):
+                return None
+            try:
+                _pack = AssetPack(pack_path)
+            except Exception as e:
+                print(f"[{constants.PROXY_NAME}] 资源包损坏: {e}", file=sys.stderr)
+                return None
+        return _pack
+
+
+# ================= 构建 =================
+
+def build_pack(assets_dir, out_path):
+    """
+    assets_dir 中的文件写入资源包：
+    清单 (未压缩，第一个成员) -> 普通文件 (jar 本身已压缩，直接存储) -> JRE zip 的成员平铺
+    """
+    manifest = assetManifest.build_manifest(assets_dir)
+    jre_zip_name = f"{constants.JRE_DIR_NAME}.zip"
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with zipfile.ZipFile(out_path, "w") as zout:
+        zout.writestr(
+            zipfile.ZipInfo(constants.ASSET_MANIFEST_FILENAME),
+            json.dumps(manifest, indent=4), compress_type=zipfile.ZIP_STORED
+        )
+
+        for name in manifest["files"]:
+            if name == jre_zip_name: continue
+            zout.write(os.path.join(assets_dir, name), name, compress_type=zipfile.ZIP_STORED)
+
+        jre_zip = os.path.join(assets_dir, jre_zip_name)
+        if os.path.exists(jre_zip):
+            with zipfile.ZipFile(jre_zip) as zin:
+                for src_info in zin.infolist():
+                    info = zipfile.ZipInfo(src_info.filename, src_info.date_time)
+                    info.external_attr = src_info.external_attr
+                    info.create_system = src_info.create_system
+                    if src_info.is_dir():
+                        zout.writestr(info, b"")
+                    else:
+                        info.compress_type = zipfile.ZIP_DEFLATED
+                        zout.writestr(info, zin.read(src_info))
+
+    return out_path, manifest
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assets_dir = argv[0] if argv else os.path.join(root, "assets")
+    out_path = argv[1] if len(argv) > 1 else os.path.join(root, "dist", constants.ASSET_PACK_FILENAME)
+
+    out_path, manifest = build_pack(assets_dir, out_path)
+    for name, entry in manifest["files"].items():
+        print(f"{entry['hash']}  {entry['size']:>12}  {name}")
+    print(f"-> {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,51 @@
 # src/authAPI.py
+import sys
+import time
 import requests
 import uuid
 from src import constants
+from src.hostHealth import host_health
+from src.rateLimiter import rate_limiter, RateLimited, PRIORITY_CRITICAL
 
 TIMEOUT_SETTINGS = (5, 10)
+VALIDATE_TIMEOUT = 5
 
 
 def get_fallback_client_token():
     return str(uuid.uuid4())
 
 
+def is_credential_rejected(exc):
+    """服务器明确拒绝凭据 (400/401/403，如 ForbiddenOperationException)；5xx、429 与网络错误都不算"""
+    if not isinstance(exc, requests.exceptions.HTTPError) or exc.response is None: return False
+    return exc.response.status_code in (400, 401, 403)
+
+
+def _post(url, payload, timeout, session=None, priority=PRIORITY_CRITICAL):
+    """
+    带熔断检查、跨进程限流与自适应超时的 POST，并记录本次耗时 / 失败。
+    启动流程的请求遇到 429 时在退避结束后重试一次 (等待不超过 RATE_LIMIT_CRITICAL_WAIT)。
+    """
+    attempts = 2 if priority == PRIORITY_CRITICAL else 1
+    for attempt in range(attempts):
+        host_health.check(url)
+        rate_limiter.acquire(url, priority)
+        t0 = time.monotonic()
+        try:
+            resp = (session or requests).post(url, json=payload, headers={"Content-Type": "application/json"},
+                                              timeout=host_health.timeout(url, timeout))
+        except requests.exceptions.RequestException:
+            host_health.record(url, time.monotonic() - t0, ok=False)
+            raise
+        host_health.record(url, time.monotonic() - t0, ok=resp.status_code < 500)
+        try:
+            rate_limiter.observe(url, resp)
+        except RateLimited:
+            if attempt + 1 >= attempts: raise
+            continue
+        return resp
+
+
 def authenticate(auth_url, email, password, client_token=None):
     if not client_token:
         client_token = get_fallback_client_token()
@@ -23,8 +59,7 @@ def authenticate(auth_url, email, password, client_token=None):
     }
 
     try:
-        resp = requests.post(auth_url, json=payload, headers={"Content-Type": "application/json"},
-                             timeout=TIMEOUT_SETTINGS)
+        resp = _post(auth_url, payload, TIMEOUT_SETTINGS)
         resp.raise_for_status()
         data = resp.json()
         if "clientToken" not in data or not data["clientToken"]:
@@ -32,14 +67,17 @@ def authenticate(auth_url, email, password, client_token=None):
         return data
     except Exception as e:
         if isinstance(e, requests.exceptions.HTTPError):
-            print(f"[Auth Login Error] {e.response.status_code}: {e.response.text}")
+            print(f"[Auth Login Error] {e.response.status_code}: {e.response.text}", file=sys.stderr)
         raise e
 
 
-def refresh(refresh_url, access_token, client_token, selected_profile=None):
+def refresh(refresh_url, access_token, client_token, selected_profile=None, session=None,
+            priority=PRIORITY_CRITICAL):
     """
     刷新接口 (支持绑定角色)
     selected_profile: {"id": "...", "name": "..."}
+    session: 可选的 requests.Session (批量请求时复用连接)
+    priority: 限流优先级，后台请求传 rateLimiter.PRIORITY_BACKGROUND
     """
     if not client_token:
         client_token = get_fallback_client_token()
@@ -55,21 +93,20 @@ def refresh(refresh_url, access_token, client_token, selected_profile=None):
         payload["selectedProfile"] = selected_profile
 
     try:
-        resp = requests.post(refresh_url, json=payload, headers={"Content-Type": "application/json"},
-                             timeout=TIMEOUT_SETTINGS)
+        resp = _post(refresh_url, payload, TIMEOUT_SETTINGS, session, priority)
         resp.raise_for_status()
         return resp.json()
     except Exception as e:
         if isinstance(e, requests.exceptions.HTTPError):
-            print(f"[Auth Refresh Error] {e.response.status_code}: {e.response.text}")
+            print(f"[Auth Refresh Error] {e.response.status_code}: {e.response.text}", file=sys.stderr)
         raise e
 
 
-def validate(validate_url, access_token, client_token):
+def validate(validate_url, access_token, client_token, session=None, priority=PRIORITY_CRITICAL):
     if not client_token: return False
     payload = {"accessToken": access_token, "clientToken": client_token}
-    try:
-        resp = requests.post(validate_url, json=payload, headers={"Content-Type": "application/json"}, timeout=5)
-        return resp.status_code == 204
-    except Exception:
-        return False
\ No newline at end of file
+    # 只有服务器给出结论才返回 True/False；网络错误、熔断、限流与 5xx 原样抛出，
+    # 避免把服务器不可达当成 Token 过期去刷新
+    resp = _post(validate_url, payload, VALIDATE_TIMEOUT, session, priority)
+    if resp.status_code >= 500: resp.raise_for_status()
+    return resp.status_code == 204
\ No newline at end of file
@@ -0,0 +1,166 @@
+# src/avatarBench.py
+"""
+头像渲染管线的基准与像素一致性检查。
+
+用固定随机种子生成一批合成皮肤 (64x64 带帽子层 / 64x32 旧格式 / 半透明帽子)，
+分别用旧版逐行绘制的参考实现与 AvatarManager 当前实现渲染，
+逐字节比较结果 (含 2x HiDPI 版本与单独的光照渐变)，并测量两者的耗时。
+
+用法:
+    python -m src.avatarBench                 # 检查一致性并输出耗时
+    python -m src.avatarBench --skins 500 --rounds 5 --json
+不一致时返回码为 1。
+"""
+import sys
+import json
+import time
+import random
+import argparse
+from PIL import Image, ImageDraw
+from src.avatarMGR import AvatarManager
+
+
+# ================= 参考实现 (优化前的渲染代码，保持原样) =================
+
+def _legacy_add_lighting_gradient(img):
+    width, height = img.size
+    overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    for y in range(height):
+        factor = y / height
+        if factor < 0.5:
+            alpha = int((0.5 - factor) * 2 * 30)
+            draw.line([(0, y), (width, y)], fill=(255, 255, 255, alpha))
+        else:
+            alpha = int((factor - 0.5) * 2 * 60)
+            draw.line([(0, y), (width, y)], fill=(0, 0, 0, alpha))
+    return Image.alpha_composite(img, overlay)
+
+
+def _legacy_render_head(skin_img, scale_head=8, scale_hat=9, canvas_size=72):
+    w, h = skin_img.size
+    has_hat = h >= 64
+
+    raw_head = skin_img.crop((8, 8, 16, 16))
+    raw_hat = skin_img.crop((40, 8, 48, 16)) if has_hat else None
+
+    head_big = raw_head.resize((scale_head * 8, scale_head * 8), Image.Resampling.NEAREST)
+    head_big = _legacy_add_lighting_gradient(head_big)
+
+    final = Image.new("RGBA", (canvas_size, canvas_size), (0, 0, 0, 0))
+    offset = (canvas_size - head_big.width) // 2
+    final.paste(head_big, (offset, offset), head_big)
+
+    if raw_hat:
+        hat_big = raw_hat.resize((scale_hat * 8, scale_hat * 8), Image.Resampling.NEAREST)
+        if hat_big.size != final.size:
+            hat_big = hat_big.resize(final.size, Image.Resampling.NEAREST)
+
+        hat_a = hat_big.split()[3]
+        shadow_a = hat_a.point(lambda i: 60 if i > 0 else 0)
+        shadow_rgb = Image.new("RGB", hat_big.size, (0, 0, 0))
+        shadow_layer = Image.merge("RGBA", (*shadow_rgb.split(), shadow_a))
+
+        shadow_canvas = Image.new("RGBA", final.size, (0, 0, 0, 0))
+        shadow_canvas.paste(shadow_layer, (4, 4))
+        final = Image.alpha_composite(final, shadow_canvas)
+        final = Image.alpha_composite(final, hat_big)
+
+    return final
+
+
+# ================= 合成皮肤 =================
+
+def make_skins(count, seed=1234):
+    rng = random.Random(seed)
+    skins = []
+    for i in range(count):
+        kind = i % 3
+        height = 32 if kind == 1 else 64
+        pixels = bytes(rng.randrange(256) for _ in range(64 * height * 4))
+        skin = Image.frombytes("RGBA", (64, height), pixels)
+        if kind == 0:
+            # 头部不透明，帽子层一半全透明 (常见皮肤)
+            head = Image.new("RGBA", (8, 8), (rng.randrange(256), rng.randrange(256), rng.randrange(256), 255))
+            skin.paste(head, (8, 8))
+            skin.paste(Image.new("RGBA", (8, 4), (0, 0, 0, 0)), (40, 12))
+        skins.append(skin)
+    return skins
+
+
+def check_identity(skins):
+    """返回不一致项的描述列表 (为空表示全部一致)"""
+    mismatches = []
+    rendered = AvatarManager.render_heads(skins, scales=(1, 2))
+    for i, (skin, variants) in enumerate(zip(skins, rendered)):
+        expected = _legacy_render_head(skin)
+        if variants[1].tobytes() != expected.tobytes():
+            mismatches.append(f"skin #{i} ({skin.size[0]}x{skin.size[1]}) 1x")
+        expected_2x = expected.resize((expected.width * 2, expected.height * 2), Image.Resampling.NEAREST)
+        if variants[2].tobytes() != expected_2x.tobytes():
+            mismatches.append(f"skin #{i} ({skin.size[0]}x{skin.size[1]}) 2x")
+        if AvatarManager._render_head(skin).tobytes() != expected.tobytes():
+            mismatches.append(f"skin #{i} single render")
+
+    # 默认 Steve 等其他调用方直接使用渐变函数，单独比较 (含非 64 的尺寸)
+    for size in ((64, 64), (128, 128), (30, 17)):
+        img = skins[0].resize(size, Image.Resampling.NEAREST)
+        if AvatarManager._add_lighting_gradient(img).tobytes() != _legacy_add_lighting_gradient(img).tobytes():
+            mismatches.append(f"gradient {size[0]}x{size[1]}")
+    return mismatches
+
+
+def _time(fn, rounds):
+    best = None
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(count, rounds):
+    skins = make_skins(count)
+    mismatches = check_identity(skins)
+
+    legacy = _time(lambda: [_legacy_render_head(s) for s in skins], rounds)
+    single = _time(lambda: [AvatarManager._render_head(s) for s in skins], rounds)
+    batch = _time(lambda: AvatarManager.render_heads(skins, scales=(1, 2)), rounds)
+
+    return {
+        "skins": count,
+        "rounds": rounds,
+        "identical": not mismatches,
+        "mismatches": mismatches[:20],
+        "legacy_ms_per_avatar": legacy * 1000 / count,
+        "current_ms_per_avatar": single * 1000 / count,
+        "batch_1x2x_ms_per_avatar": batch * 1000 / count,
+        "speedup": legacy / single if single else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="avatar rendering benchmark / pixel identity check")
+    parser.add_argument("--skins", type=int, default=200, help="合成皮肤数量")
+    parser.add_argument("--rounds", type=int, default=3, help="重复次数 (取最快一次)")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.skins, args.rounds)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"skins            : {results['skins']}")
+        print(f"pixel identical  : {results['identical']}")
+        for m in results["mismatches"]:
+            print(f"  mismatch: {m}")
+        print(f"legacy           : {results['legacy_ms_per_avatar']:.3f} ms/avatar")
+        print(f"current          : {results['current_ms_per_avatar']:.3f} ms/avatar")
+        print(f"batch (1x + 2x)  : {results['batch_1x2x_ms_per_avatar']:.3f} ms/avatar")
+        print(f"speedup          : {results['speedup']:.2f}x")
+    return 0 if results["identical"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
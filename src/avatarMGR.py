@@ -1,193 +1,539 @@
 # src/avatarMGR.py
 import os
+import queue
+import itertools
 import threading
 import requests
+from urllib.parse import urlparse
 import base64
 import json
 import io
-import glob
+from collections import OrderedDict
 from PIL import Image, ImageDraw
 from src import constants
 from src.configMGR import config_mgr
+from src.profileCache import profile_cache
+from src.avatarStore import AvatarStore
+from src.rateLimiter import rate_limiter, PRIORITY_BACKGROUND
+
+STEVE_HASH = "steve"  # 默认头像在缓存中的 skin_hash
+# 帽子投影：不透明度 > 0 的像素变为 60 (查表代替逐像素 lambda)
+SHADOW_LUT = [0] + [60] * 255
+
+
+class LRUCache:
+    """按估算字节数限制容量的 LRU 缓存 (线程安全)"""
+
+    def __init__(self, max_bytes, sizeof):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= self._sizeof(old)
+            self._data[key] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._data) > 1:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= self._sizeof(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+
+def image_nbytes(img):
+    """PIL 图片解码后占用的内存估算"""
+    return img.width * img.height * len(img.getbands())
 
 
 class AvatarManager:
+    # 旧版 PNG 目录 (首次打开头像缓存库时自动导入后删除)
     CACHE_DIR = os.path.join(config_mgr._data_dir, "cache", "avatars")
+    _store = AvatarStore(
+        os.path.join(config_mgr._data_dir, "cache", constants.AVATAR_STORE_FILENAME),
+        legacy_dir=CACHE_DIR
+    )
 
     # 定义放大倍数
     SCALE_HEAD = 8  # 内层放大 8 倍 (8x8 -> 64x64)
     SCALE_HAT = 9  # 外层放大 9 倍 (8x8 -> 72x72) -> 这样帽子就比头大一圈
     CANVAS_SIZE = 72  # 最终图片大小
 
-    @classmethod
-    def get_avatar(cls, uuid, api_url, callback):
-        threading.Thread(target=cls._worker, args=(uuid, api_url, callback), daemon=True).start()
+    # 后台下载：固定大小的线程池 + 优先级队列，同一 uuid 的并发请求合并为一次下载
+    MAX_WORKERS = 3
+    PRIORITY_HIGH = 0  # 选中的账号
+    PRIORITY_NORMAL = 10  # 列表中可见的账号 (调用方可按位置递增)
+    PRIORITY_REVALIDATE = 100  # 档案缓存过期后的后台重新验证，排在所有缺图任务之后
+
+    _queue = queue.PriorityQueue()
+    _seq = itertools.count()
+    _inflight = {}  # clean_uuid -> {"callbacks": [(callback, 已显示的 hash)], "priority": int, "generation": int}
+    _inflight_lock = threading.Lock()
+    _workers = []
+    _generation = 0
+    _host_slots = {}  # netloc -> BoundedSemaphore，限制对同一主机的并发请求
+
+    # 内存缓存：(clean_uuid, skin_hash, size) -> 已解码的 PIL 图片；clean_uuid -> 当前 skin_hash
+    IMAGE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+    _images = LRUCache(IMAGE_CACHE_MAX_BYTES, image_nbytes)
+    _current_hash = {}
+    _steve = None
+
+    # 与尺寸相关、与皮肤无关的图层只生成一次：(w, h) -> 光照渐变 / 纯黑透明底
+    _gradient_overlays = {}
+    _shadow_bases = {}
 
     @classmethod
-    def get_local_cache_sync(cls, uuid):
+    def get_avatar(cls, uuid, api_url, callback, priority=PRIORITY_NORMAL, shown_hash=None):
+        """shown_hash: 调用方已经显示的皮肤 hash，结果相同时不再回调"""
         clean_uuid = uuid.replace("-", "")
-        if os.path.exists(cls.CACHE_DIR):
-            pattern = os.path.join(cls.CACHE_DIR, f"{clean_uuid}@*.png")
-            files = glob.glob(pattern)
-            if files:
-                try:
-                    return Image.open(files[0])
-                except:
-                    pass
-        return cls._get_default_steve()
+
+        # 档案缓存命中且图片在本地：直接回调，有效期内不发任何请求；
+        # 已过期则先用旧图，再排一个低优先级的后台重新验证 (皮肤变化时会再次回调)
+        entry = profile_cache.get(clean_uuid, api_url)
+        if entry:
+            skin_hash = cls._skin_hash_of(profile_cache.skin_url(entry))
+            img = cls._load_image(clean_uuid, skin_hash)
+            if img is not None:
+                cls._current_hash[clean_uuid] = skin_hash
+                if skin_hash != shown_hash:
+                    try:
+                        callback(img, skin_hash)
+                    except Exception as e:
+                        if constants.DEBUG_MODE:
+                            print("[AvatarMGR]", e)
+                    shown_hash = skin_hash
+                if profile_cache.is_fresh(entry):
+                    return
+                priority = max(priority, cls.PRIORITY_REVALIDATE)
+
+        with cls._inflight_lock:
+            cls._ensure_workers()
+            entry = cls._inflight.get(clean_uuid)
+            if entry:
+                # 已在队列或下载中：只登记回调；优先级更高时再插一个更靠前的任务
+                entry["callbacks"].append((callback, shown_hash))
+                if priority >= entry["priority"]:
+                    return
+                entry["priority"] = priority
+            else:
+                cls._inflight[clean_uuid] = {"callbacks": [(callback, shown_hash)], "priority": priority,
+                                             "generation": cls._generation, "running": False}
+            cls._queue.put((priority, next(cls._seq), cls._generation, uuid, api_url))
 
     @classmethod
-    def _worker(cls, uuid, api_url, callback):
+    def get_avatars(cls, requests_list, executor):
+        """
+        批量获取头像。requests_list: [(uuid, name, api_url, callback, priority), ...]；
+        executor: 调用方的 TaskExecutor，批量查询作为其任务执行 (随窗口关闭一并取消)。
+        档案缓存已过期 / 缺失的账号按 API 分组，批量接口 POST {api}/api/profiles/minecraft 返回 textures 时
+        先用它查询并写入档案缓存；其余账号再逐个请求档案，且受每主机并发数限制。
+        多数服务器 (包括 LittleSkin) 的批量接口不返回 textures：第一次调用后记住 (PROFILE_BULK_PROBE_TTL)，
+        之后直接逐个请求，不再多发一次批量请求。皮肤图片只在 hash 变化时下载。
+        """
+        groups = {}
+        for uuid, name, api_url, callback, prio in requests_list:
+            entry = profile_cache.get(uuid, api_url)
+            if not name or profile_cache.is_fresh(entry):
+                cls.get_avatar(uuid, api_url, callback, prio)
+                continue
+            # 先用本地旧图 (若有) 显示，并记下已显示的 hash，查询结果相同时不再回调
+            shown_hash = None
+            if entry:
+                skin_hash = cls._skin_hash_of(profile_cache.skin_url(entry))
+                img = cls._load_image(uuid.replace("-", ""), skin_hash)
+                if img is not None:
+                    try:
+                        callback(img, skin_hash)
+                    except Exception as e:
+                        if constants.DEBUG_MODE:
+                            print("[AvatarMGR]", e)
+                    shown_hash = skin_hash
+            groups.setdefault(api_url.rstrip('/'), []).append((uuid, name, callback, prio, shown_hash))
+
+        generation = cls._generation
+        for api_base, items in groups.items():
+            executor.submit(cls._batch_lookup, api_base, items, generation, pass_token=True)
+
+    @classmethod
+    def _batch_lookup(cls, api_base, items, generation, cancel_token=None):
+        # None 表示尚未探测：先发一批，看返回中是否带 textures
+        supported = profile_cache.bulk_has_textures(api_base)
+        # 同一 uuid 只查一次
+        names = list({uuid: name for uuid, name, _, _, _ in items}.values())
         try:
-            if not os.path.exists(cls.CACHE_DIR):
-                os.makedirs(cls.CACHE_DIR, exist_ok=True)
+            with cls._host_slot(api_base):
+                for start in range(0, len(names) if supported is not False else 0, constants.PROFILE_BATCH_SIZE):
+                    if cancel_token is not None and cancel_token.cancelled: return
+                    lookup_url = f"{api_base}/api/profiles/minecraft"
+                    rate_limiter.acquire(lookup_url, PRIORITY_BACKGROUND)
+                    resp = requests.post(lookup_url, json=names[start:start + constants.PROFILE_BATCH_SIZE], timeout=5)
+                    rate_limiter.observe(lookup_url, resp)
+                    resp.raise_for_status()
+                    profiles = [p for p in resp.json() if p.get("id")]
+                    with_textures = [p for p in profiles if "properties" in p]
+                    for profile in with_textures:
+                        profile_cache.put(profile["id"], api_base, cls._extract_textures(profile))
+                    if supported is None and profiles:
+                        supported = bool(with_textures)
+                        profile_cache.set_bulk_has_textures(api_base, supported)
+                    if supported is False: break
+        except Exception as e:
+            if constants.DEBUG_MODE:
+                print("[AvatarMGR] batch lookup:", e)
+
+        # 档案缓存已填好的账号在 get_avatar 中直接命中；其余交给线程池逐个处理
+        if generation != cls._generation: return
+        if cancel_token is not None and cancel_token.cancelled: return
+        for uuid, _, callback, prio, shown_hash in items:
+            cls.get_avatar(uuid, api_base, callback, prio, shown_hash)
+
+    @classmethod
+    def _host_slot(cls, url):
+        host = urlparse(url).netloc
+        with cls._inflight_lock:
+            slot = cls._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(constants.HOST_MAX_CONCURRENCY)
+                cls._host_slots[host] = slot
+        return slot
+
+    @classmethod
+    def cancel_pending(cls):
+        """丢弃所有排队中的任务与未送达的回调 (窗口关闭时调用)，正在下载的任务完成后不再回调"""
+        with cls._inflight_lock:
+            cls._generation += 1
+            cls._inflight.clear()
+            while True:
+                try:
+                    cls._queue.get_nowait()
+                except queue.Empty:
+                    break
 
+    @classmethod
+    def flush_store(cls):
+        """把头像缓存库中记在内存里的使用时间写回 (窗口关闭时调用)"""
+        cls._store.flush()
+
+    @classmethod
+    def _ensure_workers(cls):
+        # 调用方持有 _inflight_lock
+        while len(cls._workers) < cls.MAX_WORKERS:
+            t = threading.Thread(target=cls._pool_loop, daemon=True)
+            t.start()
+            cls._workers.append(t)
+
+    @classmethod
+    def _pool_loop(cls):
+        while True:
+            _, _, generation, uuid, api_url = cls._queue.get()
             clean_uuid = uuid.replace("-", "")
 
+            with cls._inflight_lock:
+                entry = cls._inflight.get(clean_uuid)
+                # 已取消 / 已被其他 (优先级更高的重复) 任务处理
+                if generation != cls._generation or not entry or entry["running"] \
+                        or entry["generation"] != generation:
+                    continue
+                entry["running"] = True
+
+            img = None
             try:
-                api_base = api_url.rstrip('/')
-                profile_url = f"{api_base}/sessionserver/session/minecraft/profile/{clean_uuid}"
+                img = cls._fetch(uuid, api_url)
+            except Exception as e:
+                if constants.DEBUG_MODE:
+                    print("[AvatarMGR]", e)
 
-                resp = requests.get(profile_url, timeout=3)
-                resp.raise_for_status()
-                data = resp.json()
+            with cls._inflight_lock:
+                entry = cls._inflight.get(clean_uuid)
+                if entry and entry["generation"] == generation:
+                    del cls._inflight[clean_uuid]
+                    callbacks = entry["callbacks"]
+                else:
+                    callbacks = []
+
+            if img is None: continue
+            skin_hash = cls._current_hash.get(clean_uuid, STEVE_HASH)
+            for callback, shown_hash in callbacks:
+                # 重新验证后皮肤未变：调用方显示的已是这张图
+                if shown_hash == skin_hash: continue
+                try:
+                    callback(img, skin_hash)
+                except Exception as e:
+                    if constants.DEBUG_MODE:
+                        print("[AvatarMGR]", e)
 
-                skin_url = cls._extract_skin_url(data)
+    @classmethod
+    def get_local_cache_entry(cls, uuid):
+        """
+        同步获取本地头像，返回 (skin_hash, PIL 图片)。
+        命中内存缓存时不做任何文件 I/O 与解码；没有缓存时返回默认 Steve。
+        """
+        clean_uuid = uuid.replace("-", "")
+        skin_hash = cls._current_hash.get(clean_uuid)
+        if skin_hash:
+            img = cls._get_cached_image(clean_uuid, skin_hash)
+            if img is not None:
+                return skin_hash, img
+
+        skin_hash = cls._store.lookup(clean_uuid)
+        if skin_hash:
+            img = cls._load_image(clean_uuid, skin_hash)
+            if img is not None:
+                return skin_hash, img
+        return STEVE_HASH, cls._get_default_steve()
 
-                if not skin_url:
-                    callback(cls._get_default_steve())
-                    return
+    @classmethod
+    def _get_cached_image(cls, clean_uuid, skin_hash):
+        if skin_hash == STEVE_HASH:
+            return cls._get_default_steve()
+        return cls._images.get((clean_uuid, skin_hash, cls.CANVAS_SIZE))
 
-                skin_hash = skin_url.split('/')[-1]
-                expected_filename = f"{clean_uuid}@{skin_hash}.png"
-                expected_path = os.path.join(cls.CACHE_DIR, expected_filename)
+    @classmethod
+    def _load_image(cls, clean_uuid, skin_hash):
+        """只查内存与头像缓存库，不联网；没有时返回 None"""
+        img = cls._get_cached_image(clean_uuid, skin_hash)
+        if img is not None:
+            return img
+        if cls._store.lookup(clean_uuid) != skin_hash:
+            return None
+        entry = cls._store.load(clean_uuid)
+        if not entry or entry[0] != skin_hash:
+            return None
+        try:
+            img = Image.open(io.BytesIO(entry[1]))
+            img.load()
+        except:
+            return None
+        cls._remember(clean_uuid, skin_hash, img)
+        return img
 
-                if os.path.exists(expected_path):
-                    try:
-                        img = Image.open(expected_path)
-                        callback(img)
-                    except:
-                        callback(cls._get_default_steve())
-                    return
+    @staticmethod
+    def _skin_hash_of(skin_url):
+        return skin_url.split('/')[-1] if skin_url else STEVE_HASH
+
+    @classmethod
+    def _remember(cls, clean_uuid, skin_hash, img):
+        cls._current_hash[clean_uuid] = skin_hash
+        if skin_hash != STEVE_HASH:
+            cls._images.put((clean_uuid, skin_hash, cls.CANVAS_SIZE), img)
+
+    @classmethod
+    def _fetch(cls, uuid, api_url):
+        """下载并渲染头像，返回 PIL 图片；失败返回 None"""
+        clean_uuid = uuid.replace("-", "")
+
+        api_base = api_url.rstrip('/')
+        skin_url = cls._resolve_skin_url(clean_uuid, api_base)
+
+        if not skin_url:
+            cls._remember(clean_uuid, STEVE_HASH, None)
+            return cls._get_default_steve()
+
+        skin_hash = skin_url.split('/')[-1]
+
+        # 皮肤未变：内存或头像缓存库中已有，不再下载
+        cached = cls._load_image(clean_uuid, skin_hash)
+        if cached is not None:
+            cls._current_hash[clean_uuid] = skin_hash
+            return cached
 
-                # 下载
-                skin_resp = requests.get(skin_url, timeout=5)
-                skin_resp.raise_for_status()
-                skin_img = Image.open(io.BytesIO(skin_resp.content)).convert("RGBA")
-
-                # --- 核心图像处理：差值放大法 (Hat Expansion) ---
-
-                # 0. 判断皮肤尺寸（是否有帽子层）
-                w, h = skin_img.size
-                has_hat = h >= 64
-
-                # 1. 裁剪原始像素 (8x8)
-                raw_head = skin_img.crop((8, 8, 16, 16))
-                raw_hat = skin_img.crop((40, 8, 48, 16)) if has_hat else None
-
-                # 2. 差异化放大
-                # 头部放大 8 倍 (64x64)
-                head_big = raw_head.resize(
-                    (cls.SCALE_HEAD * 8, cls.SCALE_HEAD * 8),
-                    Image.Resampling.NEAREST
-                )
-
-                # 3. 添加光照渐变（仅头部）
-                head_big = cls._add_lighting_gradient(head_big)
-
-                # 4. 合成画布 (72x72)
-                final = Image.new(
-                    "RGBA",
-                    (cls.CANVAS_SIZE, cls.CANVAS_SIZE),
-                    (0, 0, 0, 0)
-                )
-
-                # 计算头部居中坐标
-                offset = (cls.CANVAS_SIZE - head_big.width) // 2
-
-                # A. 贴头部
-                final.paste(head_big, (offset, offset), head_big)
-
-                # ===== 以下所有逻辑仅在有帽子层时执行 =====
-                if raw_hat:
-                    # 帽子放大 9 倍 (72x72)
-                    hat_big = raw_hat.resize(
-                        (cls.SCALE_HAT * 8, cls.SCALE_HAT * 8),
-                        Image.Resampling.NEAREST
+        # 下载
+        with cls._host_slot(skin_url):
+            rate_limiter.acquire(skin_url, PRIORITY_BACKGROUND)
+            skin_resp = requests.get(skin_url, timeout=5)
+        rate_limiter.observe(skin_url, skin_resp)
+        skin_resp.raise_for_status()
+        skin_img = Image.open(io.BytesIO(skin_resp.content)).convert("RGBA")
+
+        final = cls._render_head(skin_img)
+
+        # 5. 保存 (同一 uuid 的旧头像被原子替换)
+        buf = io.BytesIO()
+        final.save(buf, format="PNG")
+        cls._store.put(clean_uuid, skin_hash, buf.getvalue())
+        cls._remember(clean_uuid, skin_hash, final)
+        return final
+
+    @classmethod
+    def _render_head(cls, skin_img):
+        return cls.render_heads([skin_img])[0][1]
+
+    @classmethod
+    def render_heads(cls, skin_imgs, scales=(1,)):
+        """
+        批量渲染头像。返回与 skin_imgs 对应的列表，每项为 {scale: PIL 图片}；
+        scale=2 等 HiDPI 版本由 1x 结果做整数倍最近邻放大，与逐个渲染的像素完全一致
+        """
+        results = []
+        for skin_img in skin_imgs:
+            base = cls._compose_head(skin_img.convert("RGBA"))
+            variants = {}
+            for scale in scales:
+                if scale == 1:
+                    variants[1] = base
+                else:
+                    variants[scale] = base.resize(
+                        (base.width * scale, base.height * scale), Image.Resampling.NEAREST
                     )
+            results.append(variants)
+        return results
 
-                    # 尺寸保险（防未来改倍率炸）
-                    if hat_big.size != final.size:
-                        hat_big = hat_big.resize(final.size, Image.Resampling.NEAREST)
+    @classmethod
+    def _compose_head(cls, skin_img):
+        # --- 核心图像处理：差值放大法 (Hat Expansion) ---
 
-                    # B. 制作投影
-                    hat_a = hat_big.split()[3]
-                    shadow_a = hat_a.point(lambda i: 60 if i > 0 else 0)
-                    shadow_rgb = Image.new("RGB", hat_big.size, (0, 0, 0))
-                    shadow_layer = Image.merge("RGBA", (*shadow_rgb.split(), shadow_a))
+        # 0. 判断皮肤尺寸（是否有帽子层）
+        w, h = skin_img.size
+        has_hat = h >= 64
 
-                    shadow_canvas = Image.new("RGBA", final.size, (0, 0, 0, 0))
-                    shadow_canvas.paste(shadow_layer, (4, 4))
-                    final = Image.alpha_composite(final, shadow_canvas)
+        # 1. 裁剪原始像素 (8x8)
+        raw_head = skin_img.crop((8, 8, 16, 16))
+        raw_hat = skin_img.crop((40, 8, 48, 16)) if has_hat else None
 
-                    # C. 贴帽子
-                    final = Image.alpha_composite(final, hat_big)
+        # 2. 差异化放大
+        # 头部放大 8 倍 (64x64)
+        head_big = raw_head.resize(
+            (cls.SCALE_HEAD * 8, cls.SCALE_HEAD * 8),
+            Image.Resampling.NEAREST
+        )
 
-                # 5. 保存与回调
-                final.save(expected_path)
-                cls._clean_old_cache(clean_uuid, skin_hash)
-                callback(final)
+        # 3. 添加光照渐变（仅头部）
+        head_big = cls._add_lighting_gradient(head_big)
 
+        # 4. 合成画布 (72x72)
+        final = Image.new(
+            "RGBA",
+            (cls.CANVAS_SIZE, cls.CANVAS_SIZE),
+            (0, 0, 0, 0)
+        )
 
-            except Exception as e:
-                if constants.DEBUG_MODE:
-                    print("[AvatarMGR]", e)
+        # 计算头部居中坐标
+        offset = (cls.CANVAS_SIZE - head_big.width) // 2
 
+        # A. 贴头部
+        final.paste(head_big, (offset, offset), head_big)
 
-        except Exception as e:
-            if constants.DEBUG_MODE:
-                print("[AvatarMGR]", e)
+        # ===== 以下所有逻辑仅在有帽子层时执行 =====
+        if raw_hat:
+            # 帽子放大 9 倍 (72x72)
+            hat_big = raw_hat.resize(
+                (cls.SCALE_HAT * 8, cls.SCALE_HAT * 8),
+                Image.Resampling.NEAREST
+            )
 
-    @staticmethod
-    def _add_lighting_gradient(img):
-        width, height = img.size
-        overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        for y in range(height):
-            factor = y / height
-            if factor < 0.5:
-                alpha = int((0.5 - factor) * 2 * 30)
-                draw.line([(0, y), (width, y)], fill=(255, 255, 255, alpha))
-            else:
-                alpha = int((factor - 0.5) * 2 * 60)
-                draw.line([(0, y), (width, y)], fill=(0, 0, 0, alpha))
-        return Image.alpha_composite(img, overlay)
+            # 尺寸保险（防未来改倍率炸）
+            if hat_big.size != final.size:
+                hat_big = hat_big.resize(final.size, Image.Resampling.NEAREST)
+
+            # B. 制作投影：预生成的黑色底 + 查表得到的透明度
+            shadow_layer = cls._shadow_base(hat_big.size).copy()
+            shadow_layer.putalpha(hat_big.getchannel("A").point(SHADOW_LUT))
+
+            shadow_canvas = Image.new("RGBA", final.size, (0, 0, 0, 0))
+            shadow_canvas.paste(shadow_layer, (4, 4))
+            final = Image.alpha_composite(final, shadow_canvas)
+
+            # C. 贴帽子
+            final = Image.alpha_composite(final, hat_big)
+
+        return final
+
+    @classmethod
+    def _shadow_base(cls, size):
+        base = cls._shadow_bases.get(size)
+        if base is None:
+            base = Image.new("RGBA", size, (0, 0, 0, 0))
+            cls._shadow_bases[size] = base
+        return base
+
+    @classmethod
+    def _gradient_overlay(cls, size):
+        """光照渐变图层 (上亮下暗)，按尺寸缓存，调用方不得修改"""
+        overlay = cls._gradient_overlays.get(size)
+        if overlay is None:
+            width, height = size
+            overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(overlay)
+            for y in range(height):
+                factor = y / height
+                if factor < 0.5:
+                    alpha = int((0.5 - factor) * 2 * 30)
+                    draw.line([(0, y), (width, y)], fill=(255, 255, 255, alpha))
+                else:
+                    alpha = int((factor - 0.5) * 2 * 60)
+                    draw.line([(0, y), (width, y)], fill=(0, 0, 0, alpha))
+            cls._gradient_overlays[size] = overlay
+        return overlay
+
+    @classmethod
+    def _add_lighting_gradient(cls, img):
+        return Image.alpha_composite(img, cls._gradient_overlay(img.size))
+
+    @classmethod
+    def _resolve_skin_url(cls, clean_uuid, api_base):
+        """
+        通过档案缓存获取皮肤地址：有效期内不联网；
+        过期后带 If-None-Match / If-Modified-Since 请求，304 时沿用缓存内容
+        """
+        entry = profile_cache.get(clean_uuid, api_base)
+        if profile_cache.is_fresh(entry):
+            return profile_cache.skin_url(entry)
+
+        profile_url = f"{api_base}/sessionserver/session/minecraft/profile/{clean_uuid}"
+        with cls._host_slot(api_base):
+            rate_limiter.acquire(profile_url, PRIORITY_BACKGROUND)
+            resp = requests.get(profile_url, headers=profile_cache.conditional_headers(entry), timeout=3)
+        rate_limiter.observe(profile_url, resp)
+        if resp.status_code == 304 and entry:
+            profile_cache.touch(clean_uuid, api_base)
+            return profile_cache.skin_url(entry)
+
+        resp.raise_for_status()
+        # 204：角色不存在
+        data = resp.json() if resp.content else {}
+        textures = cls._extract_textures(data)
+        profile_cache.put(clean_uuid, api_base, textures,
+                          resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        return textures.get("SKIN", {}).get("url")
 
     @staticmethod
-    def _extract_skin_url(profile_json):
+    def _extract_textures(profile_json):
         try:
             properties = profile_json.get("properties", [])
             for prop in properties:
                 if prop.get("name") == "textures":
                     texture_b64 = prop.get("value")
                     texture_json = json.loads(base64.b64decode(texture_b64))
-                    return texture_json.get("textures", {}).get("SKIN", {}).get("url")
+                    return texture_json.get("textures", {}) or {}
         except:
             pass
-        return None
+        return {}
 
     @classmethod
-    def _clean_old_cache(cls, uuid, current_hash):
-        pattern = os.path.join(cls.CACHE_DIR, f"{uuid}@*.png")
-        for f in glob.glob(pattern):
-            if current_hash not in f:
-                try:
-                    os.remove(f)
-                except:
-                    pass
+    def _get_default_steve(cls):
+        # 只渲染一次，之后复用同一张图片 (调用方不得修改)
+        if cls._steve is None:
+            cls._steve = cls._render_default_steve()
+        return cls._steve
 
     @staticmethod
-    def _get_default_steve():
+    def _render_default_steve():
         # Steve 基础 (8x8)
         base_color = (188, 134, 97)
         hair_color = (60, 40, 40)
@@ -0,0 +1,177 @@
+# src/avatarStore.py
+"""
+头像缓存库 (cache/avatars.db)。
+
+以前头像缓存是 cache/avatars/{uuid}@{hash}.png 一堆小文件，每次查找都要 glob 整个目录。
+现在改为单个 SQLite 文件，每个 uuid 只有一行 (hash + PNG 数据)：
+  - 打开时把 uuid -> (hash, rowid, size) 读入内存索引，之后查找不碰磁盘
+  - 读取按 rowid 直接定位，只读不写：使用时间记在内存，写入 / 淘汰前或 flush() 时一次性批量写回
+  - 写入为单条 INSERT OR REPLACE，同一 uuid 的旧头像在同一事务中被替换
+  - 总大小超过上限时按最久未使用淘汰
+  - 首次打开时自动导入旧的 PNG 目录并删除旧文件
+"""
+import os
+import sys
+import time
+import sqlite3
+import threading
+from src import constants
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS avatars (
+    uuid    TEXT PRIMARY KEY,
+    hash    TEXT NOT NULL,
+    data    BLOB NOT NULL,
+    size    INTEGER NOT NULL,
+    used_at REAL NOT NULL
+)
+"""
+
+
+class AvatarStore:
+    def __init__(self, db_path, legacy_dir=None, max_bytes=None):
+        self.db_path = db_path
+        self.legacy_dir = legacy_dir
+        self.max_bytes = constants.AVATAR_STORE_MAX_BYTES if max_bytes is None else max_bytes
+        self._conn = None
+        self._index = {}  # uuid -> (hash, rowid, size)
+        self._used = {}  # uuid -> 尚未写回的使用时间
+        self._lock = threading.Lock()
+
+    def _open(self):
+        # 调用方持有 _lock
+        if self._conn is not None: return self._conn
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+        conn.execute(_SCHEMA)
+        conn.commit()
+        self._conn = conn
+        self._migrate_legacy()
+        self._reload_index()
+        return conn
+
+    def _reload_index(self):
+        rows = self._conn.execute("SELECT uuid, hash, rowid, size FROM avatars").fetchall()
+        self._index = {uuid: (h, rowid, size) for uuid, h, rowid, size in rows}
+
+    def _migrate_legacy(self):
+        """导入旧版 {uuid}@{hash}.png 目录 (目录还存在时执行，全部导入后删除)"""
+        if not self.legacy_dir or not os.path.isdir(self.legacy_dir): return
+        imported = []
+        for name in os.listdir(self.legacy_dir):
+            path = os.path.join(self.legacy_dir, name)
+            if not name.endswith(".png") or "@" not in name:
+                continue
+            uuid, skin_hash = name[:-len(".png")].split("@", 1)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO avatars (uuid, hash, data, size, used_at) VALUES (?, ?, ?, ?, ?)",
+                    (uuid, skin_hash, data, len(data), os.path.getmtime(path))
+                )
+                imported.append(path)
+            except (OSError, sqlite3.Error):
+                continue
+        self._conn.commit()
+
+        # 提交成功后只删除已导入的文件；导入失败的留给下次重试，目录清空后才删除
+        for path in imported:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        try:
+            if not os.listdir(self.legacy_dir): os.rmdir(self.legacy_dir)
+        except OSError:
+            pass
+        if constants.DEBUG_MODE:
+            print(f"[AvatarStore] migrated {len(imported)} avatars")
+
+    def lookup(self, uuid):
+        """当前缓存的皮肤 hash，没有返回 None (只查内存索引)"""
+        with self._lock:
+            try:
+                self._open()
+            except sqlite3.Error as e:
+                print(f"[{constants.PROXY_NAME}] 头像缓存不可用: {e}", file=sys.stderr)
+                return None
+            entry = self._index.get(uuid)
+            return entry[0] if entry else None
+
+    def load(self, uuid):
+        """返回 (hash, PNG 数据) 或 None"""
+        with self._lock:
+            try:
+                conn = self._open()
+                entry = self._index.get(uuid)
+                if not entry: return None
+                row = conn.execute("SELECT uuid, hash, data FROM avatars WHERE rowid = ?", (entry[1],)).fetchone()
+                if not row or row[0] != uuid:
+                    # 其他进程替换过这一行：按主键重新定位并刷新索引
+                    row = conn.execute("SELECT uuid, hash, data, rowid FROM avatars WHERE uuid = ?", (uuid,)).fetchone()
+                    if not row:
+                        self._index.pop(uuid, None)
+                        return None
+                    self._index[uuid] = (row[1], row[3], len(row[2]))
+                # 启动时在 Tk 线程上读取：不在这里开写事务
+                self._used[uuid] = time.time()
+                return row[1], bytes(row[2])
+            except sqlite3.Error as e:
+                print(f"[{constants.PROXY_NAME}] 读取头像缓存失败: {e}", file=sys.stderr)
+                return None
+
+    def put(self, uuid, skin_hash, data):
+        """原子替换 uuid 对应的头像，之后按总大小上限淘汰"""
+        with self._lock:
+            try:
+                conn = self._open()
+                with conn:
+                    cur = conn.execute(
+                        "INSERT OR REPLACE INTO avatars (uuid, hash, data, size, used_at) VALUES (?, ?, ?, ?, ?)",
+                        (uuid, skin_hash, sqlite3.Binary(data), len(data), time.time())
+                    )
+                self._index[uuid] = (skin_hash, cur.lastrowid, len(data))
+                self._used.pop(uuid, None)
+                self._evict()
+            except sqlite3.Error as e:
+                print(f"[{constants.PROXY_NAME}] 写入头像缓存失败: {e}", file=sys.stderr)
+
+    def _flush_used(self):
+        # 调用方持有 _lock
+        if not self._used or self._conn is None: return
+        used, self._used = self._used, {}
+        with self._conn:
+            self._conn.executemany("UPDATE avatars SET used_at = ? WHERE uuid = ?",
+                                   [(t, uuid) for uuid, t in used.items()])
+
+    def flush(self):
+        """把内存中的使用时间批量写回 (窗口关闭时调用)"""
+        with self._lock:
+            try:
+                self._flush_used()
+            except sqlite3.Error as e:
+                print(f"[{constants.PROXY_NAME}] 写入头像缓存失败: {e}", file=sys.stderr)
+
+    def _evict(self):
+        # 调用方持有 _lock
+        total = sum(size for _, _, size in self._index.values())
+        if total <= self.max_bytes: return
+        # 淘汰顺序要用到最新的使用时间
+        self._flush_used()
+        with self._conn:
+            for uuid, size in self._conn.execute("SELECT uuid, size FROM avatars ORDER BY used_at").fetchall():
+                if total <= self.max_bytes: break
+                self._conn.execute("DELETE FROM avatars WHERE uuid = ?", (uuid,))
+                self._index.pop(uuid, None)
+                total -= size
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._flush_used()
+                except sqlite3.Error:
+                    pass
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,327 @@
+# src/cli.py
+"""
+无界面的管理命令 (批量部署 / 脚本使用)。
+
+    YggdrasilProxy --yggpro-cli accounts list
+    YggdrasilProxy --yggpro-cli accounts add --email E --password-stdin [--api 名称|序号|URL]
+    YggdrasilProxy --yggpro-cli accounts remove <uuid|名称>
+    YggdrasilProxy --yggpro-cli accounts refresh [<uuid|名称> ...]
+    YggdrasilProxy --yggpro-cli bind <游戏目录> <uuid|名称> [--java 路径]
+    YggdrasilProxy --yggpro-cli java scan [--no-cache]
+    YggdrasilProxy --yggpro-cli java set <路径> [--instance 游戏目录]
+    YggdrasilProxy --yggpro-cli api add <URL> [--name 名称] [--select]
+
+直接使用 ConfigManager / authAPI / javaScanner，不导入任何 GUI 模块。
+结果以一行 JSON 输出到 stdout ({"ok": true, ...})；出错时输出 {"ok": false, "error": ...}，返回码为 1。
+输出中不包含 accessToken。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from src import constants, authAPI, javaScanner, tokenRefresh
+from src.configMGR import config_mgr
+
+
+class CliError(Exception):
+    pass
+
+
+class _ArgumentParser(argparse.ArgumentParser):
+    # 参数错误同样输出一行 JSON 并返回 1，而不是 argparse 默认的用法文本 + 退出码 2
+    def error(self, message):
+        raise CliError(f"{self.prog}: {message}")
+
+
+def _emit(payload):
+    print(json.dumps(payload, ensure_ascii=False))
+
+
+# ================= 辅助 =================
+
+def _short_api_name(api_cfg):
+    # 与向导登录时的写法一致："Custom (xxx)" -> "Custom"
+    name = api_cfg["name"]
+    if "(" in name:
+        name = name.split('(')[0].strip()
+    return name
+
+
+def _add_api(url, name=None):
+    """加入自定义 API (已存在则直接返回其序号)"""
+    url = url.rstrip('/')
+    apis = config_mgr.get_api_list()
+    for i, a in enumerate(apis):
+        if a["base_url"].rstrip('/') == url:
+            return i, False
+
+    if not name:
+        try:
+            domain = url.split('//')[1].split('/')[0]
+            name = f"Custom ({domain})"
+        except:
+            name = f"Custom ({len(apis)})"
+
+    apis.append({"name": name, "base_url": url})
+    config_mgr.set_api_list(apis)
+    return len(apis) - 1, True
+
+
+def _resolve_api(value):
+    """--api 参数：序号、名称或 URL (URL 不存在时自动加入)；为空则使用当前 API"""
+    if value is None:
+        return config_mgr.get_current_api_config()
+
+    apis = config_mgr.get_api_list()
+    if value.isdigit():
+        idx = int(value)
+        if 0 <= idx < len(apis):
+            return dict(apis[idx], base_url=apis[idx]["base_url"].rstrip('/'))
+        raise CliError(f"API index out of range: {value}")
+
+    for a in apis:
+        if a["name"] == value or a["base_url"].rstrip('/') == value.rstrip('/'):
+            return dict(a, base_url=a["base_url"].rstrip('/'))
+
+    if value.startswith("http"):
+        idx, _ = _add_api(value)
+        api = config_mgr.get_api_list()[idx]
+        return dict(api, base_url=api["base_url"].rstrip('/'))
+
+    raise CliError(f"Unknown API: {value}")
+
+
+def _find_account(key):
+    """按 uuid (可带连字符) 或角色名查找账号"""
+    clean = key.replace("-", "").lower()
+    accounts = config_mgr.get_all_accounts()
+    for acc in accounts:
+        if acc["uuid"].replace("-", "").lower() == clean:
+            return acc
+    matches = [acc for acc in accounts if acc.get("name", "").lower() == key.lower()]
+    if len(matches) == 1:
+        return matches[0]
+    if matches:
+        raise CliError(f"Ambiguous account name: {key}")
+    raise CliError(f"Account not found: {key}")
+
+
+def _account_summary(acc, default_uuid=None, bindings=None):
+    summary = {
+        "uuid": acc["uuid"],
+        "name": acc.get("name"),
+        "api_name": acc.get("api_name"),
+        "user_email": acc.get("user_email"),
+        "invalid": bool(acc.get("invalid")),
+    }
+    if default_uuid is not None:
+        summary["default"] = acc["uuid"] == default_uuid
+    if bindings is not None:
+        summary["instances"] = sorted(d for d, u in bindings.items() if u == acc["uuid"])
+    return summary
+
+
+def _java_summary(info):
+    return {
+        "path": info.get("path"),
+        "version": info.get("version"),
+        "major": info.get("major"),
+        "arch": info.get("arch"),
+        "vendor": info.get("vendor"),
+    }
+
+
+# ================= 子命令 =================
+
+def cmd_accounts_list(args):
+    with config_mgr._lock:
+        default_uuid = config_mgr._config_data.get("default_account_uuid") or ""
+        bindings = dict(config_mgr._config_data.get("instance_map", {}))
+    accounts = [_account_summary(a, default_uuid, bindings) for a in config_mgr.get_all_accounts()]
+    return {"accounts": accounts}
+
+
+def cmd_accounts_add(args):
+    if args.password_stdin:
+        password = sys.stdin.readline().rstrip("\r\n")
+    else:
+        password = args.password
+    if not password:
+        raise CliError("Password required (--password or --password-stdin)")
+
+    api = _resolve_api(args.api)
+    data = authAPI.authenticate(f"{api['base_url']}/authserver/authenticate", args.email, password)
+
+    profiles = data.get("availableProfiles", [])
+    if not profiles and data.get("selectedProfile"):
+        profiles = [data["selectedProfile"]]
+    if not profiles:
+        raise CliError("No profiles available for this account")
+
+    added = []
+    for p in profiles:
+        acc = {
+            "uuid": p["id"],
+            "name": p["name"],
+            "accessToken": data["accessToken"],
+            "clientToken": data.get("clientToken"),
+            "token_refreshed_at": time.time(),
+            "user_email": args.email,
+            "api_name": _short_api_name(api)
+        }
+        config_mgr.add_or_update_account(acc)
+        added.append(_account_summary(acc))
+
+    config_mgr.add_history_user(args.email)
+    return {"added": added}
+
+
+def cmd_accounts_remove(args):
+    acc = _find_account(args.account)
+    config_mgr.remove_account(acc["uuid"])
+    return {"removed": acc["uuid"]}
+
+
+def cmd_accounts_refresh(args):
+    if args.accounts:
+        targets = [_find_account(k) for k in args.accounts]
+    else:
+        targets = config_mgr.get_all_accounts()
+
+    results = []
+    for acc in targets:
+        base = config_mgr.get_api_for_account(acc)
+        try:
+            new_data = tokenRefresh.refresh_token(f"{base}/authserver/refresh", acc)
+            acc["accessToken"] = new_data["accessToken"]
+            if new_data.get("clientToken"): acc["clientToken"] = new_data["clientToken"]
+            acc["token_refreshed_at"] = time.time()
+            acc.pop("invalid", None)
+            config_mgr.add_or_update_account(acc)
+            results.append({"uuid": acc["uuid"], "name": acc.get("name"), "refreshed": True})
+        except Exception as e:
+            rejected = authAPI.is_credential_rejected(e)
+            if rejected:
+                # 只有服务器明确拒绝才标记失效；网络错误、5xx、限流不改动账号
+                acc["invalid"] = True
+                config_mgr.add_or_update_account(acc)
+            results.append({"uuid": acc["uuid"], "name": acc.get("name"), "refreshed": False,
+                            "invalid": rejected, "error": str(e)})
+
+    return {"results": results, "ok": all(r["refreshed"] for r in results)}
+
+
+def cmd_bind(args):
+    acc = _find_account(args.account)
+    game_dir = os.path.abspath(args.game_dir)
+    java_path = os.path.abspath(args.java) if args.java else None
+    if java_path and not os.path.exists(java_path):
+        raise CliError(f"Java not found: {java_path}")
+
+    config_mgr.set_instance_binding(game_dir, acc["uuid"])
+    result = {"instance": game_dir, "account": acc["uuid"]}
+    if java_path:
+        config_mgr.set_instance_java_binding(game_dir, java_path)
+        result["java"] = java_path
+    return result
+
+
+def cmd_java_scan(args):
+    infos = javaScanner.find_java_candidates(use_cache=not args.no_cache)
+    return {"current": config_mgr.get_real_java_path(), "java": [_java_summary(i) for i in infos]}
+
+
+def cmd_java_set(args):
+    java_path = os.path.abspath(args.path)
+    javaScanner.inventory.load()
+    info = javaScanner.inventory.probe(java_path)
+    if not info:
+        raise CliError(f"Not a usable Java: {java_path}")
+
+    result = {"java": _java_summary(info)}
+    if args.instance:
+        game_dir = os.path.abspath(args.instance)
+        config_mgr.set_instance_java_binding(game_dir, java_path)
+        result["instance"] = game_dir
+    else:
+        config_mgr.set_real_java_path(java_path)
+        config_mgr.save()
+    return result
+
+
+def cmd_api_add(args):
+    if not args.url.startswith("http"):
+        raise CliError(f"Not a URL: {args.url}")
+    idx, created = _add_api(args.url, args.name)
+    if args.select:
+        config_mgr.set_current_api_index(idx)
+    config_mgr.save()
+    api = config_mgr.get_api_list()[idx]
+    return {"index": idx, "created": created, "selected": config_mgr.get_current_api_index() == idx,
+            "name": api["name"], "base_url": api["base_url"]}
+
+
+# ================= 入口 =================
+
+def build_parser():
+    parser = _ArgumentParser(prog=f"{constants.PROXY_NAME} --yggpro-cli",
+                             description="headless account / binding / Java management")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    accounts = sub.add_parser("accounts", help="账号管理").add_subparsers(dest="action", required=True)
+    p = accounts.add_parser("list", help="列出账号")
+    p.set_defaults(func=cmd_accounts_list)
+    p = accounts.add_parser("add", help="登录并加入账号下的全部角色")
+    p.add_argument("--email", required=True)
+    p.add_argument("--password", help="密码 (会出现在进程列表中，建议使用 --password-stdin)")
+    p.add_argument("--password-stdin", action="store_true", help="从标准输入读取一行作为密码")
+    p.add_argument("--api", help="API 序号、名称或 URL (默认当前 API)")
+    p.set_defaults(func=cmd_accounts_add)
+    p = accounts.add_parser("remove", help="删除账号")
+    p.add_argument("account", help="uuid 或角色名")
+    p.set_defaults(func=cmd_accounts_remove)
+    p = accounts.add_parser("refresh", help="刷新 Token (默认全部账号)")
+    p.add_argument("accounts", nargs="*", help="uuid 或角色名")
+    p.set_defaults(func=cmd_accounts_refresh)
+
+    p = sub.add_parser("bind", help="绑定实例到账号")
+    p.add_argument("game_dir")
+    p.add_argument("account", help="uuid 或角色名")
+    p.add_argument("--java", help="同时为该实例绑定 Java")
+    p.set_defaults(func=cmd_bind)
+
+    java = sub.add_parser("java", help="Java 管理").add_subparsers(dest="action", required=True)
+    p = java.add_parser("scan", help="扫描本机 Java")
+    p.add_argument("--no-cache", action="store_true", help="忽略清单缓存，重新探测全部路径")
+    p.set_defaults(func=cmd_java_scan)
+    p = java.add_parser("set", help="设置全局或实例 Java")
+    p.add_argument("path")
+    p.add_argument("--instance", help="只绑定到该游戏目录")
+    p.set_defaults(func=cmd_java_set)
+
+    api = sub.add_parser("api", help="验证服务器管理").add_subparsers(dest="action", required=True)
+    p = api.add_parser("add", help="加入自定义 API")
+    p.add_argument("url")
+    p.add_argument("--name")
+    p.add_argument("--select", action="store_true", help="设为当前 API")
+    p.set_defaults(func=cmd_api_add)
+
+    return parser
+
+
+def run(argv):
+    try:
+        args = build_parser().parse_args(argv)
+        config_mgr.load()
+        result = args.func(args)
+    except CliError as e:
+        _emit({"ok": False, "error": str(e)})
+        return 1
+    except Exception as e:
+        _emit({"ok": False, "error": f"{type(e).__name__}: {e}"})
+        return 1
+
+    ok = result.pop("ok", True)
+    _emit({"ok": ok, **result})
+    return 0 if ok else 1
@@ -7,6 +7,7 @@ import threading
 import platform
 from cryptography.fernet import Fernet
 from src import constants
+from src.procLock import ProcessLock, LockTimeout
 
 
 class ConfigManager:
@@ -30,6 +31,8 @@ class ConfigManager:
         self._config_file = os.path.join(self._data_dir, constants.CONFIG_FILENAME)
         self._key_file = os.path.join(self._data_dir, constants.KEY_FILENAME)
         self._cipher_suite = None
+        # 配置文件的跨进程写锁 (向导、CLI、凭据代理可能同时写)
+        self._file_lock = ProcessLock(self._config_file + ".lock", timeout=5)
 
         self._config_data = {
             "configVersion": constants.CONFIG_VERSION,
@@ -41,7 +44,9 @@ class ConfigManager:
             "login_history": [],
             "default_account_uuid": None,  # 仍保留作为 GUI 选中的临时存储
             "api_list": constants.DEFAULT_API_LIST,
-            "current_api_index": 0
+            "current_api_index": 0,
+            "shared_runtime_store": False,  # 多份拷贝共用用户级运行时仓库 (见 runtimeStore)
+            "stall_watch": False  # 向导界面卡顿检测 (见 stallWatch)
         }
 
         self._ensure_data_dir()
@@ -96,6 +101,13 @@ class ConfigManager:
         except:
             return None
 
+    def encrypt_secret(self, text):
+        """用配置密钥加密 (供其他模块保存 Token 等敏感数据)"""
+        return self._encrypt_str(text)
+
+    def decrypt_secret(self, text):
+        return self._decrypt_str(text)
+
     # --- IO 操作 ---
     def load(self):
         with self._lock:
@@ -128,22 +140,54 @@ class ConfigManager:
                     return False
             return False
 
+    def _write(self):
+        # 调用方持有 self._lock
+        try:
+            data_to_save = json.loads(json.dumps(self._config_data))
+            accounts = data_to_save.get("accounts", {})
+            for uuid, acc_data in accounts.items():
+                if "accessToken" in acc_data:
+                    acc_data["accessToken"] = self._encrypt_str(acc_data["accessToken"])
+
+            tmp_file = f"{self._config_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data_to_save, f, indent=4)
+
+            shutil.move(tmp_file, self._config_file)
+        except Exception as e:
+            print(f"[{constants.PROXY_NAME}] Config Save Error: {e}", file=sys.stderr)
+
+    def _acquire_file_lock(self):
+        try:
+            return self._file_lock.acquire()
+        except LockTimeout:
+            # 锁被卡住时照旧写入，不能因此丢掉修改
+            print(f"[{constants.PROXY_NAME}] Config lock timeout, saving anyway", file=sys.stderr)
+            return False
+
     def save(self):
         with self._lock:
+            held = self._acquire_file_lock()
             try:
-                data_to_save = json.loads(json.dumps(self._config_data))
-                accounts = data_to_save.get("accounts", {})
-                for uuid, acc_data in accounts.items():
-                    if "accessToken" in acc_data:
-                        acc_data["accessToken"] = self._encrypt_str(acc_data["accessToken"])
-
-                tmp_file = self._config_file + ".tmp"
-                with open(tmp_file, 'w', encoding='utf-8') as f:
-                    json.dump(data_to_save, f, indent=4)
+                self._write()
+            finally:
+                if held: self._file_lock.release()
 
-                shutil.move(tmp_file, self._config_file)
-            except Exception as e:
-                print(f"[{constants.PROXY_NAME}] Config Save Error: {e}", file=sys.stderr)
+    def save_account_fields(self, uuid, fields, expected_token=None):
+        """
+        持有配置文件锁，重新读取配置后再 update_account 并写回。
+        供长时间持有内存快照的进程 (凭据代理) 使用：不会覆盖其他进程在此期间写入的账号 / 绑定 / Java 修改。
+        返回是否有字段发生变化。
+        """
+        with self._lock:
+            held = self._acquire_file_lock()
+            try:
+                self.load()
+                changed = self.update_account(uuid, fields, expected_token=expected_token, save=False)
+                if changed: self._write()
+                return changed
+            finally:
+                if held: self._file_lock.release()
 
     # --- 账号管理 ---
 
@@ -161,6 +205,28 @@ class ConfigManager:
 
             self.save()
 
+    def update_account(self, uuid, fields, expected_token=None, save=True):
+        """
+        只更新已存在账号的部分字段 (值为 None 表示删除该字段)。
+        expected_token 与当前 accessToken 不一致 (其他流程已换过 Token) 时放弃。
+        save=False 只改内存，由调用方在一批更新后统一保存。返回是否有字段发生变化。
+        """
+        with self._lock:
+            acc = self._config_data.get("accounts", {}).get(uuid)
+            if acc is None: return False
+            if expected_token is not None and acc.get("accessToken") != expected_token: return False
+            changed = False
+            for k, v in fields.items():
+                if v is None:
+                    if k in acc:
+                        del acc[k]
+                        changed = True
+                elif acc.get(k) != v:
+                    acc[k] = v
+                    changed = True
+            if changed and save: self.save()
+            return changed
+
     def get_account(self, uuid):
         with self._lock:
             return self._config_data.get("accounts", {}).get(uuid)
@@ -237,6 +303,14 @@ class ConfigManager:
             # 2. 回退到全局设置
             return self._config_data.get("real_java_path")
 
+    def has_instance_java_binding(self, game_dir):
+        """实例是否单独绑定了 (仍然存在的) Java"""
+        with self._lock:
+            if not game_dir: return False
+            norm_path = self._normalize_path(game_dir)
+            bound_java = self._config_data.get("instance_java", {}).get(norm_path)
+            return bool(bound_java and os.path.exists(bound_java))
+
     def set_instance_java_binding(self, game_dir, java_path):
         """
         [新增] 将特定 Java 路径绑定到指定游戏实例
@@ -259,9 +333,27 @@ class ConfigManager:
 
     # --- Getters/Setters ---
 
+    def get_data_dir(self):
+        return self._data_dir
+
     def get_runtime_dir(self):
         return self._runtime_dir
 
+    def get_config_path(self):
+        return self._config_file
+
+    def get_shared_runtime_store(self):
+        with self._lock: return self._config_data.get("shared_runtime_store", False)
+
+    def set_shared_runtime_store(self, enabled):
+        with self._lock: self._config_data["shared_runtime_store"] = bool(enabled)
+
+    def get_stall_watch(self):
+        with self._lock: return self._config_data.get("stall_watch", False)
+
+    def set_stall_watch(self, enabled):
+        with self._lock: self._config_data["stall_watch"] = bool(enabled)
+
     def get_real_java_path(self):
         with self._lock: return self._config_data.get("real_java_path")
 
@@ -289,6 +381,16 @@ class ConfigManager:
             if "base_url" in cfg: cfg["base_url"] = cfg["base_url"].rstrip('/')
             return cfg
 
+    def get_api_for_account(self, auth_data):
+        """账号所属验证服务器的 base_url (按登录时记录的 api_name 匹配，找不到则用当前 API)"""
+        with self._lock:
+            target_name = auth_data.get("api_name")
+            if target_name:
+                for a in self.get_api_list():
+                    if target_name in a["name"] or a["name"] in target_name:
+                        return a["base_url"].rstrip('/')
+            return self.get_current_api_config()["base_url"]
+
     def get_language(self):
         with self._lock: return self._config_data.get("language", "zh_CN")
 
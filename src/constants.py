@@ -21,6 +21,76 @@ DATA_DIR_NAME = ".YggProxy"
 RUNTIME_DIR_NAME = "YggProRuntime"
 JRE_DIR_NAME = "YggProJAVA"
 INJECTOR_FILENAME = "authlib-injector.jar"
+# Java 探测结果缓存 (版本号变化时整体失效)
+JAVA_INVENTORY_FILENAME = "java_inventory.json"
+JAVA_INVENTORY_VERSION = 1
+# 内置资源清单 (构建时生成) 与运行时目录中的已释放资源记录
+ASSET_MANIFEST_FILENAME = "assets-manifest.json"
+ASSET_STAMP_FILENAME = ".assets-stamp.json"
+# 外置资源包 (放在可执行文件旁，见 assetPack)
+ASSET_PACK_FILENAME = "YggdrasilProxy.assets"
+# 用户级共享运行时仓库的子目录名 (见 runtimeStore)
+STORE_DIR_NAME = "store"
+# 多个进程同时初始化运行时目录时，等待其他进程完成解压的最长时间 (秒)
+RUNTIME_LOCK_TIMEOUT = 600
+# 角色档案 (皮肤地址) 缓存：有效期内不发请求，过期后先用旧数据再后台重新验证 (秒)
+PROFILE_CACHE_FILENAME = "profiles.json"
+PROFILE_CACHE_TTL = 6 * 3600
+# 头像缓存库 (SQLite 单文件，见 avatarStore) 及其总大小上限
+AVATAR_STORE_FILENAME = "avatars.db"
+AVATAR_STORE_MAX_BYTES = 32 * 1024 * 1024
+# 同一主机上同时进行的档案 / 皮肤请求数，以及批量档案查询每次提交的名字数
+HOST_MAX_CONCURRENCY = 2
+PROFILE_BATCH_SIZE = 10
+# 各服务器的批量档案接口是否返回 textures (探测一次后记住的时长，不返回的服务器不再调用批量接口)
+PROFILE_BULK_PROBE_TTL = 7 * 24 * 3600
+# 向导打开时后台校验全部账号的线程数 (每个主机仍受 HOST_MAX_CONCURRENCY 限制)
+VALIDATE_MAX_WORKERS = 8
+# 预热 (--yggpro-warm)：超过该时长未刷新的 Token 提前刷新，其余联网校验；
+# 刚刷新或校验通过的 Token 在 TRUST_WINDOW 内启动时不再联网校验
+TOKEN_WARM_AGE = 12 * 3600
+TOKEN_TRUST_WINDOW = 2 * 3600
+# 预取的验证服务器元数据 (启动时通过 authlibinjector.yggdrasil.prefetched 传给 authlib-injector)
+API_META_FILENAME = "api_meta.json"
+API_META_MAX_AGE = 7 * 24 * 3600
+# 凭据代理 (--yggpro-broker，仅 macOS / Linux)：Unix 套接字文件名、客户端超时、校验结果在内存中的有效期
+BROKER_SOCKET_FILENAME = "broker.sock"
+BROKER_CONNECT_TIMEOUT = 0.2
+BROKER_REQUEST_TIMEOUT = 30
+BROKER_VALIDATE_TTL = 300
+# 跨进程单飞刷新 Token：等待其他进程刷新的最长时间、刷新结果记录的有效期 (秒)
+TOKEN_REFRESH_LOCK_TIMEOUT = 30
+TOKEN_REFRESH_RESULT_TTL = 600
+# 验证服务器健康记录 (熔断 + 自适应超时)：
+# 保留最近 N 次耗时；连续失败达到阈值即熔断，冷却后只放行一个进程的试探请求，
+# 试探者超过 TRIAL_TIMEOUT 未回报结果 (例如进程被杀) 时允许其他进程重新试探；
+# 超时取 p95 耗时的若干倍，不低于下限、不超过 authAPI 的默认值
+HOST_HEALTH_FILENAME = "host_health.json"
+HOST_HEALTH_SAMPLES = 20
+HOST_CIRCUIT_FAILURES = 3
+HOST_CIRCUIT_COOLDOWN = 60
+HOST_CIRCUIT_TRIAL_TIMEOUT = 20
+HOST_TIMEOUT_FACTOR = 4
+HOST_TIMEOUT_MIN = 1.5
+# 跨进程令牌桶限流 (同一出口 IP 下多台机器同时启动时避免触发服务器限流)：
+# 每个主机的桶容量与每秒补充量；桶中最后 RESERVE 个令牌只留给启动流程；
+# 429 未给出 Retry-After 时按 BACKOFF_BASE * 2^(连续次数-1) 退避，不超过 BACKOFF_MAX；
+# 启动流程 / 后台请求最多等待的秒数 (预计等待超过该值时直接失败)
+RATE_LIMIT_FILENAME = "ratelimit.json"
+RATE_LIMIT_CAPACITY = 10
+RATE_LIMIT_PER_SECOND = 2.0
+RATE_LIMIT_RESERVE = 3
+RATE_LIMIT_BACKOFF_BASE = 2
+RATE_LIMIT_BACKOFF_MAX = 300
+RATE_LIMIT_CRITICAL_WAIT = 15
+RATE_LIMIT_BACKGROUND_WAIT = 30
+# 设置该环境变量为文件路径时，向导每次启动把首帧 / 可交互耗时以 JSON 行追加到该文件
+STARTUP_TRACE_ENV = "YGGPRO_STARTUP_TRACE"
+# 界面卡顿检测 (见 stallWatch)：环境变量为 1 或阈值毫秒数时开启，也可在配置中开启
+STALL_WATCH_ENV = "YGGPRO_STALL_WATCH"
+STALL_THRESHOLD_MS = 250
+STALL_HEARTBEAT_MS = 50
+STALL_LOG_FILENAME = "stalls.log"
 
 # 默认 API 列表模板
 DEFAULT_API_LIST = [
@@ -0,0 +1,278 @@
+# src/credBroker.py
+"""
+本机凭据代理 (可选，仅 macOS / Linux)。
+
+每个启动进程原本都要从头读配置、读 Fernet 密钥、解密 Token 并各自联网校验，
+同时启动 N 个实例就重复 N 次。开启代理后：
+  - 常驻进程 (--yggpro-broker) 在内存中保存解密后的配置，配置文件修改时间变化时自动重新加载
+  - 通过 Unix 套接字提供 get_binding / get_token，只接受同一用户的进程连接 (SO_PEERCRED / LOCAL_PEERCRED)
+  - 所有校验与刷新都由代理完成：同一账号同时只有一次联网，校验结果在内存中缓存 BROKER_VALIDATE_TTL 秒
+  - 启动进程先尝试连接代理，连不上 (未运行 / Windows) 则照旧直接处理
+
+协议：每个连接一行 JSON 请求 {"op": ..., ...}，一行 JSON 响应 {"status": ..., ...}。
+"""
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import struct
+import hashlib
+import tempfile
+import threading
+import socketserver
+import requests
+from src import constants, authAPI, tokenRefresh
+from src.configMGR import config_mgr
+
+STATUS_OK = "ok"
+STATUS_NO_BINDING = "no_binding"
+STATUS_INVALID = "invalid"
+STATUS_ERROR = "error"
+
+# macOS <sys/un.h>：Python 未导出这两个常量
+_SOL_LOCAL = 0
+_LOCAL_PEERCRED = 1
+
+
+def is_supported():
+    return hasattr(socket, "AF_UNIX") and sys.platform != "win32"
+
+
+def socket_path():
+    path = os.path.join(config_mgr.get_data_dir(), constants.BROKER_SOCKET_FILENAME)
+    # sun_path 长度有限 (macOS 104 字节)；数据目录太深时改放临时目录，按数据目录区分
+    if len(path.encode()) < 100:
+        return path
+    digest = hashlib.sha1(config_mgr.get_data_dir().encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"yggpro-{os.getuid()}-{digest}.sock")
+
+
+def _peer_uid(sock):
+    """对端进程的 uid；无法获取返回 None"""
+    try:
+        if hasattr(socket, "SO_PEERCRED"):
+            # Linux: struct ucred { pid_t pid; uid_t uid; gid_t gid; }
+            creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+            return struct.unpack("3i", creds)[1]
+        if sys.platform == "darwin":
+            # macOS: struct xucred { u_int cr_version; uid_t cr_uid; ... }
+            creds = sock.getsockopt(_SOL_LOCAL, _LOCAL_PEERCRED, 76)
+            return struct.unpack_from("Ii", creds)[1]
+    except OSError:
+        pass
+    return None
+
+
+# ================= 代理端 =================
+
+class _Broker:
+    def __init__(self):
+        self._config_mtime = None
+        self._reload_lock = threading.Lock()
+        self._account_locks = {}
+        self._locks_guard = threading.Lock()
+        self._validated_at = {}  # uuid -> (accessToken, 校验通过的时间)
+        self._session = requests.Session()
+
+    def maybe_reload(self):
+        # 向导 / CLI / 其他进程写过配置后重新加载
+        try:
+            mtime = os.stat(config_mgr.get_config_path()).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._reload_lock:
+            if mtime != self._config_mtime:
+                config_mgr.load()
+                self._config_mtime = mtime
+
+    def _save_fields(self, uuid, fields, expected_token):
+        # 联网期间向导 / CLI 可能写过配置：在配置文件锁内重新读取后只改这一个账号
+        with self._reload_lock:
+            config_mgr.save_account_fields(uuid, fields, expected_token=expected_token)
+            # 自己写的不必再重新加载
+            try:
+                self._config_mtime = os.stat(config_mgr.get_config_path()).st_mtime_ns
+            except OSError:
+                pass
+
+    def _account_lock(self, uuid):
+        with self._locks_guard:
+            lock = self._account_locks.get(uuid)
+            if lock is None:
+                lock = self._account_locks[uuid] = threading.Lock()
+            return lock
+
+    def get_binding(self, game_dir):
+        uuid = config_mgr.get_account_for_instance(game_dir)
+        acc = config_mgr.get_account(uuid) if uuid else None
+        result = {
+            "java": config_mgr.get_java_for_instance(game_dir),
+            "has_java_binding": config_mgr.has_instance_java_binding(game_dir),
+        }
+        if not acc:
+            return {"status": STATUS_NO_BINDING, **result}
+        return {"status": STATUS_OK, "uuid": uuid, "name": acc.get("name"), **result}
+
+    def get_token(self, game_dir):
+        uuid = config_mgr.get_account_for_instance(game_dir)
+        if not uuid or not config_mgr.get_account(uuid):
+            return {"status": STATUS_NO_BINDING}
+
+        # 同一账号的并发请求只联网一次，后来者直接拿到结果
+        with self._account_lock(uuid):
+            acc = dict(config_mgr.get_account(uuid) or {})
+            if not acc:
+                return {"status": STATUS_NO_BINDING}
+            if acc.get("invalid"):
+                return {"status": STATUS_INVALID, "uuid": uuid, "name": acc.get("name")}
+
+            token = acc.get("accessToken")
+            checked = self._validated_at.get(uuid)
+            now = time.time()
+            trusted = (checked and checked[0] == token and now - checked[1] < constants.BROKER_VALIDATE_TTL) or \
+                now - tokenRefresh.verified_at(acc) < constants.TOKEN_TRUST_WINDOW
+
+            if not trusted:
+                base = config_mgr.get_api_for_account(acc)
+                try:
+                    valid = authAPI.validate(f"{base}/authserver/validate", token, acc.get("clientToken"),
+                                             session=self._session)
+                except requests.exceptions.RequestException as e:
+                    # 服务器不可达：不刷新，由启动进程按离线处理
+                    return {"status": STATUS_ERROR, "error": str(e)}
+                if not valid:
+                    try:
+                        new = tokenRefresh.refresh_token(f"{base}/authserver/refresh", acc,
+                                                         session=self._session)
+                    except Exception as e:
+                        if not authAPI.is_credential_rejected(e):
+                            # 5xx / 429 / 网络错误：不改动账号，由启动进程按服务器不可达处理
+                            return {"status": STATUS_ERROR, "error": str(e)}
+                        self._save_fields(uuid, {"invalid": True}, token)
+                        return {"status": STATUS_INVALID, "uuid": uuid, "name": acc.get("name"), "error": str(e)}
+
+                    fields = {"accessToken": new["accessToken"], "token_refreshed_at": time.time(), "invalid": None}
+                    if new.get("clientToken"): fields["clientToken"] = new["clientToken"]
+                    self._save_fields(uuid, fields, token)
+                    acc.update(fields)
+                    token = acc["accessToken"]
+                self._validated_at[uuid] = (token, time.time())
+
+            return {
+                "status": STATUS_OK,
+                "account": {k: acc.get(k) for k in ("uuid", "name", "accessToken", "clientToken", "api_name")},
+            }
+
+    def handle(self, request):
+        op = request.get("op")
+        if op == "ping":
+            return {"status": STATUS_OK, "pid": os.getpid()}
+        self.maybe_reload()
+        if op == "get_binding":
+            return self.get_binding(request.get("game_dir"))
+        if op == "get_token":
+            return self.get_token(request.get("game_dir"))
+        return {"status": STATUS_ERROR, "error": f"unknown op: {op}"}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        uid = _peer_uid(self.connection)
+        if uid is None or uid != os.getuid():
+            # 无法确认对端身份时一律拒绝
+            self._reply({"status": STATUS_ERROR, "error": "permission denied"})
+            return
+        try:
+            line = self.rfile.readline(65536)
+            request = json.loads(line)
+            response = self.server.broker.handle(request)
+        except Exception as e:
+            response = {"status": STATUS_ERROR, "error": f"{type(e).__name__}: {e}"}
+        self._reply(response)
+
+    def _reply(self, response):
+        try:
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+        except OSError:
+            pass
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    # 多个实例同时启动时会同时连接，默认的 5 不够
+    request_queue_size = 64
+
+
+def serve():
+    """前台运行代理 (--yggpro-broker)，直到被终止"""
+    if not is_supported():
+        print(f"[{constants.PROXY_NAME}] Credential broker is not supported on this platform.", file=sys.stderr)
+        return 1
+
+    path = socket_path()
+    if request("ping") is not None:
+        print(f"[{constants.PROXY_NAME}] Credential broker already running: {path}", file=sys.stderr)
+        return 1
+    try:
+        os.remove(path)  # 上次异常退出留下的套接字文件
+    except OSError:
+        pass
+
+    broker = _Broker()
+    broker.maybe_reload()
+
+    old_umask = os.umask(0o177)  # 套接字文件只允许本用户访问
+    try:
+        server = _Server(path, _Handler)
+    finally:
+        os.umask(old_umask)
+    server.broker = broker
+
+    # systemd / launchd 停止服务时正常退出并删除套接字文件 (shutdown 必须在其他线程调用)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+
+    print(f"[{constants.PROXY_NAME}] Credential broker listening on {path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return 0
+
+
+# ================= 客户端 =================
+
+def request(op, **params):
+    """向代理发送请求；代理未运行或出错返回 None (调用方回退到直接模式)"""
+    if not is_supported(): return None
+    path = socket_path()
+    if not os.path.exists(path): return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(constants.BROKER_CONNECT_TIMEOUT)
+        sock.connect(path)
+        sock.settimeout(constants.BROKER_REQUEST_TIMEOUT)
+        sock.sendall(json.dumps({"op": op, **params}).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline(1 << 20)
+        return json.loads(line) if line else None
+    except (OSError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+
+def get_token(game_dir):
+    """代理返回的 get_token 响应；代理不可用或内部出错返回 None"""
+    response = request("get_token", game_dir=game_dir)
+    if not response or response.get("status") == STATUS_ERROR:
+        return None
+    return response
@@ -1,13 +1,16 @@
 # src/guiWizard.py
 import os
+import json
+import time
 import threading
 import tkinter
 import customtkinter as ctk
 from tkinter import messagebox
 
-from src import constants, authAPI, javaScanner
+from src import constants, authAPI, javaScanner, stallWatch, accountValidator, tokenRefresh
 from src.configMGR import config_mgr
-from src.avatarMGR import AvatarManager
+from src.avatarMGR import AvatarManager, LRUCache, image_nbytes
+from src.taskExecutor import TaskExecutor, CancelToken
 from src.i18n import I18n
 
 # ================= 1. 外观配置 =================
@@ -27,31 +30,62 @@ COLOR_BTN_GRAY = "#444444"  # 通用灰色按钮
 COLOR_BTN_GRAY_HOVER = "#555555"
 ZWSP = "\u200b"
 
+AVATAR_SIZE = 32
+# 账号列表：超过阈值后只创建可见区域 (上下各多留 OVERSCAN 行) 的卡片，其余用占位框撑开高度
+ACCOUNT_ROW_HEIGHT = 52  # 卡片高度 (48) + 上下 pady
+ACCOUNT_LIST_VIRTUALIZE_THRESHOLD = 40
+ACCOUNT_LIST_OVERSCAN = 4
+# 已创建的 CTkImage：(uuid, skin_hash, size) -> CTkImage，卡片重建时直接复用
+_ctk_avatar_cache = LRUCache(8 * 1024 * 1024, lambda img: image_nbytes(img.cget("light_image")))
+
+
+def _get_ctk_avatar(uuid, skin_hash, pil_img, size=AVATAR_SIZE):
+    key = (uuid.replace("-", ""), skin_hash, size)
+    ctk_img = _ctk_avatar_cache.get(key)
+    if ctk_img is None:
+        ctk_img = ctk.CTkImage(light_image=pil_img, dark_image=pil_img, size=(size, size))
+        _ctk_avatar_cache.put(key, ctk_img)
+    return ctk_img
+
 
 class AccountCard(ctk.CTkFrame):
     """左侧角色列表中的单个卡片"""
 
-    def __init__(self, master, auth_data, is_selected, on_click, on_right_click):
+    def __init__(self, master, auth_data, is_selected, on_click, on_right_click, tasks, avatar_priority=None,
+                 defer_avatar=False):
         super().__init__(master, fg_color=COLOR_CARD_SELECT if is_selected else "transparent", corner_radius=6)
 
+        # 头像回调经共用执行器转回主线程；卡片销毁时取消令牌，迟到的结果直接丢弃
+        self._tasks = tasks
+        self._avatar_token = CancelToken()
+
         self.auth_data = auth_data
         self.uuid = auth_data.get("uuid", "")
         self.name = auth_data.get("name", "Unknown")
         self.on_click = on_click
+        self.is_selected = is_selected
+        # 选中的账号最先加载头像，其余按列表位置排队
+        if is_selected:
+            self.avatar_priority = AvatarManager.PRIORITY_HIGH
+        elif avatar_priority is not None:
+            self.avatar_priority = avatar_priority
+        else:
+            self.avatar_priority = AvatarManager.PRIORITY_NORMAL
 
         self.grid_columnconfigure(1, weight=1)
 
         # ================= 头像初始化 (修复闪烁) =================
         # 1. 同步获取：尝试直接拿本地缓存或默认Steve图片
         # 这样创建时就直接显示图片，没有文字阶段
-        initial_img = AvatarManager.get_local_cache_sync(self.uuid)
-        ctk_img = ctk.CTkImage(light_image=initial_img, dark_image=initial_img, size=(32, 32))
+        # 内存缓存命中时不读盘、不解码，也不重新创建 CTkImage
+        self._skin_hash, initial_img = AvatarManager.get_local_cache_entry(self.uuid)
+        ctk_img = _get_ctk_avatar(self.uuid, self._skin_hash, initial_img)
         self._kept_image = ctk_img  # 防止回收
 
         self.avatar = ctk.CTkLabel(
             self, text="", image=ctk_img,  # 直接设置图片，text为空
             fg_color="transparent",
-            width=32, height=32
+            width=AVATAR_SIZE, height=AVATAR_SIZE
         )
         self.avatar.grid(row=0, column=0, rowspan=2, padx=(10, 8), pady=8)
         # ========================================================
@@ -63,16 +97,7 @@ class AccountCard(ctk.CTkFrame):
         self.name_lbl.grid(row=0, column=1, sticky="sw", padx=(0, 10), pady=(6, 0))
 
         # 3. 来源
-        if auth_data.get("invalid") == True:
-            # 失效状态：显示红色警告
-            display_text = I18n.t("account_source_invalid")
-            # 使用浅红色，在深色背景下更清晰
-            text_color = "#FF5555"
-        else:
-            # 正常状态：显示 API 名称 (灰色)
-            display_text = auth_data.get("api_name", I18n.t("account_source_default"))
-            text_color = "gray"
-
+        display_text, text_color = self._source_display(auth_data)
         self.source_lbl = ctk.CTkLabel(
             self, text=display_text, font=("Microsoft YaHei UI", 11),
             text_color=text_color, anchor="w"
@@ -94,23 +119,49 @@ class AccountCard(ctk.CTkFrame):
             widget.bind("<Button-1>", _left)
             widget.bind("<Button-3>", _right)
             widget.bind("<Button-2>", _right)
+            widget.bind("<Enter>", self._on_enter)
+            widget.bind("<Leave>", self._on_leave)
 
-            if not is_selected:
-                widget.bind("<Enter>", self._on_enter)
-                widget.bind("<Leave>", self._on_leave)
-
-        if not is_selected:
-            self.bind("<Enter>", self._on_enter)
-            self.bind("<Leave>", self._on_leave)
+        self.bind("<Enter>", self._on_enter)
+        self.bind("<Leave>", self._on_leave)
 
         # --- 启动异步更新 ---
         # 虽然已经显示了图片，但仍需后台检查是否有新皮肤
-        self._start_avatar_update()
+        # defer_avatar: 由列表统一调用 AvatarManager.get_avatars 批量检查
+        if not defer_avatar:
+            self._start_avatar_update()
+
+    @staticmethod
+    def _source_display(auth_data):
+        if auth_data.get("invalid") == True:
+            # 失效状态：显示红色警告 (浅红色，在深色背景下更清晰)
+            return I18n.t("account_source_invalid"), "#FF5555"
+        # 正常状态：显示 API 名称 (灰色)
+        return auth_data.get("api_name", I18n.t("account_source_default")), "gray"
+
+    def set_selected(self, is_selected):
+        """只改背景色，不重建卡片"""
+        if is_selected == self.is_selected: return
+        self.is_selected = is_selected
+        self.configure(fg_color=COLOR_CARD_SELECT if is_selected else "transparent")
+
+    def update_data(self, auth_data):
+        """账号数据变化 (改名 / 失效 / 重新登录) 时只更新文字"""
+        if auth_data == self.auth_data: return
+        self.auth_data = auth_data
+        name = auth_data.get("name", "Unknown")
+        if name != self.name:
+            self.name = name
+            self.name_lbl.configure(text=name)
+        display_text, text_color = self._source_display(auth_data)
+        self.source_lbl.configure(text=display_text, text_color=text_color)
 
     def _on_enter(self, event):
+        if self.is_selected: return
         self.configure(fg_color=COLOR_CARD_HOVER)
 
     def _on_leave(self, event):
+        if self.is_selected: return
         x, y = self.winfo_pointerx(), self.winfo_pointery()
         widget_x, widget_y = self.winfo_rootx(), self.winfo_rooty()
         width, height = self.winfo_width(), self.winfo_height()
@@ -122,56 +173,47 @@ class AccountCard(ctk.CTkFrame):
     # ================== 后台检查更新 ==================
 
     def _start_avatar_update(self):
-        api_url = None
-        target_name = self.auth_data.get("api_name")
-
-        if target_name:
-            apis = config_mgr.get_api_list()
-            for a in apis:
-                if target_name in a["name"] or a["name"] in target_name:
-                    api_url = a["base_url"]
-                    break
+        # 调用异步方法检查更新 (线程池排队，同一账号的重复请求会合并)
+        AvatarManager.get_avatar(self.uuid, self._resolve_api_url(), self._on_avatar_updated,
+                                 priority=self.avatar_priority)
+
+    def avatar_request(self):
+        """供 AvatarManager.get_avatars 使用的 (uuid, name, api_url, callback, priority)"""
+        return self.uuid, self.name, self._resolve_api_url(), self._on_avatar_updated, self.avatar_priority
 
-        if not api_url:
-            api_url = config_mgr.get_current_api_config()["base_url"]
+    def _resolve_api_url(self):
+        return config_mgr.get_api_for_account(self.auth_data)
 
-        # 调用异步方法检查更新
-        AvatarManager.get_avatar(self.uuid, api_url, self._on_avatar_updated)
+    def destroy(self):
+        self._avatar_token.cancel()
+        super().destroy()
 
-    def _on_avatar_updated(self, pil_img):
+    def _on_avatar_updated(self, pil_img, skin_hash):
+        # 可能在头像线程中调用：不碰 Tk，交给执行器在主线程批量处理
         if not pil_img:
             return
-        # 第一层保险：Card 已经不存在
-        if not self.winfo_exists():
-            return
-        try:
-            # 丢给主线程，真正更新放到 UI 线程
-            self.after(0, lambda img=pil_img: self._safe_apply_avatar(img))
-        except RuntimeError:
-            # after 调用时窗口已经被销毁
-            pass
-
-    def _safe_apply_avatar(self, pil_img):
-        # 第二层保险：after 执行时再次确认
-        if not self.winfo_exists():
-            return
-        try:
-            self._apply_avatar(pil_img)
-        except RuntimeError:
-            # Tk 已关闭 / Widget 已回收
-            pass
+        self._tasks.post(self._apply_avatar, pil_img, skin_hash, token=self._avatar_token)
 
-    def _apply_avatar(self, pil_img):
-        if not self.winfo_exists(): return
+    def _apply_avatar(self, pil_img, skin_hash):
+        # 皮肤没变：已经显示的就是这张图
+        if skin_hash == self._skin_hash: return
 
-        ctk_img = ctk.CTkImage(light_image=pil_img, dark_image=pil_img, size=(32, 32))
-        self._kept_image = ctk_img  # 防止回收
+        self._skin_hash = skin_hash
+        self._kept_image = _get_ctk_avatar(self.uuid, skin_hash, pil_img)  # 防止回收
         self.avatar.configure(image=self._kept_image)
 
 
 class ModernWizard(ctk.CTk):
-    def __init__(self, force_show=False, game_dir=None):
+    def __init__(self, force_show=False, game_dir=None, on_startup_measured=None):
+        # 启动计时：首帧 (骨架绘制完成) / 账号列表填充 / 可交互 (后台任务已启动、事件循环空闲)
+        self._t_start = time.perf_counter()
+        self.startup_metrics = {}
+        self._on_startup_measured = on_startup_measured
+
         super().__init__()
+        # 后台任务统一由执行器管理，窗口关闭时一并取消
+        # (账号校验、Java 扫描、每个 API 一个头像批量查询同时进行时，仍要给启动任务留出线程)
+        self.tasks = TaskExecutor(self, max_workers=6)
         self.setup_success = False
         self.game_dir = game_dir  # 【新增】保存实例路径
 
@@ -202,20 +244,123 @@ class ModernWizard(ctk.CTk):
         config_mgr.load()
         self.current_auth_data = None
 
+        # 账号列表状态：uuid -> 已创建的卡片；按顺序的 uuid；uuid -> 账号数据
+        self._cards = {}
+        self._account_order = []
+        self._account_data = {}
+        self._selected_uuid = None
+        self._packed_sequence = None
+        self._list_update_pending = False
+
+        # 启动第二阶段之前创建的卡片，头像联网检查推迟到第三阶段
+        self._network_ready = False
+        self._deferred_avatar_cards = []
+
+        # 进行中的启动任务 (后台刷新 Token 并保存配置)；已取消但仍可能在运行的任务也要记录
+        self._launch_token = None
+        self._launch_tokens = []
+        # 每个账号一把锁：同一账号的刷新串行执行 (后一次使用前一次刷新得到的 Token)；
+        # 启动只等待所选账号，不会排在后台校验其他账号的刷新之后
+        self._account_locks = {}
+        self._account_locks_guard = threading.Lock()
+
+        # 打开时后台校验全部账号；关闭后要等它把刷新得到的 Token 写入配置
+        self._validation_token = None
+
         self.grid_columnconfigure(0, weight=0)
         self.grid_columnconfigure(1, weight=1)
         self.grid_rowconfigure(0, weight=1)
 
+        # 分阶段启动：1. 先画出骨架 -> 2. 空闲时用本地缓存填充账号 -> 3. 再启动联网与 Java 扫描
         self._init_sidebar()
         self._init_main_panel()
+        self.after_idle(self._startup_wait_for_paint)
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        # 可选：检测主线程卡顿并记录调用栈
+        self._stall_watch = stallWatch.start_for(self)
+
+    # ================= 分阶段启动 =================
+
+    def _elapsed_ms(self):
+        return round((time.perf_counter() - self._t_start) * 1000, 1)
 
+    def _startup_wait_for_paint(self):
+        # 骨架要等窗口映射后才会真正绘制
+        if self.winfo_ismapped():
+            self._startup_mark_painted()
+        else:
+            self.bind("<Map>", self._on_first_map, add="+")
+
+    def _on_first_map(self, event):
+        # 子控件的 <Map> 也会冒泡到这里；只处理窗口本身的第一次
+        if event.widget is not self or "first_paint_ms" in self.startup_metrics: return
+        self._startup_mark_painted()
+
+    def _startup_mark_painted(self):
+        # 执行完挂起的布局与重绘，骨架此时已画出；账号卡片留到下一轮事件循环再创建
+        self.update_idletasks()
+        self.startup_metrics["first_paint_ms"] = self._elapsed_ms()
+        self.after(1, self._startup_fill_accounts)
+
+    def _startup_fill_accounts(self):
+        if not self.winfo_exists(): return
         self._refresh_account_list()
-        javaScanner.start_scan(self._on_java_scan_finished)
+        self.startup_metrics["accounts_ms"] = self._elapsed_ms()
+        self.startup_metrics["accounts"] = len(self._account_order)
+        # 让账号列表先绘制出来
+        self.after(1, self._startup_start_background)
 
-        self.protocol("WM_DELETE_WINDOW", self._on_close)
+    def _startup_start_background(self):
+        if not self.winfo_exists(): return
+        self._network_ready = True
+        cards = [c for c in self._deferred_avatar_cards if c.winfo_exists()]
+        self._deferred_avatar_cards = []
+        if cards:
+            AvatarManager.get_avatars([c.avatar_request() for c in cards], self.tasks)
+        self.tasks.submit(javaScanner.find_java_candidates, pass_token=True,
+                          on_done=self._on_java_scan_finished)
+        if self._account_order:
+            self._validation_token = self.tasks.submit(
+                accountValidator.validate_all, pass_token=True, account_lock=self._account_lock,
+                on_result=lambda uuid, status, acc: self.tasks.post(self._on_account_validated, uuid, acc)
+            )
+        self.after_idle(self._startup_mark_interactive)
+
+    def _startup_mark_interactive(self):
+        self.startup_metrics["interactive_ms"] = self._elapsed_ms()
+
+        trace_file = os.environ.get(constants.STARTUP_TRACE_ENV)
+        if trace_file:
+            try:
+                with open(trace_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"ts": time.time(), **self.startup_metrics}) + "\n")
+            except OSError as e:
+                print(f"[{constants.PROXY_NAME}] 写入启动计时失败: {e}")
+
+        if self._on_startup_measured:
+            self._on_startup_measured(dict(self.startup_metrics))
+
+    def destroy(self):
+        self.tasks.shutdown()
+        AvatarManager.flush_store()
+        if getattr(self, "_stall_watch", None):
+            self._stall_watch.stop()
+            self._stall_watch = None
+        super().destroy()
 
     def _on_close(self):
         self.setup_success = False
+        if self._launch_token:
+            self._launch_token.cancel()
+        pending = [t for t in self._launch_tokens if t.future and not t.future.done()]
+        if pending:
+            # 刷新成功后旧 Token 已失效，必须等新 Token 写入配置再退出
+            self.withdraw()
+            for t in pending:
+                t.wait()
+        AvatarManager.cancel_pending()
+        _ctk_avatar_cache.clear()  # CTkImage 绑定当前 Tk 实例，窗口销毁后不可复用
         self.destroy()
 
     # 自定义弹窗
@@ -276,6 +421,17 @@ class ModernWizard(ctk.CTk):
         )
         self.scroll_frame.grid(row=1, column=0, sticky="nsew", padx=0, pady=0)
 
+        # 虚拟列表的上下占位框；滚动时重新计算可见区域
+        self._top_spacer = ctk.CTkFrame(self.scroll_frame, height=1, fg_color="transparent")
+        self._bottom_spacer = ctk.CTkFrame(self.scroll_frame, height=1, fg_color="transparent")
+        scrollbar_set = self.scroll_frame._scrollbar.set
+
+        def _on_yscroll(first, last):
+            scrollbar_set(first, last)
+            self._schedule_account_window_update()
+
+        self.scroll_frame._parent_canvas.configure(yscrollcommand=_on_yscroll)
+
         # 底部启动区
         self.launch_area = ctk.CTkFrame(self.sidebar, fg_color="transparent")
         self.launch_area.grid(row=2, column=0, sticky="ew", padx=15, pady=(37, 20))
@@ -490,29 +646,125 @@ class ModernWizard(ctk.CTk):
     # ================= 逻辑处理 =================
 
     def _refresh_account_list(self):
-        for widget in self.scroll_frame.winfo_children():
-            widget.destroy()
-
+        """
+        按 uuid 与现有卡片对比：新增的创建、删除的销毁、已有的只更新文字与选中状态，
+        不再整体销毁重建
+        """
         accounts = config_mgr.get_all_accounts()
-        default_uuid = config_mgr._config_data.get("default_account_uuid")
-
-        for acc in accounts:
-            is_sel = (acc["uuid"] == default_uuid)
-            if is_sel: self.current_auth_data = acc
-            AccountCard(
-                self.scroll_frame,
-                acc,
-                is_sel,
-                self._select_account,
-                self._show_context_menu
-            ).pack(fill="x", pady=2, padx=(10, 0))
+        self._selected_uuid = config_mgr._config_data.get("default_account_uuid")
+        self._account_order = [acc["uuid"] for acc in accounts]
+        self._account_data = {acc["uuid"]: acc for acc in accounts}
+        self.current_auth_data = self._account_data.get(self._selected_uuid)
+
+        self._render_account_window()
 
         if not self.current_auth_data and accounts:
             self._select_account(accounts[0]["uuid"])
 
+    def _on_account_validated(self, uuid, acc):
+        # 后台校验结果：只更新对应卡片的标记
+        if uuid not in self._account_data: return
+        self._account_data[uuid] = acc
+        if uuid == self._selected_uuid:
+            self.current_auth_data = acc
+        card = self._cards.get(uuid)
+        if card: card.update_data(acc)
+
     def _select_account(self, uuid):
+        if uuid not in self._account_data: return
         config_mgr.set_default_account(uuid)
-        self._refresh_account_list()
+
+        # 只有新旧两张卡片需要变化
+        old_card = self._cards.get(self._selected_uuid)
+        if old_card: old_card.set_selected(False)
+        new_card = self._cards.get(uuid)
+        if new_card: new_card.set_selected(True)
+
+        self._selected_uuid = uuid
+        self.current_auth_data = self._account_data[uuid]
+
+    def _visible_account_range(self):
+        count = len(self._account_order)
+        if count <= ACCOUNT_LIST_VIRTUALIZE_THRESHOLD:
+            return 0, count
+
+        canvas = self.scroll_frame._parent_canvas
+        total_height = count * ACCOUNT_ROW_HEIGHT
+        view_height = canvas.winfo_height()
+        if view_height <= 1:  # 窗口尚未显示
+            view_height = 400
+        top = canvas.yview()[0] * total_height
+
+        start = max(0, int(top // ACCOUNT_ROW_HEIGHT) - ACCOUNT_LIST_OVERSCAN)
+        end = min(count, int((top + view_height) // ACCOUNT_ROW_HEIGHT) + 1 + ACCOUNT_LIST_OVERSCAN)
+        return start, end
+
+    def _schedule_account_window_update(self):
+        if self._list_update_pending or len(self._account_order) <= ACCOUNT_LIST_VIRTUALIZE_THRESHOLD:
+            return
+        self._list_update_pending = True
+
+        def _run():
+            self._list_update_pending = False
+            if self.winfo_exists(): self._render_account_window()
+
+        self.after_idle(_run)
+
+    def _render_account_window(self):
+        """只保证可见区域内的卡片存在，并在顺序变化时才重新排布"""
+        start, end = self._visible_account_range()
+        visible = self._account_order[start:end]
+        visible_set = set(visible)
+
+        for uuid in list(self._cards):
+            if uuid not in visible_set:
+                self._cards.pop(uuid).destroy()
+
+        new_cards = []
+        for idx in range(start, end):
+            uuid = self._account_order[idx]
+            acc = self._account_data[uuid]
+            is_sel = (uuid == self._selected_uuid)
+            card = self._cards.get(uuid)
+            if card is None:
+                card = AccountCard(
+                    self.scroll_frame,
+                    acc,
+                    is_sel,
+                    self._select_account,
+                    self._show_context_menu,
+                    self.tasks,
+                    avatar_priority=AvatarManager.PRIORITY_NORMAL + idx,
+                    defer_avatar=True
+                )
+                self._cards[uuid] = card
+                new_cards.append(card)
+            else:
+                card.update_data(acc)
+                card.set_selected(is_sel)
+
+        top_height = start * ACCOUNT_ROW_HEIGHT
+        bottom_height = (len(self._account_order) - end) * ACCOUNT_ROW_HEIGHT
+        sequence = (top_height, tuple(visible), bottom_height)
+        if sequence != self._packed_sequence:
+            self._packed_sequence = sequence
+            for widget in (self._top_spacer, self._bottom_spacer, *self._cards.values()):
+                widget.pack_forget()
+            if top_height:
+                self._top_spacer.configure(height=top_height)
+                self._top_spacer.pack(fill="x")
+            for uuid in visible:
+                self._cards[uuid].pack(fill="x", pady=2, padx=(10, 0))
+            if bottom_height:
+                self._bottom_spacer.configure(height=bottom_height)
+                self._bottom_spacer.pack(fill="x")
+
+        # 只有新出现的卡片需要检查头像；同一 API 的账号合并为批量查询
+        if new_cards:
+            if self._network_ready:
+                AvatarManager.get_avatars([c.avatar_request() for c in new_cards], self.tasks)
+            else:
+                self._deferred_avatar_cards.extend(new_cards)
 
     def _show_context_menu(self, event, uuid):
         m = tkinter.Menu(self, tearoff=0)
@@ -618,14 +870,11 @@ class ModernWizard(ctk.CTk):
         url = f"{api['base_url']}/authserver/authenticate"
 
         self.login_btn.configure(text=I18n.t("now_conforming"), state="disabled")
-        threading.Thread(target=self._do_verify, args=(url, email, pwd), daemon=True).start()
-
-    def _do_verify(self, u, e, p):
-        try:
-            data = authAPI.authenticate(u, e, p)
-            self.after(0, lambda: self._on_login_success(data, e))
-        except Exception as err:
-            self.after(0, lambda: self._on_login_fail(err))
+        self.tasks.submit(
+            authAPI.authenticate, url, email, pwd,
+            on_done=lambda data: self._on_login_success(data, email),
+            on_error=self._on_login_fail
+        )
 
     def _on_login_success(self, data, email):
         self.login_btn.configure(text=I18n.t("btn_verify"), state="normal")
@@ -648,6 +897,7 @@ class ModernWizard(ctk.CTk):
                 "name": p["name"],
                 "accessToken": data["accessToken"],
                 "clientToken": data.get("clientToken"),
+                "token_refreshed_at": time.time(),
                 "user_email": email,
                 "api_name": api_name_short
             }
@@ -667,8 +917,6 @@ class ModernWizard(ctk.CTk):
 
     # --- Java ---
     def _on_java_scan_finished(self, infos):
-        if not self.winfo_exists(): return
-
         self.java_map = {}
         display_list = []  # 下拉框列表 (存长名字)
 
@@ -811,29 +1059,77 @@ class ModernWizard(ctk.CTk):
         else:
             config_mgr.set_real_java_path(final_path)
 
-        # 4. Token 刷新逻辑 (保持不变)
+        # 4. Token 刷新与保存放到后台执行，完成后回到主线程
         api = config_mgr.get_current_api_config()
-
-        try:
-            profile = {"id": self.current_auth_data["uuid"], "name": self.current_auth_data["name"]}
-            new_data = authAPI.refresh(
-                f"{api['base_url']}/authserver/refresh",
-                self.current_auth_data["accessToken"],
-                self.current_auth_data.get("clientToken"),
-                selected_profile=profile
+        self._set_launch_busy(True)
+        token = self.tasks.submit(
+            self._do_launch, f"{api['base_url']}/authserver/refresh", dict(self.current_auth_data),
+            on_done=lambda _: self._on_launch_done()
+        )
+        self._launch_token = token
+        self._launch_tokens = [t for t in self._launch_tokens if t.future and not t.future.done()] + [token]
+
+    def _cancel_launch(self):
+        token = self._launch_token
+        if not token: return
+        # 请求无法中断：只丢弃结果，已开始的任务仍会保存刷新得到的新 Token
+        token.cancel()
+        self._launch_token = None
+        self._set_launch_busy(False)
+        self.ver_lbl.configure(text=I18n.t("launch_cancelled"))
+
+    def _set_launch_busy(self, busy):
+        if busy:
+            self.launch_btn.configure(
+                text=I18n.t("launch_refreshing"), fg_color=COLOR_BTN_GRAY,
+                hover_color=COLOR_BTN_GRAY_HOVER, command=self._cancel_launch
             )
-            self.current_auth_data["accessToken"] = new_data["accessToken"]
-            config_mgr.add_or_update_account(self.current_auth_data)
-        except Exception as e:
-            print(f"Refresh warning: {e}")
-            pass
+        else:
+            self.launch_btn.configure(
+                text=I18n.t("btn_launch"), fg_color=COLOR_ACCENT,
+                hover_color=COLOR_ACCENT_HOVER, command=self._on_launch, state="normal"
+            )
+
+    def _account_lock(self, uuid):
+        with self._account_locks_guard:
+            lock = self._account_locks.get(uuid)
+            if lock is None:
+                lock = self._account_locks[uuid] = threading.Lock()
+            return lock
+
+    def _do_launch(self, refresh_url, auth_data):
+        """工作线程：刷新 Token (失败不影响启动) 并保存配置"""
+        with self._account_lock(auth_data["uuid"]):
+            try:
+                # 以配置中的最新数据为准 (上一次被取消的启动可能已经换过 Token)
+                acc = dict(config_mgr.get_account(auth_data["uuid"]) or auth_data)
+                new_data = tokenRefresh.refresh_token(refresh_url, acc)
+                acc["accessToken"] = new_data["accessToken"]
+                acc["token_refreshed_at"] = time.time()
+                acc.pop("invalid", None)
+                config_mgr.add_or_update_account(acc)
+            except Exception as e:
+                print(f"Refresh warning: {e}")
+
+            # 即使用户已取消，也要把刷新得到的 Token 与 Java 绑定写入磁盘
+            config_mgr.save()
+
+    def _on_launch_done(self):
+        # 已取消的任务不会回调到这里
+        self._launch_token = None
+        self.launch_btn.configure(text=I18n.t("launch_starting"), state="disabled")
 
-        config_mgr.save()
         self.setup_success = True
+        AvatarManager.cancel_pending()
+        _ctk_avatar_cache.clear()
         self.destroy()
 
     def run(self):
         self.mainloop()
+        # 校验中途刷新过的 Token 只在内存里，调用方随后会重新 load 配置，必须先等它写盘
+        # (执行器已取消令牌，剩余账号不会再发请求)
+        if self._validation_token:
+            self._validation_token.wait()
         return self.setup_success
 
 
@@ -0,0 +1,144 @@
+# src/hostHealth.py
+"""
+验证服务器健康记录 (<数据目录>/cache/host_health.json，所有进程共用)。
+
+验证服务器宕机或不可达时，以前每次启动都要等满 authAPI 的超时 (validate 5s + refresh 5/10s) 才进入向导。现在：
+  - 按主机记录最近的请求耗时与连续失败次数 (连接失败、超时、5xx 算失败)
+  - 超时按最近耗时的 p95 自适应缩短 (样本不足时使用默认值)
+  - 连续失败达到 HOST_CIRCUIT_FAILURES 次即熔断：之后的请求不再发出，直接抛出 CircuitOpen，
+    冷却 HOST_CIRCUIT_COOLDOWN 秒后只放行一个试探请求 (半开)：由第一个调用方在锁内登记，
+    其他进程在试探结束前仍视为熔断；试探成功即恢复，失败重新冷却
+读改写都在 ProcessLock 内完成，多个实例同时启动时不会互相覆盖失败计数。
+CircuitOpen 继承 requests 的 ConnectionError，调用方按网络不通处理即可。
+"""
+import os
+import json
+import time
+import threading
+from urllib.parse import urlparse
+import requests
+from src import constants
+from src.configMGR import config_mgr
+from src.procLock import ProcessLock, LockTimeout
+
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    """主机处于熔断状态，请求未发出"""
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+class HostHealth:
+    def __init__(self, path=None):
+        self._path = path
+        self._lock = None
+        self._lock_guard = threading.Lock()
+
+    def _get_path(self):
+        return self._path or os.path.join(config_mgr.get_data_dir(), "cache", constants.HOST_HEALTH_FILENAME)
+
+    def _get_lock(self):
+        with self._lock_guard:
+            if self._lock is None:
+                self._lock = ProcessLock(self._get_path() + ".lock", timeout=2)
+            return self._lock
+
+    def _load(self):
+        try:
+            with open(self._get_path(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data):
+        # 调用方持有锁
+        path = self._get_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except OSError:
+            # 只是统计数据，写不进去不影响请求
+            pass
+
+    def _update(self, host, fn, default=None):
+        """在锁内读取 host 的记录、调用 fn(entry, now) 修改并写回；锁超时返回 default"""
+        lock = self._get_lock()
+        try:
+            lock.acquire()
+        except LockTimeout:
+            return default
+        try:
+            data = self._load()
+            entry = data.setdefault(host, {"latencies": [], "failures": 0, "opened_at": None, "trial_at": None})
+            result = fn(entry, time.time())
+            self._save(data)
+            return result
+        finally:
+            lock.release()
+
+    @staticmethod
+    def _host(url):
+        return urlparse(url).netloc
+
+    @staticmethod
+    def _blocked(entry, now):
+        """熔断中：仍在冷却期，或冷却后已有调用方在试探"""
+        if not entry or not entry.get("opened_at"): return False
+        if now - entry["opened_at"] < constants.HOST_CIRCUIT_COOLDOWN: return True
+        trial_at = entry.get("trial_at")
+        return bool(trial_at) and now - trial_at < constants.HOST_CIRCUIT_TRIAL_TIMEOUT
+
+    def is_open(self, url):
+        """只读判断，不登记试探"""
+        return self._blocked(self._load().get(self._host(url)), time.time())
+
+    def check(self, url):
+        """熔断中抛出 CircuitOpen；冷却结束后第一个调用方登记为试探者并放行"""
+        if not self._load().get(self._host(url), {}).get("opened_at"): return
+
+        def claim(entry, now):
+            if self._blocked(entry, now): return False
+            if entry.get("opened_at"):
+                entry["trial_at"] = now
+            return True
+
+        # 锁超时时放行，宁可多发一次请求也不能卡住启动
+        if not self._update(self._host(url), claim, default=True):
+            raise CircuitOpen(f"{self._host(url)} is unreachable (circuit open)")
+
+    def timeout(self, url, default):
+        """按 p95 耗时缩短 default (秒数或 (连接, 读取) 元组)"""
+        entry = self._load().get(self._host(url)) or {}
+        samples = entry.get("latencies") or []
+        if len(samples) < 5: return default
+
+        adapted = max(constants.HOST_TIMEOUT_MIN, _percentile(samples, 95) * constants.HOST_TIMEOUT_FACTOR)
+        if isinstance(default, tuple):
+            return tuple(min(d, adapted) for d in default)
+        return min(default, adapted)
+
+    def record(self, url, elapsed, ok):
+        def apply(entry, now):
+            if ok:
+                entry["latencies"] = (entry.get("latencies", []) + [round(elapsed, 3)])[-constants.HOST_HEALTH_SAMPLES:]
+                entry["failures"] = 0
+                entry["opened_at"] = None
+            else:
+                entry["failures"] = entry.get("failures", 0) + 1
+                if entry["failures"] >= constants.HOST_CIRCUIT_FAILURES:
+                    # 试探请求失败也会走到这里，重新开始冷却
+                    entry["opened_at"] = now
+            entry["trial_at"] = None
+
+        self._update(self._host(url), apply)
+
+
+host_health = HostHealth()
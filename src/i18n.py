@@ -55,6 +55,11 @@ TRANSLATIONS = {
         "on_launch_select_acc": "请先选择一个账号",
         "on_launch_no_java_tit": "提示",
         "on_launch_no_java_info": "Java 路径为空",
+        "launch_refreshing": "正在刷新凭证... (点击取消)",
+        "launch_starting": "正在启动...",
+        "launch_cancelled": "已取消启动",
+        "offline_launch_title": "验证服务器不可达",
+        "offline_launch_question": "暂时无法连接验证服务器。\n\n是否使用 {name} 缓存的登录信息离线启动？\n(单人游戏不受影响，多人服务器可能无法进入)\n\n选择“否”将打开配置向导。",
     },
     "en_US": {
         "api_default": "LittleSkin (Default)",
@@ -102,6 +107,11 @@ TRANSLATIONS = {
         "on_launch_select_acc": "Please select an account before launching",
         "on_launch_no_java_tit": "Notice",
         "on_launch_no_java_info": "Java path is not set",
+        "launch_refreshing": "Refreshing session... (click to cancel)",
+        "launch_starting": "Launching...",
+        "launch_cancelled": "Launch cancelled",
+        "offline_launch_title": "Auth server unreachable",
+        "offline_launch_question": "The authentication server cannot be reached right now.\n\nLaunch offline with the cached login of {name}?\n(Singleplayer works; multiplayer servers may reject you)\n\nChoose \"No\" to open the setup wizard.",
     }
 }
 
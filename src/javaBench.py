@@ -0,0 +1,286 @@
+# src/javaBench.py
+"""
+javaScanner 性能基准。
+
+在临时目录中生成合成 JDK 目录树 (假的 bin/java 脚本 + release 文件 + 软链接 + 嵌套厂商目录)，
+无需安装真实 JDK 即可测量：
+  - 完整扫描 (full scan)
+  - 再次扫描 (cached rescan)
+  - 启动时 Java 解析 (launch resolve)
+  - 启动时要求的版本不存在 (launch miss，第二次起应命中未找到缓存)
+的耗时、子进程启动次数与峰值线程数。完整扫描找到的数量必须等于合成 JDK 数量 (软链接别名不重复计数)，
+否则返回码为 1。
+
+用法 (仅 macOS / Linux，假 java 为 sh 脚本):
+    python -m src.javaBench --jdks 200 --delay 0.05 --rounds 3
+    python -m src.javaBench --json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+from src import constants, javaScanner
+
+# 合成 JDK 的版本模板：(version, vendor 行, VM 行, release 中的 IMPLEMENTOR)
+_VERSION_TEMPLATES = [
+    ("1.8.0_392", "OpenJDK Runtime Environment (Temurin)(build 1.8.0_392-b08)",
+     "OpenJDK 64-Bit Server VM (Temurin)(build 25.392-b08, mixed mode)", "Eclipse Adoptium"),
+    ("11.0.21", "OpenJDK Runtime Environment Zulu11.68+17-CA (build 11.0.21+9-LTS)",
+     "OpenJDK 64-Bit Server VM Zulu11.68+17-CA (build 11.0.21+9-LTS, mixed mode)", "Azul Systems, Inc."),
+    ("17.0.9", "OpenJDK Runtime Environment Temurin-17.0.9+9 (build 17.0.9+9)",
+     "OpenJDK 64-Bit Server VM Temurin-17.0.9+9 (build 17.0.9+9, mixed mode, sharing)", "Eclipse Adoptium"),
+    ("21.0.1", "OpenJDK Runtime Environment Corretto-21.0.1.12.1 (build 21.0.1+12-LTS)",
+     "OpenJDK 64-Bit Server VM Corretto-21.0.1.12.1 (build 21.0.1+12-LTS, mixed mode, sharing)", "Amazon.com Inc."),
+]
+
+_VENDORS = ["adoptium", "zulu", "corretto", "microsoft"]
+
+
+# ================= 1. 合成 JDK 树 =================
+
+def _write_java_stub(java_path, template, delay, spawn_log):
+    version, runtime_line, vm_line, _ = template
+    os.makedirs(os.path.dirname(java_path), exist_ok=True)
+    script = (
+        "#!/bin/sh\n"
+        f"echo x >> '{spawn_log}'\n"
+        f"sleep {delay}\n"
+        "cat >&2 <<'EOF'\n"
+        f'openjdk version "{version}" 2023-10-17\n'
+        f"{runtime_line}\n"
+        f"{vm_line}\n"
+        "EOF\n"
+    )
+    with open(java_path, "w") as f:
+        f.write(script)
+    os.chmod(java_path, 0o755)
+
+
+def _write_release(home, template):
+    version, _, _, implementor = template
+    with open(os.path.join(home, "release"), "w") as f:
+        f.write(f'IMPLEMENTOR="{implementor}"\n')
+        f.write(f'JAVA_VERSION="{version}"\n')
+        f.write(f'OS_ARCH="{platform.machine() or "x86_64"}"\n')
+
+
+def build_tree(root, count, delay):
+    """
+    生成 count 个合成 JDK，返回 (spawn_log, layout 统计)。
+    布局轮换：平铺 / 嵌套厂商目录 / macOS Bundle (仅在 macOS 上生成，其他系统的扫描器不识别)，
+    每 5 个平铺 JDK 额外加一个软链接别名。
+    """
+    os.makedirs(root, exist_ok=True)
+    spawn_log = os.path.join(root, "spawn.log")
+    open(spawn_log, "w").close()
+
+    kinds = ("flat", "nested", "bundle") if platform.system() == "Darwin" else ("flat", "nested")
+    layout = {"flat": 0, "bundle": 0, "nested": 0, "symlink": 0}
+    for i in range(count):
+        template = _VERSION_TEMPLATES[i % len(_VERSION_TEMPLATES)]
+        name = f"jdk-{template[0]}-{i}"
+        kind = kinds[i % len(kinds)]
+
+        if kind == "flat":
+            home = os.path.join(root, name)
+        elif kind == "bundle":
+            home = os.path.join(root, f"{name}.jdk", "Contents", "Home")
+        else:
+            home = os.path.join(root, _VENDORS[i % len(_VENDORS)], name)
+
+        _write_java_stub(os.path.join(home, "bin", "java"), template, delay, spawn_log)
+        _write_release(home, template)
+        layout[kind] += 1
+
+        if kind == "flat" and i % 5 == 0:
+            try:
+                os.symlink(home, os.path.join(root, f"current-{i}"))
+                layout["symlink"] += 1
+            except OSError:
+                pass
+
+    # 干扰项：没有 bin/java 的目录
+    for i in range(max(1, count // 10)):
+        os.makedirs(os.path.join(root, f"not-a-jdk-{i}", "lib"), exist_ok=True)
+
+    return spawn_log, layout
+
+
+# ================= 2. 测量 =================
+
+class _ThreadSampler:
+    """后台采样 threading.active_count()，记录峰值 (不计采样线程自身)"""
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, threading.active_count() - 1)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _count_spawns(spawn_log):
+    try:
+        with open(spawn_log) as f:
+            return sum(1 for _ in f)
+    except OSError:
+        return 0
+
+
+def _measure(fn, spawn_log):
+    before = _count_spawns(spawn_log)
+    with _ThreadSampler() as sampler:
+        t0 = time.perf_counter()
+        result = fn()
+        wall = time.perf_counter() - t0
+    return {
+        "wall_s": round(wall, 4),
+        "spawns": _count_spawns(spawn_log) - before,
+        "peak_threads": sampler.peak,
+        "found": len(result) if isinstance(result, list) else (1 if result else 0),
+    }
+
+
+def _resolve_launch_java():
+    # 与 main.py 中按版本 JSON 选择 Java 的分支一致 (1.20.4 需要 Java 17)
+    # 模拟新启动的进程：清单从磁盘缓存重新加载
+    javaScanner.inventory = javaScanner.JavaInventory(cache_file=javaScanner.inventory._get_cache_file())
+    info = javaScanner.resolve_java(17)
+    return info["path"] if info else None
+
+
+def _resolve_missing_java():
+    # 合成树中没有 Java 25：第一次扫描后记下未找到，之后的启动不再扫描
+    javaScanner.inventory = javaScanner.JavaInventory(cache_file=javaScanner.inventory._get_cache_file())
+    info = javaScanner.resolve_java(25)
+    return info["path"] if info else None
+
+
+def _full_scan():
+    return javaScanner.find_java_candidates(use_cache=False)
+
+
+SCENARIOS = [
+    ("full_scan", _full_scan),
+    ("cached_rescan", javaScanner.find_java_candidates),
+    ("launch_resolve", _resolve_launch_java),
+    ("launch_miss", _resolve_missing_java),
+]
+
+
+class _IsolatedScanEnv:
+    """
+    把扫描范围限制在合成目录内：
+    临时替换扫描根、JAVA_HOME、PATH、内嵌 Java 开关，并让 Java 清单缓存写入临时目录
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._saved = None
+
+    def __enter__(self):
+        system = platform.system()
+        self._saved = (
+            dict(constants.JAVA_SCAN_PATHS),
+            constants.ENABLE_LOCAL_JAVA,
+            os.environ.get("JAVA_HOME"),
+            os.environ.get("PATH"),
+            javaScanner.inventory,
+        )
+        constants.JAVA_SCAN_PATHS = {system: [os.path.join(self.root, "jdks")]}
+        constants.ENABLE_LOCAL_JAVA = False
+        os.environ.pop("JAVA_HOME", None)
+        os.environ["PATH"] = os.pathsep.join(["/usr/bin", "/bin"])
+        # 清单缓存放在扫描根之外，否则每次写入都会改变扫描范围的指纹
+        javaScanner.inventory = javaScanner.JavaInventory(
+            cache_file=os.path.join(self.root, constants.JAVA_INVENTORY_FILENAME))
+        return self
+
+    def __exit__(self, *exc):
+        scan_paths, local_java, java_home, path, inventory = self._saved
+        constants.JAVA_SCAN_PATHS = scan_paths
+        constants.ENABLE_LOCAL_JAVA = local_java
+        if java_home is not None: os.environ["JAVA_HOME"] = java_home
+        if path is not None: os.environ["PATH"] = path
+        javaScanner.inventory = inventory
+
+
+def run_benchmark(jdks=200, delay=0.05, rounds=3, keep=False):
+    root = tempfile.mkdtemp(prefix="yggpro-javabench-")
+    try:
+        spawn_log, layout = build_tree(os.path.join(root, "jdks"), jdks, delay)
+        results = {"jdks": jdks, "delay_s": delay, "layout": layout, "scenarios": {}}
+
+        with _IsolatedScanEnv(root):
+            # 遗漏或重复探测都说明扫描器与合成布局不一致
+            results["complete"] = len(_full_scan()) == jdks
+
+        with _IsolatedScanEnv(root):
+            for name, fn in SCENARIOS:
+                runs = [_measure(fn, spawn_log) for _ in range(rounds)]
+                results["scenarios"][name] = {
+                    "wall_s_min": min(r["wall_s"] for r in runs),
+                    "wall_s_max": max(r["wall_s"] for r in runs),
+                    "spawns": max(r["spawns"] for r in runs),
+                    "peak_threads": max(r["peak_threads"] for r in runs),
+                    "found": runs[-1]["found"],
+                }
+        return results
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def _print_table(results):
+    print(f"JDKs: {results['jdks']}  delay: {results['delay_s']}s  layout: {results['layout']}"
+          f"  complete: {results['complete']}")
+    print(f"{'scenario':<16}{'wall min':>10}{'wall max':>10}{'spawns':>8}{'threads':>9}{'found':>7}")
+    for name, r in results["scenarios"].items():
+        print(f"{name:<16}{r['wall_s_min']:>10.3f}{r['wall_s_max']:>10.3f}"
+              f"{r['spawns']:>8}{r['peak_threads']:>9}{r['found']:>7}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="javaScanner benchmark (synthetic JDK trees)")
+    parser.add_argument("--jdks", type=int, default=200, help="合成 JDK 数量")
+    parser.add_argument("--delay", type=float, default=0.05, help="每次 java -version 的模拟耗时 (秒)")
+    parser.add_argument("--rounds", type=int, default=3, help="每个场景重复次数")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    parser.add_argument("--keep", action="store_true", help="保留临时目录")
+    args = parser.parse_args(argv)
+
+    if platform.system() == "Windows":
+        print("javaBench requires a POSIX shell (fake java stubs are sh scripts).", file=sys.stderr)
+        return 2
+
+    results = run_benchmark(args.jdks, args.delay, args.rounds, args.keep)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table(results)
+    if not results["complete"]:
+        print(f"javaBench: full scan found {results['scenarios']['full_scan']['found']} of {results['jdks']} JDKs",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
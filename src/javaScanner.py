@@ -1,6 +1,9 @@
 # src/javaScanner.py
 import os
 import sys
+import json
+import shutil
+import hashlib
 import subprocess
 import platform
 import threading
@@ -21,6 +24,67 @@ def _expand_path(p):
     return os.path.expandvars(os.path.expanduser(p))
 
 
+# ================= 版本模型 =================
+
+# (输出中的关键字, 厂商名)，按优先级匹配
+_VENDOR_KEYWORDS = [
+    ("temurin", "Eclipse Adoptium"),
+    ("adoptopenjdk", "AdoptOpenJDK"),
+    ("zulu", "Azul Zulu"),
+    ("corretto", "Amazon Corretto"),
+    ("microsoft", "Microsoft"),
+    ("graalvm", "GraalVM"),
+    ("jetbrains", "JetBrains"),
+    ("dragonwell", "Alibaba Dragonwell"),
+    ("bellsoft", "BellSoft Liberica"),
+    ("liberica", "BellSoft Liberica"),
+    ("java(tm) se", "Oracle"),
+    ("openjdk", "OpenJDK"),
+]
+
+
+def parse_java_version(version_str):
+    """
+    解析 Java 版本字符串为可比较的 (feature, interim, update)。
+    "1.8.0_392" -> (8, 0, 392); "17.0.9" -> (17, 0, 9); "21" -> (21, 0, 0)
+    无法解析时返回 None
+    """
+    if not version_str: return None
+    core = version_str.strip().split("-")[0].split("+")[0]
+    parts = core.replace("_", ".").split(".")
+
+    nums = []
+    for p in parts:
+        digits = ""
+        for ch in p:
+            if not ch.isdigit(): break
+            digits += ch
+        if not digits: break
+        nums.append(int(digits))
+
+    if not nums: return None
+    # 旧式 1.x 版本号：1.8.0_392 -> feature 8, update 392
+    if nums[0] == 1 and len(nums) >= 2:
+        return (nums[1], 0, nums[3] if len(nums) >= 4 else (nums[2] if len(nums) >= 3 else 0))
+    nums += [0] * (3 - len(nums))
+    return tuple(nums[:3])
+
+
+def _detect_vendor(lower_out):
+    for keyword, vendor in _VENDOR_KEYWORDS:
+        if keyword in lower_out:
+            return vendor
+    return "Unknown"
+
+
+def get_host_arch():
+    """当前系统架构，取值与 get_java_info 的 arch 一致 (arm64 / x64 / x86)"""
+    machine = platform.machine().lower()
+    if machine in ("arm64", "aarch64"): return "arm64"
+    if machine in ("x86_64", "amd64"): return "x64"
+    return "x86"
+
+
 def get_java_info(path):
     # 获取详细信息 (MacOS 架构精准识别修复版)
     if not _is_executable(path): return None
@@ -79,9 +143,14 @@ def get_java_info(path):
             except:
                 pass  # 如果 file 命令失败，维持原判
 
+        version_key = parse_java_version(version_str)
+
         return {
             "path": path,
             "version": version_str,
+            "version_key": list(version_key) if version_key else None,
+            "major": version_key[0] if version_key else None,
+            "vendor": _detect_vendor(lower_out),
             "arch": arch_str,
             "raw_info": output[:500]
         }
@@ -97,15 +166,22 @@ def _scan_paths_fast():
     jh = os.environ.get("JAVA_HOME")
     if jh: candidates.add(os.path.join(jh, "bin", exe_name))
     try:
-        import shutil
         p = shutil.which(exe_name)
         if p: candidates.add(os.path.realpath(p))
     except:
         pass
 
+    def java_in(home):
+        # 平铺的 <home>/bin/java，macOS 上还有 <name>.jdk/Contents/Home/bin/java
+        t = os.path.join(home, "bin", exe_name)
+        if os.path.exists(t): return t
+        if system == "Darwin":
+            t = os.path.join(home, "Contents", "Home", "bin", "java")
+            if os.path.exists(t): return t
+        return None
+
     # 简单的注册表和路径扫描 (基于你之前的代码)
-    from src.constants import JAVA_SCAN_PATHS
-    roots = JAVA_SCAN_PATHS.get(system, [])
+    roots = constants.JAVA_SCAN_PATHS.get(system, [])
     for root in roots:
         root = _expand_path(root)
         if os.path.exists(root):
@@ -113,20 +189,29 @@ def _scan_paths_fast():
                 # 简单扫一下 bin/java
                 t = os.path.join(root, "bin", exe_name)
                 if os.path.exists(t): candidates.add(t)
-                # 扫子目录
+                # 扫子目录；不是 JDK 的子目录再往下看一层 (按厂商分组的目录，如 <root>/zulu/<jdk>)
                 for item in os.listdir(root):
-                    t = os.path.join(root, item, "bin", exe_name)
-                    if os.path.exists(t): candidates.add(t)
-                    if system == "Darwin":
-                        t = os.path.join(root, item, "Contents", "Home", "bin", "java")
-                        if os.path.exists(t): candidates.add(t)
+                    home = os.path.join(root, item)
+                    t = java_in(home)
+                    if t:
+                        candidates.add(t)
+                    elif os.path.isdir(home):
+                        for sub_item in os.listdir(home):
+                            t = java_in(os.path.join(home, sub_item))
+                            if t: candidates.add(t)
             except:
                 pass
 
-    return {p for p in candidates if _is_executable(p)}
+    # 同一 JDK 经软链接出现多次时只探测一次 (优先保留非软链接的路径)
+    unique = {}
+    for p in sorted(candidates):
+        if not _is_executable(p): continue
+        real = os.path.realpath(p)
+        if real not in unique or p == real:
+            unique[real] = p
+    return set(unique.values())
 
-# 专门扫描相对路径下的内嵌 Java
-def _scan_local_runtime():
+def _local_runtime_dir():
     # 1. 动态计算项目根目录 (这就实现了"相对路径")
     if getattr(sys, 'frozen', False):
         # 打包后：exe 所在目录
@@ -137,15 +222,19 @@ def _scan_local_runtime():
 
     # 2. 拼接相对路径：根目录/dist/.YggProxy/YggProRuntime
     # 只要你的 dist 文件夹跟着程序走，这就永远能找到
-    target_dir = os.path.join(base_dir, ".YggProxy", "YggProRuntime")
+    return os.path.join(base_dir, ".YggProxy", "YggProRuntime")
 
+
+# 专门扫描相对路径下的内嵌 Java
+def _scan_local_runtime():
+    target_dir = _local_runtime_dir()
     found_paths = set()
 
     # 3. 只有当目录存在 且 常量开关开启 时才扫描
     if getattr(constants, "ENABLE_LOCAL_JAVA", False) and os.path.exists(target_dir):
         exe_name = _get_java_exe_name()
-        # 递归遍历 (os.walk 能穿透层级找到 bin/java)
-        for root, dirs, files in os.walk(target_dir):
+        # 递归遍历 (os.walk 能穿透层级找到 bin/java；共享运行时仓库下 JRE 目录是软链接)
+        for root, dirs, files in os.walk(target_dir, followlinks=True):
             if exe_name in files:
                 full_path = os.path.join(root, exe_name)
                 # 顺手修复 Mac 权限 (必做)
@@ -158,8 +247,171 @@ def _scan_local_runtime():
 
     return found_paths
 
-def find_java_candidates():
-    # 返回详细信息列表
+def scan_stamp():
+    """
+    扫描范围的指纹：JAVA_HOME、PATH 中的 java、各扫描根目录及其子目录的 mtime。
+    安装 / 删除 JDK 会改变所在目录的 mtime，指纹随之变化；只需 stat，不启动子进程。
+    """
+    exe_name = _get_java_exe_name()
+    parts = [os.environ.get("JAVA_HOME") or "", shutil.which(exe_name) or ""]
+    roots = [_expand_path(r) for r in constants.JAVA_SCAN_PATHS.get(platform.system(), [])]
+    if getattr(constants, "ENABLE_LOCAL_JAVA", False):
+        roots.append(_local_runtime_dir())
+    for root in roots:
+        try:
+            parts.append([root, os.stat(root).st_mtime_ns])
+            for item in sorted(os.listdir(root)):
+                path = os.path.join(root, item)
+                if os.path.isdir(path):
+                    parts.append([item, os.stat(path).st_mtime_ns])
+        except OSError:
+            continue
+    return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+# ================= 索引化的 Java 清单 =================
+
+class JavaInventory:
+    """
+    Java 探测结果清单。
+    - 按可执行文件的 (mtime, size) 缓存 get_java_info 结果，文件未变则不再启动子进程
+    - 维护 (major, arch) -> 最佳 Java 的索引，按主版本号查询为 O(1)
+    - 持久化到数据目录，启动时可直接查询而无需重新扫描
+    - 记录未找到的 (major, arch) 与当时的 scan_stamp()，指纹不变时不再为同一需求重新扫描
+    """
+
+    def __init__(self, cache_file=None):
+        self._lock = threading.RLock()
+        self._cache_file = cache_file
+        self._entries = {}  # path -> info (含 stamp)
+        self._index = {}  # (major, arch) -> info；arch 为 "*" 表示任意架构
+        self._misses = {}  # "major:arch" -> 查找失败时的 scan_stamp()
+        self._loaded = False
+
+    def _get_cache_file(self):
+        if not self._cache_file:
+            from src.configMGR import config_mgr
+            self._cache_file = os.path.join(config_mgr.get_data_dir(), constants.JAVA_INVENTORY_FILENAME)
+        return self._cache_file
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            st = os.stat(path)
+            return [st.st_mtime_ns, st.st_size]
+        except OSError:
+            return None
+
+    def load(self):
+        with self._lock:
+            if self._loaded: return
+            self._loaded = True
+            try:
+                with open(self._get_cache_file(), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == constants.JAVA_INVENTORY_VERSION:
+                    self._entries = data.get("entries", {})
+                    self._misses = data.get("misses", {})
+                    self._rebuild_index()
+            except Exception:
+                self._entries = {}
+
+    def save(self):
+        with self._lock:
+            try:
+                cache_file = self._get_cache_file()
+                tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump({"version": constants.JAVA_INVENTORY_VERSION, "entries": self._entries,
+                               "misses": self._misses}, f)
+                os.replace(tmp_file, cache_file)
+            except Exception as e:
+                if constants.DEBUG_MODE:
+                    print(f"[{constants.PROXY_NAME}] Java inventory save failed: {e}", file=sys.stderr)
+
+    def probe(self, path, use_cache=True):
+        """获取 Java 信息：stamp 未变时直接返回缓存，否则真正执行 java -version"""
+        stamp = self._stamp(path)
+        if stamp is None: return None
+
+        if use_cache:
+            with self._lock:
+                cached = self._entries.get(path)
+            if cached and cached.get("stamp") == stamp:
+                return cached
+
+        info = get_java_info(path)
+        if info:
+            info["stamp"] = stamp
+        return info
+
+    def replace(self, infos):
+        """用一次完整扫描的结果替换清单"""
+        with self._lock:
+            self._loaded = True
+            self._entries = {info["path"]: info for info in infos}
+            self._rebuild_index()
+
+    @staticmethod
+    def _miss_key(major, arch):
+        return f"{major}:{arch or ''}"
+
+    def is_known_miss(self, major, arch, stamp):
+        """上次查找 (major, arch) 失败，且之后扫描范围没有变化"""
+        self.load()
+        with self._lock:
+            return self._misses.get(self._miss_key(major, arch)) == stamp
+
+    def remember_miss(self, major, arch, stamp):
+        with self._lock:
+            self._misses[self._miss_key(major, arch)] = stamp
+
+    def _rebuild_index(self):
+        index = {}
+        for info in self._entries.values():
+            major = info.get("major")
+            if not major: continue
+            for key in ((major, info.get("arch")), (major, "*")):
+                best = index.get(key)
+                if not best or _rank_key(info) > _rank_key(best):
+                    index[key] = info
+        self._index = index
+
+    def best_for(self, major, arch=None):
+        """主版本号精确匹配的最佳 Java；arch 为 None 时优先本机架构，其次任意架构"""
+        self.load()
+        with self._lock:
+            if arch:
+                return self._index.get((major, arch))
+            return self._index.get((major, get_host_arch())) or self._index.get((major, "*"))
+
+    def find_best(self, major, arch=None):
+        """
+        精确匹配优先。
+        要求 17 及以上时，允许使用更高主版本中最低的那个 (1.18+ 可以在更新的 Java 上运行)；
+        要求 8 / 16 的旧版本 (尤其是 Forge) 在高版本 Java 上会崩溃，只接受精确匹配。
+        """
+        info = self.best_for(major, arch)
+        if info or major < 17: return info
+
+        with self._lock:
+            newer = sorted({m for (m, _) in self._index if m > major})
+        for m in newer:
+            info = self.best_for(m, arch)
+            if info: return info
+        return None
+
+
+def _rank_key(info):
+    version_key = tuple(info.get("version_key") or (0, 0, 0))
+    return version_key, info.get("arch") == get_host_arch()
+
+
+inventory = JavaInventory()
+
+
+def find_java_candidates(use_cache=True, cancel_token=None):
+    # 返回详细信息列表；cancel_token 被取消时尽快放弃 (返回空列表，不更新清单)
     raw_paths = _scan_paths_fast()
     filtered = list(raw_paths)
 
@@ -170,10 +422,15 @@ def find_java_candidates():
             filtered.insert(0, lp)  # 插到最前面
 
     valid_infos = []
+    inventory.load()
+
+    def probe(p):
+        if cancel_token is not None and cancel_token.cancelled: return None
+        return inventory.probe(p, use_cache)
 
     with concurrent.futures.ThreadPoolExecutor(max_workers=20) as pool:
-        # 这里改调 get_java_info
-        future_map = {pool.submit(get_java_info, p): p for p in filtered}
+        # 已探测且未变化的 Java 直接命中缓存，不会启动子进程
+        future_map = {pool.submit(probe, p): p for p in filtered}
 
         for future in concurrent.futures.as_completed(future_map):
             try:
@@ -183,13 +440,78 @@ def find_java_candidates():
             except:
                 pass
 
-    # 按版本号排序 (简单的字符串排序，"17" > "1.8")
-    return sorted(valid_infos, key=lambda x: x["version"], reverse=True)
+    if cancel_token is not None and cancel_token.cancelled:
+        return []
+
+    inventory.replace(valid_infos)
+    inventory.save()
+
+    # 按解析后的版本号排序 (17.0.9 > 1.8.0_392)，同版本优先本机架构
+    return sorted(valid_infos, key=_rank_key, reverse=True)
+
+
+def resolve_java(required_major, arch=None):
+    """
+    启动时按主版本号挑选 Java。
+    优先查询持久化清单 (仅 stat 校验文件未变)，未命中才执行完整扫描。
+    扫描后仍没有合适的 Java 时记下扫描范围的指纹：之后指纹不变 (没有安装新 JDK) 就直接返回 None。
+    """
+    if not required_major: return None
 
+    info = inventory.find_best(required_major, arch)
+    if info and JavaInventory._stamp(info["path"]) == info.get("stamp"):
+        return info
+
+    stamp = scan_stamp()
+    if not info and inventory.is_known_miss(required_major, arch, stamp):
+        return None
+
+    find_java_candidates()
+    info = inventory.find_best(required_major, arch)
+    if not info:
+        inventory.remember_miss(required_major, arch, stamp)
+        inventory.save()
+    return info
+
+
+# ================= 实例所需的 Java 版本 =================
+
+def _read_version_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
 
-def start_scan(callback):
-    def task():
-        res = find_java_candidates()
-        if callback: callback(res)
 
-    threading.Thread(target=task, daemon=True).start()
\ No newline at end of file
+def get_required_java_major(game_dir, version_id=None):
+    """
+    从实例的版本 JSON (javaVersion.majorVersion) 读取所需 Java 主版本号。
+    支持两种常见布局：
+      - 版本隔离：game_dir 即 versions/<id>，JSON 为 game_dir/<id>.json
+      - 非隔离：game_dir 为 .minecraft，JSON 为 game_dir/versions/<id>/<id>.json
+    Mod 加载器的 JSON 没有 javaVersion 时沿 inheritsFrom 查找原版 JSON。
+    """
+    if not game_dir: return None
+
+    version_dirs = []
+    if version_id:
+        version_dirs.append(os.path.join(game_dir, "versions", version_id))
+    version_dirs.append(game_dir)
+
+    for version_dir in version_dirs:
+        vid = os.path.basename(os.path.normpath(version_dir))
+        data = _read_version_json(os.path.join(version_dir, f"{vid}.json"))
+        versions_root = os.path.dirname(os.path.normpath(version_dir))
+
+        # 最多向上追溯几层 inheritsFrom，防止循环
+        for _ in range(4):
+            if not data: break
+            major = (data.get("javaVersion") or {}).get("majorVersion")
+            if isinstance(major, int) and major > 0:
+                return major
+            parent = data.get("inheritsFrom")
+            if not parent: break
+            data = _read_version_json(os.path.join(versions_root, parent, f"{parent}.json"))
+
+    return None
@@ -0,0 +1,255 @@
+# src/jreExtractor.py
+"""
+并行、可续传的 JRE 解压引擎。
+
+- 多线程并行解压成员到暂存目录 (zlib 解压时释放 GIL)
+- 流式写入，由 ZipExtFile 在读到结尾时校验 CRC
+- 按 zip 中记录的 Unix 权限恢复可执行位，并还原软链接
+- 中断后再次调用会跳过日志中已完成的成员
+- 全部完成后再把暂存目录原子地换到目标位置
+"""
+import os
+import sys
+import stat
+import shutil
+import zipfile
+import threading
+import concurrent.futures
+from src import constants
+
+_CHUNK_SIZE = 1024 * 1024
+_JOURNAL_NAME = ".journal"
+_SOURCE_NAME = ".source"
+
+
+class SwapDeferred(OSError):
+    """解压已完成，但旧目录被占用无法替换；旧目录保持原状，下次调用时再替换"""
+
+
+class ZipSource:
+    """普通 zip 文件：每个线程持有独立的 ZipFile 句柄，避免共享文件指针"""
+
+    def __init__(self, zip_path):
+        self.zip_path = zip_path
+        self._local = threading.local()
+        self._handles = []
+        self._handles_lock = threading.Lock()
+
+    def _zf(self):
+        zf = getattr(self._local, "zf", None)
+        if zf is None:
+            zf = zipfile.ZipFile(self.zip_path, "r")
+            self._local.zf = zf
+            with self._handles_lock:
+                self._handles.append(zf)
+        return zf
+
+    def infolist(self):
+        return self._zf().infolist()
+
+    def open(self, info):
+        return self._zf().open(info, "r")
+
+    def close(self):
+        with self._handles_lock:
+            for zf in self._handles:
+                try:
+                    zf.close()
+                except Exception:
+                    pass
+            self._handles = []
+
+
+def _unix_mode(info):
+    # create_system == 3 表示 Unix，高 16 位为 st_mode
+    if info.create_system != 3: return None
+    mode = info.external_attr >> 16
+    return mode if mode else None
+
+
+def _safe_member_path(root, name):
+    """拒绝绝对路径与 ..，防止解压到目录外"""
+    name = name.replace("\\", "/")
+    parts = [p for p in name.split("/") if p not in ("", ".")]
+    if not parts or ".." in parts or os.path.isabs(name) or ":" in parts[0]:
+        return None
+    return os.path.join(root, *parts)
+
+
+def _supports_symlink():
+    return os.name != "nt"
+
+
+def remove_tree(path):
+    def remove_readonly(func, p, _):
+        os.chmod(p, 0o777)
+        func(p)
+
+    shutil.rmtree(path, onerror=remove_readonly)
+
+
+class _Journal:
+    """已完成成员的记录 (name \\t crc \\t size)，用于断点续传"""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) == 3:
+                        self.done[parts[0]] = (int(parts[1]), int(parts[2]))
+        except OSError:
+            pass
+        self._fp = open(path, "a", encoding="utf-8")
+
+    def is_done(self, info, dest):
+        if self.done.get(info.filename) != (info.CRC, info.file_size):
+            return False
+        try:
+            return os.lstat(dest).st_size == info.file_size
+        except OSError:
+            return False
+
+    def mark(self, info):
+        with self._lock:
+            self._fp.write(f"{info.filename}\t{info.CRC}\t{info.file_size}\n")
+            self._fp.flush()
+
+    def close(self):
+        self._fp.close()
+
+
+def _extract_member(source, info, dest):
+    mode = _unix_mode(info)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+    # 软链接：内容为链接目标
+    if mode and stat.S_ISLNK(mode) and _supports_symlink():
+        with source.open(info) as src:
+            link_target = src.read().decode("utf-8")
+        if os.path.lexists(dest): os.remove(dest)
+        os.symlink(link_target, dest)
+        return
+
+    part = dest + ".part"
+    with source.open(info) as src, open(part, "wb") as dst:
+        # 读到结尾时 ZipExtFile 会校验 CRC，不一致抛出 BadZipFile
+        shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+
+    if mode and os.name != "nt":
+        os.chmod(part, stat.S_IMODE(mode) or 0o644)
+    os.replace(part, dest)
+
+
+def extract(source, runtime_dir, top_dir, token=None, progress=None, workers=None):
+    """
+    将 source 中的 JRE 解压到 runtime_dir/top_dir。
+    source   : ZipSource (或提供 infolist/open 的同类对象)
+    token    : 源包版本标识，暂存目录中的记录与之不符时丢弃旧的暂存内容
+    progress : callback(done_bytes, total_bytes)，在工作线程中调用
+    返回最终目录路径；失败抛出异常 (暂存目录保留以便续传)，
+    旧目录被占用无法替换时抛出 SwapDeferred
+    """
+    staging_root = os.path.join(runtime_dir, f".{top_dir}.staging")
+    target_dir = os.path.join(runtime_dir, top_dir)
+
+    # 暂存内容来自其他版本的包 -> 作废
+    source_file = os.path.join(staging_root, _SOURCE_NAME)
+    if os.path.exists(staging_root):
+        try:
+            with open(source_file, "r", encoding="utf-8") as f:
+                stale = f.read().strip() != str(token)
+        except OSError:
+            stale = True
+        if stale:
+            remove_tree(staging_root)
+
+    os.makedirs(staging_root, exist_ok=True)
+    with open(source_file, "w", encoding="utf-8") as f:
+        f.write(str(token))
+
+    infos = source.infolist()
+    # 包内没有顶层 top_dir 目录时，把全部内容放进 top_dir
+    prefix = f"{top_dir}/"
+    has_top = any(i.filename.replace("\\", "/").startswith(prefix) for i in infos)
+    extract_root = staging_root if has_top else os.path.join(staging_root, top_dir)
+
+    members = []
+    for info in infos:
+        dest = _safe_member_path(extract_root, info.filename)
+        if not dest: continue
+        if info.is_dir():
+            os.makedirs(dest, exist_ok=True)
+        else:
+            members.append((info, dest))
+
+    journal = _Journal(os.path.join(staging_root, _JOURNAL_NAME))
+    total = sum(info.file_size for info, _ in members)
+    state = {"done": 0}
+    state_lock = threading.Lock()
+
+    def report(size):
+        with state_lock:
+            state["done"] += size
+            done = state["done"]
+        if progress:
+            try:
+                progress(done, total)
+            except Exception:
+                pass
+
+    pending = []
+    for info, dest in members:
+        if journal.is_done(info, dest):
+            report(info.file_size)
+        else:
+            pending.append((info, dest))
+
+    # 大文件先开始，缩短尾部等待
+    pending.sort(key=lambda x: x[0].compress_size, reverse=True)
+
+    def task(info, dest):
+        _extract_member(source, info, dest)
+        journal.mark(info)
+        report(info.file_size)
+
+    workers = workers or min(8, (os.cpu_count() or 4))
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(task, info, dest) for info, dest in pending]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()  # 任一成员失败 (含 CRC 错误) 即中止
+    finally:
+        journal.close()
+        source.close()
+
+    staged_dir = os.path.join(staging_root, top_dir)
+    if not os.path.isdir(staged_dir):
+        raise IOError(f"{top_dir} not found in archive")
+
+    # 原子替换：旧目录先改名，新目录改名到位，再删除旧目录
+    old_dir = os.path.join(runtime_dir, f".{top_dir}.old.{os.getpid()}")
+    if os.path.exists(target_dir):
+        try:
+            os.rename(target_dir, old_dir)
+        except OSError as e:
+            # Windows 上运行中的游戏占用旧目录文件时无法改名：保留旧目录继续使用，
+            # 暂存目录与日志原样保留，下次启动只需完成这一步替换
+            raise SwapDeferred(f"{top_dir} is in use: {e}") from e
+    try:
+        os.rename(staged_dir, target_dir)
+    except OSError as e:
+        if os.path.exists(old_dir): os.rename(old_dir, target_dir)
+        raise SwapDeferred(f"{top_dir} could not be replaced: {e}") from e
+
+    for leftover in (old_dir, staging_root):
+        if os.path.exists(leftover):
+            try:
+                remove_tree(leftover)
+            except Exception as e:
+                print(f"[{constants.PROXY_NAME}] 清理临时目录失败: {e}", file=sys.stderr)
+
+    return target_dir
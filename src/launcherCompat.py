@@ -63,6 +63,8 @@ def _install_windows_logic():
                     shutil.copy2(src, dst)
                 except:
                     pass  # 忽略覆盖错误
+            elif _extract_from_asset_pack(filename, dst):
+                pass
             else:
                 return False, f"资源缺失: {filename}"
 
@@ -77,6 +79,18 @@ def _install_windows_logic():
         return False, f"文件生成出错: {str(e)}"
 
 
+def _extract_from_asset_pack(filename, dst):
+    """外置资源包构建 (未内嵌 assets) 时，从资源包中取出兼容文件"""
+    from src import assetPack
+    pack = assetPack.open_pack()
+    if not pack or not pack.has(filename): return False
+    try:
+        pack.extract_to(filename, dst)
+        return True
+    except:
+        return False
+
+
 def _create_hard_link(src, dst):
     if os.path.exists(dst):
         try:
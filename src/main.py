@@ -1,10 +1,15 @@
 # src/main.py
 import sys
 import os
+import time
 import subprocess
 import platform
-from src import constants, runtimeMGR, authAPI, guiWizard, javaScanner, preSetup
+import requests
+from src import constants, runtimeMGR, authAPI, javaScanner, warmUp, credBroker, tokenRefresh
 from src.configMGR import config_mgr
+from src.hostHealth import host_health, CircuitOpen
+from src.rateLimiter import RateLimited
+from src.i18n import I18n
 
 
 # ================= 1. 嗅探逻辑 (策略模式) =================
@@ -68,6 +73,20 @@ def run_standard_sniffer(tool_java, raw_args):
         return None
 
 
+def _print_extract_progress():
+    """终端进度显示 (首次解压内置 Java 时)，百分比变化时才刷新"""
+    state = {"last": -1}
+
+    def callback(done, total):
+        percent = done * 100 // total if total else 100
+        if percent == state["last"]: return
+        state["last"] = percent
+        end = "\n" if percent >= 100 else ""
+        print(f"\r[{constants.PROXY_NAME}] Preparing Java runtime... {percent}%", end=end, file=sys.stderr)
+
+    return callback
+
+
 # ================= 2. 判别与分发 =================
 
 def detect_launch_type(args):
@@ -95,12 +114,53 @@ def get_game_dir(args):
     return os.getcwd()
 
 
-def ensure_account_valid(game_dir, force_gui=False):
-    config_mgr.load()
+def get_version_id(args):
+    for i, arg in enumerate(args):
+        if arg == "--version" and i + 1 < len(args): return args[i + 1]
+        if arg.startswith("--version="): return arg.split("=", 1)[1]
+    return None
+
+
+def offer_offline_launch(auth_data):
+    """
+    验证服务器不可达时询问是否使用缓存的 Token 离线启动 (单人游戏不受影响)。
+    无图形环境时直接离线启动；已知失效的账号不提供此选项。
+    """
+    if auth_data.get("invalid") or not auth_data.get("accessToken"): return False
+    try:
+        import tkinter
+        import tkinter.messagebox
+        root = tkinter.Tk()
+        root.withdraw()
+        root.attributes("-topmost", True)
+        accepted = tkinter.messagebox.askyesno(
+            I18n.t("offline_launch_title"),
+            I18n.t("offline_launch_question").format(name=auth_data.get("name", "")),
+            parent=root
+        )
+        root.destroy()
+    except Exception:
+        accepted = True
+
+    if accepted:
+        print(f"[{constants.PROXY_NAME}] Launching offline with cached token", file=sys.stderr)
+    return accepted
+
 
+def ensure_account_valid(game_dir, force_gui=False):
     # --- 调试: 打印当前判定的游戏目录 ---
     print(f"[{constants.PROXY_NAME}] Instance Path: {game_dir}", file=sys.stderr)
 
+    # 凭据代理在运行时由它负责校验 / 刷新；连不上则照旧直接处理
+    brokered = None if force_gui else credBroker.get_token(game_dir)
+    if brokered and brokered["status"] == credBroker.STATUS_OK:
+        auth_data = brokered["account"]
+        print(f"[{constants.PROXY_NAME}] Found Binding: {auth_data.get('name', 'Unknown')} (via broker)",
+              file=sys.stderr)
+        return auth_data
+
+    config_mgr.load()
+
     target_uuid = config_mgr.get_account_for_instance(game_dir)
     auth_data = config_mgr.get_account(target_uuid)
 
@@ -112,21 +172,47 @@ def ensure_account_valid(game_dir, force_gui=False):
     else:
         print(f"[{constants.PROXY_NAME}] No Binding Found (New Instance)", file=sys.stderr)
 
+    api = config_mgr.get_current_api_config()
+    base = api.get("base_url", "").rstrip('/')
+
     need_gui = force_gui
-    if not auth_data:
+    if not auth_data or brokered:
+        # 代理已确认未绑定或 Token 已失效，不必再联网
         need_gui = True
+    elif not force_gui and not auth_data.get("invalid") and \
+            time.time() - tokenRefresh.verified_at(auth_data) < constants.TOKEN_TRUST_WINDOW:
+        # 刚刷新或校验过 (例如 --yggpro-warm 预热)：不再联网校验
+        if constants.DEBUG_MODE:
+            print(f"[{constants.PROXY_NAME}] Token refreshed recently, skipping validation", file=sys.stderr)
+    elif not force_gui and host_health.is_open(base):
+        # 验证服务器连续失败 (熔断中)：不再等待超时
+        print(f"[{constants.PROXY_NAME}] Auth server unreachable, skipping validation", file=sys.stderr)
+        need_gui = not offer_offline_launch(auth_data)
     elif not force_gui:
-        api = config_mgr.get_current_api_config()
-        base = api.get("base_url", "").rstrip('/')
         try:
             if not authAPI.validate(f"{base}/authserver/validate", auth_data["accessToken"],
                                     auth_data.get("clientToken")):
                 print(f"[{constants.PROXY_NAME}] Token Expired, Refreshing...", file=sys.stderr)
-                new = authAPI.refresh(f"{base}/authserver/refresh", auth_data["accessToken"],
-                                      auth_data.get("clientToken"))
+                # 同一账号的多个实例同时启动时只有一个进程真正刷新，其余复用其结果
+                new = tokenRefresh.refresh_token(f"{base}/authserver/refresh", auth_data)
                 auth_data["accessToken"] = new["accessToken"]
                 if "clientToken" in new: auth_data["clientToken"] = new["clientToken"]
+                auth_data["token_refreshed_at"] = time.time()
                 config_mgr.add_or_update_account(auth_data)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, CircuitOpen, RateLimited) as e:
+            # 服务器不可达 / 熔断 / 限流不代表 Token 失效，不标记 invalid
+            print(f"[{constants.PROXY_NAME}] Auth server unreachable: {e}", file=sys.stderr)
+            need_gui = not offer_offline_launch(auth_data)
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code >= 500:
+                # 5xx 同样计入熔断失败次数，按服务器故障处理
+                print(f"[{constants.PROXY_NAME}] Auth server error: {e}", file=sys.stderr)
+                need_gui = not offer_offline_launch(auth_data)
+            else:
+                print(f"[{constants.PROXY_NAME}] Refresh Failed: {e}", file=sys.stderr)
+                auth_data["invalid"] = True
+                config_mgr.add_or_update_account(auth_data)
+                need_gui = True
         except Exception as e:
             print(f"[{constants.PROXY_NAME}] Refresh Failed: {e}", file=sys.stderr)
             # 标记账号失效
@@ -137,6 +223,7 @@ def ensure_account_valid(game_dir, force_gui=False):
 
     if need_gui:
         print(f"[{constants.PROXY_NAME}] Opening GUI...", file=sys.stderr)
+        from src import guiWizard
         if not guiWizard.show_wizard(force_show_settings=force_gui, game_dir=game_dir): return None
 
         config_mgr.load()
@@ -154,7 +241,17 @@ def ensure_account_valid(game_dir, force_gui=False):
 # ================= 4. 主入口 =================
 
 def main():
+    # 无界面管理命令：不加载任何 GUI 模块
+    if sys.argv[1:2] == ["--yggpro-cli"]:
+        from src import cli
+        sys.exit(cli.run(sys.argv[2:]))
+    if sys.argv[1:2] == ["--yggpro-warm"]:
+        sys.exit(warmUp.run(sys.argv[2:]))
+    if sys.argv[1:2] == ["--yggpro-broker"]:
+        sys.exit(credBroker.serve())
+
     # 前置页面
+    from src import preSetup
     preSetup.check_entry_mode()
     sys_args = sys.argv[1:]
 
@@ -177,7 +274,7 @@ def main():
     config_mgr.load()
 
     # 初始候选
-    tool_java = runtimeMGR.get_fallback_java()
+    tool_java = runtimeMGR.get_fallback_java(progress=_print_extract_progress())
     target_java = config_mgr.get_real_java_path()
 
     def is_valid_java(p):
@@ -287,8 +384,18 @@ def main():
     auth_data = ensure_account_valid(game_dir, force_gui=force_config_mode)
     if not auth_data: sys.exit(0)
 
-    # === 实际启动 Java 选择链：instance -> target -> tool ===
+    # === 实际启动 Java 选择链：instance -> 版本要求 -> target -> tool ===
     instance_java = config_mgr.get_java_for_instance(game_dir)
+
+    # 实例未单独绑定 Java 时，按版本 JSON 的 javaVersion.majorVersion 自动挑选
+    if not config_mgr.has_instance_java_binding(game_dir):
+        required_major = javaScanner.get_required_java_major(game_dir, get_version_id(captured_game_args))
+        if required_major:
+            matched = javaScanner.resolve_java(required_major)
+            if matched:
+                instance_java = matched["path"]
+                print(f"[{constants.PROXY_NAME}] Java {required_major} required, using: {instance_java}",
+                      file=sys.stderr)
     launch_java = (
         instance_java if instance_java and os.path.exists(instance_java)
         else target_java if target_java and os.path.exists(target_java)
@@ -306,6 +413,10 @@ def main():
     final_cmd = [launch_java]
     final_cmd.append(f"-javaagent:{injector}={api['base_url']}")
     final_cmd.append("-Dauthlibinjector.noShowServerName")
+    # 预热时缓存的服务器元数据：authlib-injector 启动时不必再请求 API 根地址
+    prefetched = warmUp.get_prefetched_meta(api["base_url"])
+    if prefetched:
+        final_cmd.append(f"-Dauthlibinjector.yggdrasil.prefetched={prefetched}")
 
     if jvm_args_prefix:
         final_cmd.extend(jvm_args_prefix)
@@ -0,0 +1,91 @@
+# src/procLock.py
+"""
+跨进程文件锁。
+
+使用操作系统的文件锁 (POSIX: fcntl.flock / Windows: msvcrt.locking)：
+持有锁的进程崩溃或被杀时，锁由系统自动释放，不会留下需要人工清理的僵尸锁。
+锁文件中写入持有者 PID，仅用于排查问题。
+"""
+import os
+import time
+import threading
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class LockTimeout(Exception):
+    pass
+
+
+class ProcessLock:
+    def __init__(self, path, timeout=None, poll_interval=0.05):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd = None
+        # 同一进程内的多个线程也需要互斥 (flock 以打开的文件为单位)
+        self._thread_lock = threading.Lock()
+
+    def _try_lock(self, fd):
+        try:
+            if os.name == "nt":
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, timeout=None):
+        """获取锁，超时抛出 LockTimeout；timeout 为 None 时一直等待"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        if not self._thread_lock.acquire(timeout=-1 if timeout is None else timeout):
+            raise LockTimeout(self.path)
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            while not self._try_lock(fd):
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise LockTimeout(self.path)
+                time.sleep(self.poll_interval)
+        except BaseException:
+            os.close(fd)
+            self._thread_lock.release()
+            raise
+
+        self._fd = fd
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, f"{os.getpid()}\n".encode().ljust(16))
+        except OSError:
+            pass
+        return True
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fd is None: return
+        try:
+            if os.name == "nt":
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
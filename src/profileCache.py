@@ -0,0 +1,123 @@
+# src/profileCache.py
+"""
+角色档案缓存 (cache/profiles.json)。
+
+头像只关心档案中的皮肤地址，但以前每次创建账号卡片都要请求一次
+/sessionserver/session/minecraft/profile/{uuid}。这里把解码后的 textures 与
+服务器返回的验证信息 (ETag / Last-Modified) 持久化：
+  - 有效期 (PROFILE_CACHE_TTL) 内直接使用缓存，不发请求
+  - 过期后调用方先用旧数据显示，再在后台带条件请求重新验证，304 只刷新时间
+另外记录各服务器的批量档案接口是否返回 textures (键为 "bulk|<api>")。
+"""
+import os
+import sys
+import json
+import time
+import threading
+from src import constants
+from src.configMGR import config_mgr
+
+
+class ProfileCache:
+    def __init__(self):
+        self._entries = None
+        self._lock = threading.Lock()
+        self._cache_file = None
+
+    @property
+    def cache_file(self):
+        if self._cache_file is None:
+            self._cache_file = os.path.join(config_mgr.get_data_dir(), "cache", constants.PROFILE_CACHE_FILENAME)
+        return self._cache_file
+
+    def _ensure_loaded(self):
+        # 调用方持有 _lock
+        if self._entries is not None: return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = data if isinstance(data, dict) else {}
+        except Exception:
+            self._entries = {}
+
+    def _save(self):
+        # 调用方持有 _lock
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=4)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"[{constants.PROXY_NAME}] 保存档案缓存失败: {e}", file=sys.stderr)
+
+    @staticmethod
+    def _key(uuid, api_url):
+        # 同一 uuid 在不同验证服务器上是不同的角色
+        return f"{api_url.rstrip('/')}|{uuid.replace('-', '')}"
+
+    def get(self, uuid, api_url):
+        """返回缓存条目 (副本) 或 None"""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(self._key(uuid, api_url))
+            return dict(entry) if entry else None
+
+    @staticmethod
+    def is_fresh(entry, ttl=None):
+        ttl = constants.PROFILE_CACHE_TTL if ttl is None else ttl
+        return bool(entry) and time.time() - entry.get("fetched_at", 0) < ttl
+
+    def put(self, uuid, api_url, textures, etag=None, last_modified=None):
+        """textures 为解码后的 textures 对象 (无皮肤时为 {})"""
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[self._key(uuid, api_url)] = {
+                "textures": textures or {},
+                "fetched_at": time.time(),
+                "etag": etag,
+                "last_modified": last_modified,
+            }
+            self._save()
+
+    def touch(self, uuid, api_url):
+        """服务器返回 304：内容未变，只刷新获取时间"""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(self._key(uuid, api_url))
+            if entry:
+                entry["fetched_at"] = time.time()
+                self._save()
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry:
+            if entry.get("etag"): headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"): headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    @staticmethod
+    def _bulk_key(api_url):
+        return f"bulk|{api_url.rstrip('/')}"
+
+    def bulk_has_textures(self, api_url):
+        """该服务器的批量档案接口是否返回 textures；未探测或记录已过期返回 None"""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(self._bulk_key(api_url))
+        if not self.is_fresh(entry, constants.PROFILE_BULK_PROBE_TTL): return None
+        return bool(entry.get("supported"))
+
+    def set_bulk_has_textures(self, api_url, supported):
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[self._bulk_key(api_url)] = {"supported": bool(supported), "fetched_at": time.time()}
+            self._save()
+
+    @staticmethod
+    def skin_url(entry):
+        if not entry: return None
+        return (entry.get("textures") or {}).get("SKIN", {}).get("url")
+
+
+profile_cache = ProfileCache()
@@ -0,0 +1,161 @@
+# src/rateLimiter.py
+"""
+跨进程令牌桶限流 (<数据目录>/cache/ratelimit.json，由 ProcessLock 保护)。
+
+验证服务器按 IP 限流：机房里很多机器经同一出口同时启动时，各自的重试只会让情况更糟。现在：
+  - 每个主机一个令牌桶 (RATE_LIMIT_CAPACITY / RATE_LIMIT_PER_SECOND)，本机所有进程共用
+  - 启动流程 (PRIORITY_CRITICAL) 可以用完整个桶；后台请求 (头像、账号校验、预热) 只能用到
+    保留的 RATE_LIMIT_RESERVE 个令牌之前，且有启动流程在排队时让行
+  - 收到 429 时按 Retry-After (或指数退避) 记录 blocked_until，其他进程同样遵守
+  - 预计等待超过上限时直接抛出 RateLimited (继承 requests 的 ConnectionError，调用方按网络不通处理)
+"""
+import os
+import json
+import time
+import threading
+import email.utils
+from urllib.parse import urlparse
+import requests
+from src import constants
+from src.configMGR import config_mgr
+from src.procLock import ProcessLock, LockTimeout
+
+PRIORITY_CRITICAL = 0
+PRIORITY_BACKGROUND = 1
+
+
+class RateLimited(requests.exceptions.ConnectionError):
+    """本地限流或服务器要求退避，请求未发出"""
+
+
+def parse_retry_after(value):
+    """Retry-After 头 (秒数或 HTTP 日期) -> 秒；无法解析返回 None"""
+    if not value: return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    def __init__(self, path=None):
+        self._path = path
+        self._lock = None
+        self._lock_guard = threading.Lock()
+
+    def _get_path(self):
+        return self._path or os.path.join(config_mgr.get_data_dir(), "cache", constants.RATE_LIMIT_FILENAME)
+
+    def _get_lock(self):
+        with self._lock_guard:
+            if self._lock is None:
+                self._lock = ProcessLock(self._get_path() + ".lock", timeout=2)
+            return self._lock
+
+    def _load(self):
+        try:
+            with open(self._get_path(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data):
+        # 调用方持有锁
+        path = self._get_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def _update(self, host, fn):
+        """在锁内读取 host 的状态、调用 fn(entry, now) 修改并写回，返回 fn 的返回值"""
+        lock = self._get_lock()
+        try:
+            lock.acquire()
+        except LockTimeout:
+            # 锁被卡住时不限流，宁可多发请求也不能卡住启动
+            return None
+        try:
+            data = self._load()
+            now = time.time()
+            entry = data.setdefault(host, {
+                "tokens": float(constants.RATE_LIMIT_CAPACITY), "updated": now,
+                "blocked_until": 0, "strikes": 0, "critical_waiting_until": 0,
+            })
+            # 补充令牌
+            elapsed = max(0.0, now - entry.get("updated", now))
+            entry["tokens"] = min(float(constants.RATE_LIMIT_CAPACITY),
+                                  entry.get("tokens", 0.0) + elapsed * constants.RATE_LIMIT_PER_SECOND)
+            entry["updated"] = now
+            result = fn(entry, now)
+            self._save(data)
+            return result
+        finally:
+            lock.release()
+
+    def acquire(self, url, priority=PRIORITY_CRITICAL, max_wait=None):
+        """取得一个令牌；需要等待时睡眠，预计超过 max_wait 则抛出 RateLimited"""
+        host = urlparse(url).netloc
+        if max_wait is None:
+            max_wait = constants.RATE_LIMIT_CRITICAL_WAIT if priority == PRIORITY_CRITICAL \
+                else constants.RATE_LIMIT_BACKGROUND_WAIT
+        deadline = time.time() + max_wait
+
+        def take(entry, now):
+            if entry.get("blocked_until", 0) > now:
+                return entry["blocked_until"] - now
+            if priority == PRIORITY_CRITICAL:
+                floor = 0
+            else:
+                # 启动流程排队中时后台请求让行
+                if entry.get("critical_waiting_until", 0) > now:
+                    return 1 / constants.RATE_LIMIT_PER_SECOND
+                floor = constants.RATE_LIMIT_RESERVE
+            if entry["tokens"] - 1 >= floor:
+                entry["tokens"] -= 1
+                if priority == PRIORITY_CRITICAL:
+                    entry["critical_waiting_until"] = 0
+                return 0
+            if priority == PRIORITY_CRITICAL:
+                entry["critical_waiting_until"] = deadline
+            return (floor + 1 - entry["tokens"]) / constants.RATE_LIMIT_PER_SECOND
+
+        while True:
+            wait = self._update(host, take)
+            if not wait: return
+            if time.time() + wait > deadline:
+                raise RateLimited(f"{host} is rate limited, retry in {wait:.1f}s")
+            time.sleep(min(wait, 1.0))
+
+    def observe(self, url, resp):
+        """请求完成后调用：429 时记录退避并抛出 RateLimited，其他响应清除连续退避计数"""
+        host = urlparse(url).netloc
+        if resp.status_code != 429:
+            if self._load().get(host, {}).get("strikes"):
+                self._update(host, lambda entry, now: entry.update(strikes=0))
+            return
+
+        retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+
+        def block(entry, now):
+            entry["strikes"] = entry.get("strikes", 0) + 1
+            delay = retry_after if retry_after is not None else \
+                constants.RATE_LIMIT_BACKOFF_BASE * 2 ** (entry["strikes"] - 1)
+            delay = min(delay, constants.RATE_LIMIT_BACKOFF_MAX)
+            entry["blocked_until"] = max(entry.get("blocked_until", 0), now + delay)
+            entry["tokens"] = 0.0
+            return delay
+
+        delay = self._update(host, block) or 0
+        raise RateLimited(f"{host} returned 429, backing off {delay:.0f}s")
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,206 @@
+# src/refreshStress.py
+"""
+Token 刷新的多进程压力测试。
+
+在本机启动一个模拟的 /authserver/refresh (记录请求次数，旧 Token 用过一次即作废，与 Yggdrasil 一致)，
+让多个独立进程同时对同一账号调用 tokenRefresh.refresh_token，验证：
+  - 服务器只收到一次刷新请求
+  - 每个进程拿到的都是同一个新 accessToken
+否则返回码为 1。各进程的数据目录 (锁、刷新记录、限流 / 熔断状态) 指向同一个临时目录。
+
+用法:
+    python -m src.refreshStress --procs 8
+    python -m src.refreshStress --procs 16 --delay 0.5 --json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_UUID = "0123456789abcdef0123456789abcdef"
+_OLD_TOKEN = "refresh-stress-old"
+_CLIENT_TOKEN = "refresh-stress-client"
+_CHILD_TIMEOUT = 120
+
+
+# ================= 1. 模拟验证服务器 =================
+
+class _MockAuthServer:
+    """只实现 /authserver/refresh：每个 accessToken 只能刷新一次，之后返回 403"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.hits = 0
+        self._used = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/authserver/refresh"
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path != "/authserver/refresh":
+                    return self._reply(404, {"error": "NotFound"})
+                with mock._lock:
+                    mock.hits += 1
+                    n = mock.hits
+                    reused = body.get("accessToken") in mock._used
+                    mock._used.add(body.get("accessToken"))
+                # 模拟服务器耗时，拉长并发窗口
+                time.sleep(mock.delay)
+                if reused:
+                    return self._reply(403, {"error": "ForbiddenOperationException",
+                                             "errorMessage": "Invalid token."})
+                self._reply(200, {
+                    "accessToken": f"refresh-stress-new-{n}",
+                    "clientToken": body.get("clientToken"),
+                    "selectedProfile": body.get("selectedProfile"),
+                })
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# ================= 2. 子进程 =================
+
+def _child(data_dir, url, start_at):
+    """在独立进程中刷新同一账号一次，结果以一行 JSON 输出到 stdout"""
+    from src import tokenRefresh
+    from src.configMGR import config_mgr
+
+    with config_mgr._lock:
+        config_mgr._data_dir = data_dir
+
+    auth_data = {"uuid": _UUID, "name": "Steve", "accessToken": _OLD_TOKEN, "clientToken": _CLIENT_TOKEN}
+    time.sleep(max(0.0, start_at - time.time()))
+    t0 = time.perf_counter()
+    try:
+        new = tokenRefresh.refresh_token(url, auth_data)
+        result = {"accessToken": new["accessToken"]}
+    except Exception as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+    result.update({"pid": os.getpid(), "wall_s": round(time.perf_counter() - t0, 4)})
+    print(json.dumps(result))
+    return 0
+
+
+def _spawn(data_dir, url, start_at):
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [repo_root, env.get("PYTHONPATH")]))
+    cmd = [sys.executable, "-m", "src.refreshStress", "--child", data_dir, "--url", url, "--start-at", str(start_at)]
+    return subprocess.Popen(cmd, cwd=repo_root, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+def _collect(procs):
+    """等待子进程结束，返回每个进程的结果 (超时或崩溃记为失败)"""
+    results = []
+    for proc in procs:
+        try:
+            out, err = proc.communicate(timeout=_CHILD_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            results.append({"pid": proc.pid, "error": "timeout"})
+            continue
+        try:
+            results.append(json.loads(out.strip().splitlines()[-1]))
+        except (ValueError, IndexError):
+            results.append({"pid": proc.pid, "error": (err.strip().splitlines() or ["?"])[-1]})
+    return results
+
+
+# ================= 3. 运行 =================
+
+def run_stress(procs=8, delay=0.3, keep=False):
+    data_dir = tempfile.mkdtemp(prefix="yggpro-refreshstress-")
+    try:
+        with _MockAuthServer(delay) as server:
+            # 留出解释器启动时间，让所有进程几乎同时发起刷新
+            start_at = time.time() + 1.5
+            results = _collect([_spawn(data_dir, server.url, start_at) for _ in range(procs)])
+            hits = server.hits
+
+        tokens = sorted({r["accessToken"] for r in results if "accessToken" in r})
+        summary = {
+            "procs": procs,
+            "delay_s": delay,
+            "server_hits": hits,
+            "distinct_tokens": tokens,
+            "wall_s_max": max((r.get("wall_s", 0) for r in results), default=0),
+            "errors": [r["error"] for r in results if r.get("error")],
+        }
+        summary["ok"] = hits == 1 and len(tokens) == 1 and not summary["errors"]
+        return summary
+    finally:
+        if not keep:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def _print_table(summary):
+    print(f"procs: {summary['procs']}  server delay: {summary['delay_s']}s  ok: {summary['ok']}")
+    print(f"server hits: {summary['server_hits']}  distinct tokens: {len(summary['distinct_tokens'])}"
+          f"  wall max: {summary['wall_s_max']:.3f}s")
+    for error in summary["errors"]:
+        print(f"    error: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="token refresh stress test (multiple processes, one account)")
+    parser.add_argument("--procs", type=int, default=8, help="并发进程数")
+    parser.add_argument("--delay", type=float, default=0.3, help="模拟服务器处理一次刷新的耗时 (秒)")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    parser.add_argument("--keep", action="store_true", help="保留临时数据目录")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    parser.add_argument("--start-at", type=float, default=0.0, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return _child(args.child, args.url, args.start_at)
+
+    summary = run_stress(args.procs, args.delay, args.keep)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        _print_table(summary)
+    if not summary["ok"]:
+        print("refreshStress: expected one refresh request and the same new token in every process",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
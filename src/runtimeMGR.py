@@ -4,13 +4,23 @@ import os
 import shutil
 import platform
 import subprocess
-import zipfile
-from src import constants
+import json
+import threading
+from src import constants, assetManifest, assetPack, jreExtractor, runtimeStore
 from src.configMGR import config_mgr
+from src.procLock import ProcessLock, LockTimeout
+
+_manifest_cache = {}
+_locks = {}
+_locks_guard = threading.Lock()
 
 
 def _get_source_assets_path():
-    """获取打包源文件中的 assets 目录路径"""
+    """
+    获取打包源文件中的 assets 目录路径。
+    可执行文件旁存在外置资源包时优先使用资源包 (见 _find_asset / _find_jre_source)，
+    此时 onefile 构建无需内嵌 JRE，进程启动耗时不再随 JRE 大小增长。
+    """
     if getattr(sys, 'frozen', False):
         # PyInstaller 打包后的临时目录
         return os.path.join(sys._MEIPASS, "assets")
@@ -35,30 +45,172 @@ def _is_java_executable(path):
         return False
 
 
-def _extract_file_from_assets(filename):
-    """通用方法：将文件从 assets 复制到运行时目录"""
-    runtime_dir = config_mgr.get_runtime_dir()
-    target_path = os.path.join(runtime_dir, filename)
-    source_assets = _get_source_assets_path()
+# ================= 资源版本记录 =================
+
+def _get_manifest():
+    """读取资源清单 (每个进程只读一次)：外置资源包内的清单优先，其次 assets 目录"""
+    if "manifest" not in _manifest_cache:
+        manifest = assetPack.read_manifest()
+        _manifest_cache["from_pack"] = manifest is not None
+        _manifest_cache["manifest"] = manifest or assetManifest.load_manifest(_get_source_assets_path())
+    return _manifest_cache["manifest"]
+
 
+def _pack_has(filename):
+    _get_manifest()
+    return _manifest_cache["from_pack"] and filename in _manifest_cache["manifest"].get("files", {})
+
+
+def _expected_token(filename, source_path):
+    """
+    资源的期望版本标识：
+    有清单时使用构建期哈希；没有清单 (源码运行) 时退化为源文件大小
+    """
+    manifest = _get_manifest()
+    entry = (manifest or {}).get("files", {}).get(filename)
+    if entry:
+        return entry["hash"]
+    try:
+        return f"size:{os.path.getsize(source_path)}"
+    except OSError:
+        return None
+
+
+def _find_asset(filename):
+    """
+    定位资源文件，返回 (write_to(dest_path), token)；找不到返回 (None, None)。
+    外置资源包只在真正需要写出时才打开 (mmap + 索引)。
+    """
+    if _pack_has(filename):
+        return (lambda dst: assetPack.open_pack().extract_to(filename, dst)), _expected_token(filename, None)
+
+    source_assets = _get_source_assets_path()
     # 候选源路径
     candidates = [
         os.path.join(source_assets, filename),
         os.path.join(source_assets, constants.JRE_DIR_NAME, filename)  # 有时候会在子目录
     ]
+    source = next((c for c in candidates if os.path.exists(c)), None)
+    if not source:
+        return None, None
+    return (lambda dst: shutil.copy2(source, dst)), _expected_token(filename, source)
+
+
+def _get_lock(name):
+    """运行时目录中的跨进程锁 (同名复用同一实例，兼顾进程内线程互斥)"""
+    path = os.path.join(config_mgr.get_runtime_dir(), f".{name}.lock")
+    with _locks_guard:
+        if path not in _locks:
+            _locks[path] = ProcessLock(path, timeout=constants.RUNTIME_LOCK_TIMEOUT)
+        return _locks[path]
+
+
+class _SingleFlight:
+    """
+    资源初始化的单飞 (single-flight) 保护：
+    只有拿到锁的进程执行释放，其余进程阻塞等待，拿到锁后重新检查即可直接复用结果。
+    等待超时 (持有者卡死) 时不再等待，退化为无锁执行。
+    """
+
+    def __init__(self, name):
+        self._lock = _get_lock(name)
+        self._held = False
+
+    def __enter__(self):
+        try:
+            self._held = self._lock.acquire()
+        except LockTimeout:
+            print(f"[{constants.PROXY_NAME}] 等待运行时锁超时，继续执行", file=sys.stderr)
+        return self
+
+    def __exit__(self, *exc):
+        if self._held: self._lock.release()
+
+
+def _stamp_file():
+    return os.path.join(config_mgr.get_runtime_dir(), constants.ASSET_STAMP_FILENAME)
+
+
+def _read_stamps():
+    try:
+        with open(_stamp_file(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _write_stamp(key, token, stat_path):
+    """记录已释放资源的版本与落盘后的 stat，下次启动只需比对 stat"""
+    with _SingleFlight("assets-stamp"):
+        stamps = _read_stamps()
+        try:
+            st = os.stat(stat_path)
+            stamps[key] = {"token": token, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        except OSError:
+            stamps.pop(key, None)
+
+        tmp_file = f"{_stamp_file()}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(stamps, f, indent=4)
+            os.replace(tmp_file, _stamp_file())
+        except OSError as e:
+            print(f"[{constants.PROXY_NAME}] 写入资源记录失败: {e}", file=sys.stderr)
+
+
+def _is_stamp_current(key, token, stat_path):
+    """版本一致且文件 stat 未变 -> 无需重新释放"""
+    if not token: return False
+    entry = _read_stamps().get(key)
+    if not entry or entry.get("token") != token:
+        return False
+    try:
+        st = os.stat(stat_path)
+    except OSError:
+        return False
+    return st.st_size == entry.get("size") and st.st_mtime_ns == entry.get("mtime_ns")
+
+
+# ================= 资源释放 =================
+
+def _extract_file_from_assets(filename):
+    """通用方法：将文件从 assets 复制到运行时目录 (版本变化时原子替换)"""
+    runtime_dir = config_mgr.get_runtime_dir()
+    target_path = os.path.join(runtime_dir, filename)
+
+    write_source, token = _find_asset(filename)
+    if not write_source:
+        # 源文件缺失 (如精简版构建)：保留已有文件
+        return target_path
 
-    # 简单的“存在即返回”策略（生产环境建议加Hash校验，这里为了性能先这样）
-    if os.path.exists(target_path):
+    if _is_stamp_current(filename, token, target_path):
         return target_path
 
-    # 开始寻找并复制
-    for source in candidates:
-        if os.path.exists(source):
+    with _SingleFlight(filename):
+        # 等锁期间其他进程可能已经释放完毕
+        if _is_stamp_current(filename, token, target_path):
+            return target_path
+
+        # 共享仓库：同一版本只保存一份，这里只建立链接
+        if runtimeStore.is_enabled() and runtimeStore.link_file(filename, token, target_path, write_source):
+            _write_stamp(filename, token, target_path)
+            return target_path
+
+        # 先复制到临时文件，校验后再原子替换，避免其他进程读到半截文件
+        tmp_path = f"{target_path}.{os.getpid()}.tmp"
+        try:
+            write_source(tmp_path)
+            manifest_entry = (_get_manifest() or {}).get("files", {}).get(filename)
+            if manifest_entry and assetManifest.hash_file(tmp_path) != manifest_entry["hash"]:
+                raise IOError("hash mismatch")
+            os.replace(tmp_path, target_path)
+            _write_stamp(filename, token, target_path)
+        except Exception as e:
+            print(f"[{constants.PROXY_NAME}] 释放文件 {filename} 失败: {e}", file=sys.stderr)
             try:
-                shutil.copy2(source, target_path)
-                return target_path
-            except Exception as e:
-                print(f"[{constants.PROXY_NAME}] 释放文件 {filename} 失败: {e}", file=sys.stderr)
+                os.remove(tmp_path)
+            except OSError:
+                pass
 
     return target_path  # 即使复制失败也返回路径，让调用者去报错
 
@@ -73,10 +225,11 @@ def get_fmcmain_jar():
     return _extract_file_from_assets("fMcMain.jar")
 
 
-def get_fallback_java():
+def get_fallback_java(progress=None):
     """
     获取兜底 Java。
-    逻辑：检查是否存在且可用 -> 是则返回 -> 否则解压。
+    逻辑：版本记录一致则直接返回 -> 否则检查是否可用 -> 不可用或内置包已升级则解压。
+    progress: 解压进度回调 callback(done_bytes, total_bytes)，仅在真正解压时调用
     """
     runtime_dir = config_mgr.get_runtime_dir()
     target_jre_dir = os.path.join(runtime_dir, constants.JRE_DIR_NAME)
@@ -88,44 +241,92 @@ def get_fallback_java():
     else:
         java_exe = os.path.join(target_jre_dir, "bin", bin_name)
 
-    # 存在且可用，直接返回
-    if os.path.exists(java_exe) and _is_java_executable(java_exe):
+    open_source, token, source_folder = _find_jre_source()
+
+    # 版本记录一致：只做 stat，不启动 java -version
+    if _is_stamp_current(constants.JRE_DIR_NAME, token, java_exe):
         return java_exe
 
-    # 2. 解压流程
-    # print(f"[{constants.PROXY_NAME}] 正在初始化运行环境...", file=sys.stderr) # 减少刷屏
+    # 没有版本记录 (旧版本释放的 / 无内置包) 且可用，直接返回；
+    # 有内置包时为这份已有的安装补写记录，而不是重新解压一次
+    if os.path.exists(java_exe) and (not token or constants.JRE_DIR_NAME not in _read_stamps()) \
+            and _is_java_executable(java_exe):
+        if token: _write_stamp(constants.JRE_DIR_NAME, token, java_exe)
+        return java_exe
+
+    # 2. 解压流程 (跨进程单飞：只有一个进程解压，其余等待后复用)
+    with _SingleFlight(constants.JRE_DIR_NAME):
+        if _is_stamp_current(constants.JRE_DIR_NAME, token, java_exe):
+            return java_exe
+        if not token and _is_java_executable(java_exe):
+            return java_exe
+        return _provision_jre(runtime_dir, target_jre_dir, java_exe, open_source, source_folder, token, progress)
+
+
+def _find_jre_source():
+    """
+    定位内置 JRE，返回 (open_source(), token, source_folder)：
+    外置资源包 -> assets/YggProJAVA.zip -> assets/YggProJAVA 目录
+    """
+    zip_name = f"{constants.JRE_DIR_NAME}.zip"
+    if _pack_has(zip_name):
+        return (lambda: assetPack.PackSource(assetPack.open_pack(), f"{constants.JRE_DIR_NAME}/"),
+                _expected_token(zip_name, None), None)
 
     source_assets = _get_source_assets_path()
-    source_zip = os.path.join(source_assets, f"{constants.JRE_DIR_NAME}.zip")
+    source_zip = os.path.join(source_assets, zip_name)
+    if os.path.exists(source_zip):
+        return (lambda: jreExtractor.ZipSource(source_zip)), _expected_token(zip_name, source_zip), None
+
     source_folder = os.path.join(source_assets, constants.JRE_DIR_NAME)
+    return None, None, (source_folder if os.path.exists(source_folder) else None)
+
 
+def _provision_jre(runtime_dir, target_jre_dir, java_exe, open_source, source_folder, token, progress):
+    """真正的解压/复制流程，调用方需持有 JRE 锁"""
+    # print(f"[{constants.PROXY_NAME}] 正在初始化运行环境...", file=sys.stderr) # 减少刷屏
     try:
-        # 清理旧目录
-        if os.path.exists(target_jre_dir):
+        linked = False
+        if open_source and runtimeStore.is_enabled():
+            # 共享仓库：只有仓库里还没有这个版本时才解压，运行时目录中只放软链接
+            linked = runtimeStore.link_dir(
+                constants.JRE_DIR_NAME, token, target_jre_dir,
+                lambda obj_dir: jreExtractor.extract(
+                    open_source(), obj_dir, constants.JRE_DIR_NAME,
+                    token=token, progress=progress
+                )
+            )
+
+        if linked:
+            pass
+        elif open_source:
+            # 并行解压到暂存目录，完成后原子替换 (中断可续传，旧目录在替换前保持可用)
             try:
-                def remove_readonly(func, path, _):
-                    os.chmod(path, 0o777)
-                    func(path)
-
-                shutil.rmtree(target_jre_dir, onerror=remove_readonly)
-            except:
-                pass  # 忽略清理失败，尝试直接覆盖
-
-        # 解压
-        if os.path.exists(source_zip):
-            with zipfile.ZipFile(source_zip, 'r') as zf:
-                zf.extractall(runtime_dir)
-        elif os.path.exists(source_folder):
+                jreExtractor.extract(
+                    open_source(), runtime_dir, constants.JRE_DIR_NAME,
+                    token=token, progress=progress
+                )
+            except jreExtractor.SwapDeferred as e:
+                # 旧 JRE 正被运行中的游戏占用：本次继续用旧的，不写版本记录，下次启动再替换
+                print(f"[{constants.PROXY_NAME}] 运行环境暂时无法替换，继续使用当前版本: {e}", file=sys.stderr)
+                return java_exe if _is_java_executable(java_exe) else None
+        elif source_folder:
+            if os.path.exists(target_jre_dir):
+                try:
+                    jreExtractor.remove_tree(target_jre_dir)
+                except:
+                    pass  # 忽略清理失败，尝试直接覆盖
             shutil.copytree(source_folder, target_jre_dir, dirs_exist_ok=True)
         else:
             return None
 
-        # 权限修复 (*nix)
+        # 权限修复 (*nix，zip 在 Windows 上打包时不含权限信息)
         if platform.system() != "Windows" and os.path.exists(java_exe):
             st = os.stat(java_exe)
             os.chmod(java_exe, st.st_mode | 0o111)
 
         if _is_java_executable(java_exe):
+            if token: _write_stamp(constants.JRE_DIR_NAME, token, java_exe)
             return java_exe
 
     except Exception as e:
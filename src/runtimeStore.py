@@ -0,0 +1,234 @@
+# src/runtimeStore.py
+"""
+用户级、按内容寻址的共享运行时仓库 (可选)。
+
+每份 YggdrasilProxy 拷贝原本都在自己的 .YggProxy/YggProRuntime 下完整释放 JRE 与 jar。
+开启 shared_runtime_store 后，资源按构建期哈希只在用户目录中保存一份：
+    <store>/objects/<hash>/<name>      资源本体 (文件或目录)
+    <store>/refs/<id>.json             各运行时目录引用了哪些对象
+运行时目录中的文件改为硬链接 (失败时软链接)，JRE 目录为软链接。
+没有任何拷贝引用的对象由 gc() 清理。
+"""
+import os
+import sys
+import json
+import shutil
+import time
+import hashlib
+import platform
+from src import constants, assetManifest
+from src.procLock import ProcessLock, LockTimeout
+
+_COMPLETE_MARK = ".complete"
+# 刚生成的对象在这段时间内不回收，给生成者留出登记引用的时间
+_GC_GRACE_SECONDS = 300
+
+
+def get_store_dir():
+    system = platform.system()
+    if system == "Windows":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif system == "Darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(base, constants.PROXY_NAME, constants.STORE_DIR_NAME)
+
+
+def is_enabled():
+    from src.configMGR import config_mgr
+    return bool(config_mgr.get_shared_runtime_store())
+
+
+def _is_content_hash(token):
+    # 只有清单中的内容哈希才能寻址；源码运行时的 "size:..." 标识不进入仓库
+    return bool(token) and len(token) == 32 and all(c in "0123456789abcdef" for c in token)
+
+
+def _object_dir(token):
+    return os.path.join(get_store_dir(), "objects", token)
+
+
+def _lock(name):
+    return ProcessLock(os.path.join(get_store_dir(), "locks", f"{name}.lock"),
+                       timeout=constants.RUNTIME_LOCK_TIMEOUT)
+
+
+def _ref_file(runtime_dir):
+    ref_id = hashlib.blake2b(os.path.abspath(runtime_dir).encode("utf-8"), digest_size=8).hexdigest()
+    return os.path.join(get_store_dir(), "refs", f"{ref_id}.json")
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_file, path)
+
+
+def _link_object(name, token, target_path, allow_hardlink):
+    """
+    链接对象并登记引用。与 gc() 共用 refs 锁：
+    对象生成后、引用登记前不会被其他进程当作垃圾回收。
+    """
+    obj_dir = _object_dir(token)
+    with _lock("refs"):
+        if not os.path.exists(os.path.join(obj_dir, _COMPLETE_MARK)):
+            raise IOError("object collected")
+        _replace_with_link(os.path.join(obj_dir, name), target_path, allow_hardlink)
+
+        runtime_dir = os.path.dirname(target_path)
+        ref_file = _ref_file(runtime_dir)
+        ref = _read_json(ref_file) or {"runtime_dir": os.path.abspath(runtime_dir), "objects": {}}
+        ref["objects"][name] = token
+        _write_json(ref_file, ref)
+
+
+def _ensure_object(token, name, populate):
+    """对象不存在时在锁内生成：populate(object_dir) 负责写入 object_dir/name"""
+    obj_dir = _object_dir(token)
+    if os.path.exists(os.path.join(obj_dir, _COMPLETE_MARK)):
+        return obj_dir, False
+
+    with _lock(f"obj-{token}"):
+        if os.path.exists(os.path.join(obj_dir, _COMPLETE_MARK)):
+            return obj_dir, False
+        os.makedirs(obj_dir, exist_ok=True)
+        populate(obj_dir)
+        open(os.path.join(obj_dir, _COMPLETE_MARK), "w").close()
+    return obj_dir, True
+
+
+def _replace_with_link(obj_path, target_path, allow_hardlink):
+    tmp_path = f"{target_path}.{os.getpid()}.link"
+    if os.path.lexists(tmp_path): os.remove(tmp_path)
+
+    linked = False
+    if allow_hardlink:
+        try:
+            os.link(obj_path, tmp_path)
+            linked = True
+        except OSError:
+            pass
+    if not linked:
+        os.symlink(obj_path, tmp_path, target_is_directory=os.path.isdir(obj_path))
+
+    # 目标是真实目录时无法被 os.replace 覆盖，先挪开
+    if os.path.isdir(target_path) and not os.path.islink(target_path):
+        aside = f"{target_path}.{os.getpid()}.old"
+        os.rename(target_path, aside)
+        shutil.rmtree(aside, ignore_errors=True)
+    os.replace(tmp_path, target_path)
+
+
+def link_file(name, token, target_path, write_source):
+    """
+    把单个资源文件放入仓库并链接到运行时目录；不适用或失败时返回 False，由调用方走本地复制。
+    write_source(dest_path) 负责写出资源内容 (来自 assets 目录或外置资源包)。
+    """
+    if not _is_content_hash(token): return False
+
+    def populate(obj_dir):
+        tmp_path = os.path.join(obj_dir, f"{name}.{os.getpid()}.tmp")
+        write_source(tmp_path)
+        if assetManifest.hash_file(tmp_path) != token:
+            os.remove(tmp_path)
+            raise IOError("hash mismatch")
+        os.replace(tmp_path, os.path.join(obj_dir, name))
+
+    try:
+        _, created = _ensure_object(token, name, populate)
+        _link_object(name, token, target_path, allow_hardlink=True)
+        if created: gc()
+        return True
+    except (OSError, LockTimeout) as e:
+        print(f"[{constants.PROXY_NAME}] 共享运行时仓库不可用 ({name}): {e}", file=sys.stderr)
+        return False
+
+
+def link_dir(name, token, target_path, populate):
+    """
+    把目录资源 (JRE) 放入仓库并以软链接挂到运行时目录。
+    populate(object_dir) 负责生成 object_dir/name。
+    """
+    if not _is_content_hash(token): return False
+    try:
+        _, created = _ensure_object(token, name, populate)
+        _link_object(name, token, target_path, allow_hardlink=False)
+        if created: gc()
+        return True
+    except (OSError, LockTimeout) as e:
+        # Windows 无权限创建软链接等情况
+        print(f"[{constants.PROXY_NAME}] 共享运行时仓库不可用 ({name}): {e}", file=sys.stderr)
+        return False
+
+
+def _still_linked(target_path, obj_path):
+    try:
+        if os.path.islink(target_path):
+            return os.path.realpath(target_path) == os.path.realpath(obj_path)
+        return os.path.samefile(target_path, obj_path)
+    except OSError:
+        return False
+
+
+def gc():
+    """删除没有任何运行时目录仍在引用的对象，返回删除数量"""
+    store_dir = get_store_dir()
+    refs_dir = os.path.join(store_dir, "refs")
+    objects_dir = os.path.join(store_dir, "objects")
+    removed = 0
+
+    try:
+        with _lock("refs"):
+            live = set()
+            for ref_name in (os.listdir(refs_dir) if os.path.isdir(refs_dir) else []):
+                ref_file = os.path.join(refs_dir, ref_name)
+                ref = _read_json(ref_file)
+                runtime_dir = (ref or {}).get("runtime_dir")
+                if not runtime_dir or not os.path.isdir(runtime_dir):
+                    os.remove(ref_file)
+                    continue
+
+                # 只保留仍然真正链接着的对象 (拷贝被删除或已升级到新版本的不算)
+                objects = {
+                    name: token for name, token in ref.get("objects", {}).items()
+                    if _still_linked(os.path.join(runtime_dir, name), os.path.join(_object_dir(token), name))
+                }
+                if objects != ref.get("objects"):
+                    ref["objects"] = objects
+                    _write_json(ref_file, ref)
+                live.update(objects.values())
+
+            for token in (os.listdir(objects_dir) if os.path.isdir(objects_dir) else []):
+                if token in live: continue
+                mark = os.path.join(objects_dir, token, _COMPLETE_MARK)
+                if os.path.exists(mark) and time.time() - os.path.getmtime(mark) < _GC_GRACE_SECONDS:
+                    continue
+
+                # 不等待：正在生成中的对象 (锁被占用) 直接跳过；生成者崩溃留下的半成品会被清掉
+                obj_lock = _lock(f"obj-{token}")
+                try:
+                    obj_lock.acquire(timeout=0)
+                except LockTimeout:
+                    continue
+                try:
+                    shutil.rmtree(os.path.join(objects_dir, token))
+                    removed += 1
+                except OSError:
+                    pass
+                finally:
+                    obj_lock.release()
+    except (OSError, LockTimeout) as e:
+        print(f"[{constants.PROXY_NAME}] 共享运行时仓库清理失败: {e}", file=sys.stderr)
+
+    return removed
@@ -0,0 +1,249 @@
+# src/runtimeStress.py
+"""
+运行时释放的多进程压力测试。
+
+在临时目录中生成一个合成 JRE 包 (假的 bin/java 脚本 + 若干填充文件)，
+让多个独立进程同时对空的运行时目录调用 runtimeMGR.get_fallback_java，验证：
+  - cold_start    : N 个进程同时启动，只有一个进程真正解压，其余进程复用其结果
+  - holder_killed : 持锁解压中的进程被 SIGKILL，等待中的进程接手续传，仍只完成一次解压
+每个进程都必须拿到可运行的 java，且完成的解压次数恰好为 1，否则返回码为 1。
+
+用法 (仅 macOS / Linux，假 java 为 sh 脚本):
+    python -m src.runtimeStress --procs 8
+    python -m src.runtimeStress --json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import platform
+import tempfile
+import subprocess
+from src import constants
+
+_TOKEN = "runtime-stress"
+_LOG_NAME = "extract.log"
+_CHILD_TIMEOUT = 120
+
+
+# ================= 1. 合成 JRE 包 =================
+
+def _java_member():
+    if platform.system() == "Darwin":
+        return f"{constants.JRE_DIR_NAME}/Contents/Home/bin/java"
+    return f"{constants.JRE_DIR_NAME}/bin/java"
+
+
+def build_zip(root, files, file_kb):
+    """生成合成 JRE 包，返回 zip 路径；填充文件让解压持续一段时间，便于观察并发"""
+    zip_path = os.path.join(root, f"{constants.JRE_DIR_NAME}.zip")
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        info = zipfile.ZipInfo(_java_member())
+        info.create_system = 3
+        info.external_attr = 0o100755 << 16
+        zf.writestr(info, "#!/bin/sh\necho 'openjdk version \"17.0.9\" 2023-10-17' >&2\n")
+        for i in range(files):
+            zf.writestr(f"{constants.JRE_DIR_NAME}/lib/filler-{i}.bin", os.urandom(file_kb * 1024))
+    return zip_path
+
+
+def _read_log(root):
+    """解压记录：[(事件, pid)]，事件为 start / done / holding"""
+    try:
+        with open(os.path.join(root, _LOG_NAME)) as f:
+            return [tuple(line.split()) for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def _append_log(root, event):
+    # O_APPEND 的单行写入在多个进程之间不会交错
+    with open(os.path.join(root, _LOG_NAME), "a") as f:
+        f.write(f"{event} {os.getpid()}\n")
+
+
+# ================= 2. 子进程 =================
+
+def _child(root, start_at, hold):
+    """在独立进程中执行一次 get_fallback_java，结果以一行 JSON 输出到 stdout"""
+    from src import runtimeMGR, jreExtractor
+    from src.configMGR import config_mgr
+
+    # 运行时目录改到临时目录，关闭共享仓库，内置包指向合成 zip
+    with config_mgr._lock:
+        config_mgr._runtime_dir = os.path.join(root, "runtime")
+        config_mgr._config_data["shared_runtime_store"] = False
+    zip_path = os.path.join(root, f"{constants.JRE_DIR_NAME}.zip")
+    runtimeMGR._find_jre_source = lambda: ((lambda: jreExtractor.ZipSource(zip_path)), _TOKEN, None)
+
+    real_extract = jreExtractor.extract
+
+    def counted_extract(*args, **kwargs):
+        _append_log(root, "start")
+        result = real_extract(*args, **kwargs)
+        _append_log(root, "done")
+        return result
+
+    jreExtractor.extract = counted_extract
+
+    progress = None
+    if hold:
+        def progress(done, total):
+            # 持锁解压到一半时挂起，等待父进程 SIGKILL
+            if done * 2 >= total:
+                _append_log(root, "holding")
+                time.sleep(3600)
+
+    time.sleep(max(0.0, start_at - time.time()))
+    t0 = time.perf_counter()
+    java = runtimeMGR.get_fallback_java(progress=progress)
+    print(json.dumps({
+        "pid": os.getpid(),
+        "java": java,
+        "runs": bool(java) and runtimeMGR._is_java_executable(java),
+        "wall_s": round(time.perf_counter() - t0, 4),
+    }))
+    return 0
+
+
+def _spawn(root, start_at, hold=False):
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [repo_root, env.get("PYTHONPATH")]))
+    cmd = [sys.executable, "-m", "src.runtimeStress", "--child", root, "--start-at", str(start_at)]
+    if hold: cmd.append("--hold")
+    return subprocess.Popen(cmd, cwd=repo_root, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+def _collect(procs):
+    """等待子进程结束，返回每个进程的结果 (超时或崩溃记为失败)"""
+    results = []
+    for proc in procs:
+        try:
+            out, err = proc.communicate(timeout=_CHILD_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            out, err = proc.communicate()
+            results.append({"pid": proc.pid, "runs": False, "error": "timeout"})
+            continue
+        try:
+            results.append(json.loads(out.strip().splitlines()[-1]))
+        except (ValueError, IndexError):
+            results.append({"pid": proc.pid, "runs": False, "error": (err.strip().splitlines() or ["?"])[-1]})
+    return results
+
+
+# ================= 3. 场景 =================
+
+def _summarize(root, results, exclude_pid=None):
+    events = [(event, int(pid)) for event, pid in _read_log(root) if int(pid) != exclude_pid]
+    summary = {
+        "procs": len(results),
+        "extractions_started": sum(1 for event, _ in events if event == "start"),
+        "extractions_done": sum(1 for event, _ in events if event == "done"),
+        "all_runnable": all(r.get("runs") for r in results),
+        "wall_s_max": max((r.get("wall_s", 0) for r in results), default=0),
+        "errors": [r["error"] for r in results if r.get("error")],
+    }
+    summary["ok"] = summary["all_runnable"] and summary["extractions_started"] == 1 \
+        and summary["extractions_done"] == 1
+    return summary
+
+
+def scenario_cold_start(root, procs):
+    """N 个进程同时对空运行时目录启动"""
+    start_at = time.time() + 1.5
+    return _summarize(root, _collect([_spawn(root, start_at) for _ in range(procs)]))
+
+
+def scenario_holder_killed(root, procs):
+    """持锁进程在解压中途被 SIGKILL：锁由系统释放，等待者接手且只解压一次"""
+    holder = _spawn(root, time.time(), hold=True)
+    deadline = time.monotonic() + _CHILD_TIMEOUT
+    while not any(event == "holding" for event, _ in _read_log(root)):
+        if holder.poll() is not None or time.monotonic() > deadline:
+            holder.kill()
+            return {"procs": procs, "ok": False, "errors": ["holder never reached the lock"]}
+        time.sleep(0.05)
+
+    waiters = [_spawn(root, time.time()) for _ in range(procs)]
+    # 等待者应当全部阻塞在锁上
+    time.sleep(1.0)
+    blocked = all(w.poll() is None for w in waiters)
+    holder.kill()
+    holder.communicate()
+
+    summary = _summarize(root, _collect(waiters), exclude_pid=holder.pid)
+    summary["blocked_while_held"] = blocked
+    summary["ok"] = summary["ok"] and blocked
+    return summary
+
+
+SCENARIOS = [
+    ("cold_start", scenario_cold_start),
+    ("holder_killed", scenario_holder_killed),
+]
+
+
+def run_stress(procs=8, files=32, file_kb=256, keep=False):
+    base = tempfile.mkdtemp(prefix="yggpro-runtimestress-")
+    try:
+        results = {"procs": procs, "zip_files": files + 1, "scenarios": {}}
+        for name, fn in SCENARIOS:
+            root = os.path.join(base, name)
+            os.makedirs(os.path.join(root, "runtime"))
+            build_zip(root, files, file_kb)
+            results["scenarios"][name] = fn(root, procs)
+        results["ok"] = all(s["ok"] for s in results["scenarios"].values())
+        return results
+    finally:
+        if not keep:
+            shutil.rmtree(base, ignore_errors=True)
+
+
+def _print_table(results):
+    print(f"procs: {results['procs']}  zip members: {results['zip_files']}  ok: {results['ok']}")
+    print(f"{'scenario':<16}{'started':>9}{'done':>6}{'runnable':>10}{'wall max':>10}")
+    for name, s in results["scenarios"].items():
+        print(f"{name:<16}{s.get('extractions_started', '-'):>9}{s.get('extractions_done', '-'):>6}"
+              f"{str(s.get('all_runnable', False)):>10}{s.get('wall_s_max', 0):>10.3f}")
+        for error in s.get("errors", []):
+            print(f"    error: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="runtime provisioning stress test (multiple processes)")
+    parser.add_argument("--procs", type=int, default=8, help="并发进程数")
+    parser.add_argument("--files", type=int, default=32, help="合成 JRE 包中的填充文件数")
+    parser.add_argument("--file-kb", type=int, default=256, help="每个填充文件的大小 (KB)")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    parser.add_argument("--keep", action="store_true", help="保留临时目录")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--start-at", type=float, default=0.0, help=argparse.SUPPRESS)
+    parser.add_argument("--hold", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return _child(args.child, args.start_at, args.hold)
+
+    if platform.system() == "Windows":
+        print("runtimeStress requires a POSIX shell (the fake java is an sh script).", file=sys.stderr)
+        return 2
+
+    results = run_stress(args.procs, args.files, args.file_kb, args.keep)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table(results)
+    if not results["ok"]:
+        print("runtimeStress: expected exactly one extraction and a runnable java in every process",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
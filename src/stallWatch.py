@@ -0,0 +1,138 @@
+# src/stallWatch.py
+"""
+Tk 事件循环卡顿检测 (默认关闭)。
+
+主线程上用 after 定时打心跳，后台监视线程检查心跳间隔：
+超过阈值即认为界面卡住，立刻抓取主线程当前的调用栈 (sys._current_frames)，
+卡顿结束后把持续时间与调用栈作为一行 JSON 追加到 <数据目录>/diagnostics/stalls.log。
+
+开启方式：
+    YGGPRO_STALL_WATCH=1        使用默认阈值 (STALL_THRESHOLD_MS)
+    YGGPRO_STALL_WATCH=500      阈值 500ms
+    或在配置中设置 "stall_watch": true
+"""
+import os
+import sys
+import json
+import time
+import threading
+import traceback
+from src import constants
+from src.configMGR import config_mgr
+
+
+def get_log_path():
+    return os.path.join(config_mgr.get_data_dir(), "diagnostics", constants.STALL_LOG_FILENAME)
+
+
+def _configured_threshold():
+    """返回阈值 (毫秒)；未开启返回 None"""
+    value = os.environ.get(constants.STALL_WATCH_ENV, "").strip()
+    if value:
+        if value.lower() in ("0", "false", "off", "no"):
+            return None
+        try:
+            ms = int(value)
+            return ms if ms > 1 else constants.STALL_THRESHOLD_MS
+        except ValueError:
+            return constants.STALL_THRESHOLD_MS
+    if config_mgr.get_stall_watch():
+        return constants.STALL_THRESHOLD_MS
+    return None
+
+
+class StallWatch:
+    def __init__(self, root, threshold_ms=None, interval_ms=None, log_path=None):
+        self.root = root
+        self.threshold = (threshold_ms or constants.STALL_THRESHOLD_MS) / 1000
+        self.interval_ms = interval_ms or constants.STALL_HEARTBEAT_MS
+        self.log_path = log_path or get_log_path()
+        self.stall_count = 0
+
+        self._last_beat = time.monotonic()
+        self._stop = threading.Event()
+        self._main_ident = None
+        self._after_id = None
+        self._stall = None  # 当前卡顿：{"started": ..., "stack": [...]}
+        self._stall_lock = threading.Lock()
+
+    def start(self):
+        # 必须在 Tk 主线程调用
+        self._main_ident = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._beat()
+        threading.Thread(target=self._monitor, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._after_id:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        # 关闭时仍在卡顿 (例如卡在关闭流程中) 也要记下来
+        self._finish_stall(time.monotonic())
+
+    def _beat(self):
+        if self._stop.is_set(): return
+        self._last_beat = time.monotonic()
+        try:
+            self._after_id = self.root.after(self.interval_ms, self._beat)
+        except Exception:
+            # 窗口已销毁
+            self._stop.set()
+
+    def _monitor(self):
+        poll = self.interval_ms / 1000 / 2
+        while not self._stop.wait(poll):
+            now = time.monotonic()
+            # 心跳本身就间隔 interval，超出部分才算延迟
+            lag = now - self._last_beat - self.interval_ms / 1000
+            # stop() 会在 Tk 线程中清空 _stall，读写都要持锁
+            with self._stall_lock:
+                stall = self._stall
+            if stall is None:
+                if lag > self.threshold:
+                    started = self._last_beat + self.interval_ms / 1000
+                    stack = self._capture_main_stack()
+                    with self._stall_lock:
+                        if self._stall is None and not self._stop.is_set():
+                            self._stall = {"started": started, "stack": stack}
+            elif self._last_beat >= stall["started"]:
+                # 心跳恢复
+                self._finish_stall(self._last_beat)
+
+    def _capture_main_stack(self):
+        frame = sys._current_frames().get(self._main_ident)
+        if frame is None: return []
+        return [line.rstrip("\n") for line in traceback.format_stack(frame)]
+
+    def _finish_stall(self, ended):
+        with self._stall_lock:
+            stall, self._stall = self._stall, None
+        if not stall: return
+        self.stall_count += 1
+        event = {
+            "ts": time.time(),
+            "duration_ms": round(max(0.0, ended - stall["started"]) * 1000, 1),
+            "threshold_ms": round(self.threshold * 1000),
+            "stack": stall["stack"],
+        }
+        try:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"[{constants.PROXY_NAME}] 写入卡顿日志失败: {e}", file=sys.stderr)
+        if constants.DEBUG_MODE:
+            where = stall["stack"][-1].strip() if stall["stack"] else "?"
+            print(f"[StallWatch] UI stalled {event['duration_ms']} ms at {where}", file=sys.stderr)
+
+
+def start_for(root):
+    """按环境变量 / 配置决定是否开启；未开启返回 None"""
+    threshold = _configured_threshold()
+    if threshold is None: return None
+    return StallWatch(root, threshold_ms=threshold).start()
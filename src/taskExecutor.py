@@ -0,0 +1,133 @@
+# src/taskExecutor.py
+"""
+GUI 共用的后台任务执行器。
+
+以前每个后台任务 (Java 扫描、登录验证、启动前刷新 Token) 各开一个线程，结果直接在
+工作线程里 after 回 Tk，窗口关闭后仍在运行并回调已销毁的控件。现在统一交给 TaskExecutor：
+  - 固定大小线程池执行任务，每个任务带一个 CancelToken
+  - 结果不直接碰 Tk，而是放进队列，由主线程上的 after 定时批量取出并回调
+  - 已取消的任务、或执行器关闭后产生的结果直接丢弃
+  - shutdown() 取消全部任务与排队中的回调 (窗口关闭时调用)
+"""
+import threading
+import collections
+import concurrent.futures
+from src import constants
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+        self.future = None
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+
+    def wait(self, timeout=None):
+        """等待任务本身结束 (不论是否已取消)"""
+        if self.future is not None:
+            try:
+                self.future.result(timeout)
+            except Exception:
+                pass
+
+
+class TaskExecutor:
+    def __init__(self, root, max_workers=4, pump_ms=30):
+        self.root = root
+        self.pump_ms = pump_ms
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                           thread_name_prefix="yggpro-gui")
+        self._results = collections.deque()  # (token, callback, args)
+        self._tokens = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._pump_id = self.root.after(self.pump_ms, self._pump)
+
+    def submit(self, fn, *args, on_done=None, on_error=None, pass_token=False, **kwargs):
+        """
+        在线程池中执行 fn(*args, **kwargs)；pass_token=True 时以 cancel_token= 传入令牌。
+        on_done(result) / on_error(exception) 在 Tk 主线程回调，任务取消后不回调。
+        返回 CancelToken。
+        """
+        token = CancelToken()
+        if pass_token:
+            kwargs["cancel_token"] = token
+
+        def run():
+            try:
+                # 已取消的任务同样要走 finally 移出 _tokens
+                if token.cancelled: return
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if on_error:
+                    self._post(token, on_error, e)
+                elif constants.DEBUG_MODE:
+                    print("[TaskExecutor]", e)
+                return
+            finally:
+                with self._lock:
+                    self._tokens.discard(token)
+            if on_done:
+                self._post(token, on_done, result)
+
+        with self._lock:
+            if self._closed:
+                token.cancel()
+                return token
+            self._tokens.add(token)
+            token.future = self._pool.submit(run)
+        return token
+
+    def post(self, callback, *args, token=None):
+        """从任意线程把回调交给 Tk 主线程执行 (批量，在下一次 pump 时)"""
+        self._post(token, callback, *args)
+
+    def _post(self, token, callback, *args):
+        with self._lock:
+            if self._closed: return
+            self._results.append((token, callback, args))
+
+    def _pump(self):
+        self._pump_id = None
+        with self._lock:
+            if self._closed: return
+            batch = list(self._results)
+            self._results.clear()
+
+        for token, callback, args in batch:
+            if token is not None and token.cancelled: continue
+            try:
+                callback(*args)
+            except Exception as e:
+                if constants.DEBUG_MODE:
+                    print("[TaskExecutor] callback:", e)
+
+        with self._lock:
+            if self._closed: return
+            try:
+                self._pump_id = self.root.after(self.pump_ms, self._pump)
+            except Exception:
+                # 窗口已销毁
+                self._closed = True
+
+    def shutdown(self):
+        """取消全部任务与未执行的回调；正在运行的任务不会被强行中断"""
+        with self._lock:
+            self._closed = True
+            tokens = list(self._tokens)
+            self._tokens.clear()
+            self._results.clear()
+        for token in tokens:
+            token.cancel()
+        if self._pump_id:
+            try:
+                self.root.after_cancel(self._pump_id)
+            except Exception:
+                pass
+            self._pump_id = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,117 @@
+# src/tokenRefresh.py
+"""
+跨进程单飞 (single-flight) 刷新 Token。
+
+Yggdrasil 的 /authserver/refresh 会让旧 Token 立即失效：绑定同一账号的两个实例同时启动时，
+如果各自刷新，后完成的一方会让先完成一方拿到的 Token 作废。现在：
+  - 每个账号一个锁文件 (<数据目录>/locks/refresh-<uuid>.lock)，同一时间只有一个进程刷新
+  - 刷新结果写入共享记录 (<数据目录>/cache/refresh/<uuid>.json)，以旧 Token 的哈希为键，
+    新 Token 用配置密钥加密保存
+  - 后到的进程拿到锁后先查记录：旧 Token 相同且未过期就直接复用新 Token，不再请求服务器
+等锁超时 (持有者卡死) 时不再等待，退化为直接刷新。
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from src import constants, authAPI
+from src.configMGR import config_mgr
+from src.procLock import ProcessLock, LockTimeout
+from src.rateLimiter import PRIORITY_CRITICAL
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _token_key(access_token):
+    return hashlib.sha256((access_token or "").encode("utf-8")).hexdigest()
+
+
+def _get_lock(uuid):
+    # 同一路径复用同一实例，兼顾进程内线程互斥
+    path = os.path.join(config_mgr.get_data_dir(), "locks", f"refresh-{uuid}.lock")
+    with _locks_guard:
+        if path not in _locks:
+            _locks[path] = ProcessLock(path, timeout=constants.TOKEN_REFRESH_LOCK_TIMEOUT)
+        return _locks[path]
+
+
+def _record_path(uuid):
+    return os.path.join(config_mgr.get_data_dir(), "cache", "refresh", f"{uuid}.json")
+
+
+def _read_record(uuid, old_token):
+    """旧 Token 对应的刷新结果 {"accessToken", "clientToken"}；没有或已过期返回 None"""
+    try:
+        with open(_record_path(uuid), "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if record.get("old") != _token_key(old_token): return None
+    if time.time() - record.get("at", 0) > constants.TOKEN_REFRESH_RESULT_TTL: return None
+
+    access_token = config_mgr.decrypt_secret(record.get("token"))
+    if not access_token: return None
+    result = {"accessToken": access_token}
+    if record.get("clientToken"): result["clientToken"] = record["clientToken"]
+    return result
+
+
+def _write_record(uuid, old_token, new_data):
+    path = _record_path(uuid)
+    record = {
+        "old": _token_key(old_token),
+        "token": config_mgr.encrypt_secret(new_data["accessToken"]),
+        "clientToken": new_data.get("clientToken"),
+        "at": time.time(),
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[{constants.PROXY_NAME}] 写入刷新记录失败: {e}", file=sys.stderr)
+
+
+def verified_at(auth_data):
+    """最近一次确认 Token 有效的时间 (刷新，或后台 / 预热校验通过)；用于 TOKEN_TRUST_WINDOW 判断"""
+    return max(auth_data.get("token_refreshed_at", 0), auth_data.get("token_validated_at", 0))
+
+
+def refresh_token(refresh_url, auth_data, session=None, priority=PRIORITY_CRITICAL):
+    """
+    刷新 auth_data 的 Token (参数同 authAPI.refresh，绑定 auth_data 对应的角色)。
+    返回 {"accessToken", 可能还有 "clientToken"}；服务器拒绝时与 authAPI.refresh 一样抛出异常。
+    """
+    uuid = auth_data["uuid"]
+    old_token = auth_data.get("accessToken")
+
+    lock = _get_lock(uuid)
+    held = False
+    try:
+        held = lock.acquire()
+    except LockTimeout:
+        print(f"[{constants.PROXY_NAME}] 等待 Token 刷新锁超时，直接刷新", file=sys.stderr)
+
+    try:
+        # 其他进程刚用同一个旧 Token 刷新过：直接复用结果
+        shared = _read_record(uuid, old_token)
+        if shared:
+            if constants.DEBUG_MODE:
+                print(f"[{constants.PROXY_NAME}] Reusing token refreshed by another process", file=sys.stderr)
+            return shared
+
+        new_data = authAPI.refresh(
+            refresh_url, old_token, auth_data.get("clientToken"),
+            selected_profile={"id": uuid, "name": auth_data.get("name")}, session=session, priority=priority
+        )
+        result = {"accessToken": new_data["accessToken"]}
+        if new_data.get("clientToken"): result["clientToken"] = new_data["clientToken"]
+        _write_record(uuid, old_token, result)
+        return result
+    finally:
+        if held: lock.release()
@@ -0,0 +1,163 @@
+# src/warmUp.py
+"""
+启动前预热 (--yggpro-warm)，供 cron / systemd timer 在上机前定时执行。
+
+并行完成启动时原本要联网或解压的准备工作，随后退出：
+  - 提前刷新较久未刷新的 Token，其余账号联网校验 (记录 token_refreshed_at / token_validated_at，
+    启动时在 TOKEN_TRUST_WINDOW 内不再校验)
+  - 释放内置运行时与资源 (兜底 Java、authlib-injector、fMcMain)
+  - 预取各验证服务器的元数据 (cache/api_meta.json)，启动时以
+    -Dauthlibinjector.yggdrasil.prefetched 传给 authlib-injector
+  - 刷新 Java 清单缓存
+
+之后真正启动时只剩本地查找与 execv。结果以一行 JSON 输出到 stdout；有失败项时返回码为 1。
+
+    YggdrasilProxy --yggpro-warm              # 刷新超过 TOKEN_WARM_AGE 未刷新的 Token
+    YggdrasilProxy --yggpro-warm --force      # 刷新全部 Token
+"""
+import os
+import json
+import time
+import base64
+import argparse
+import tempfile
+import threading
+import concurrent.futures
+import requests
+from src import constants
+from src.configMGR import config_mgr
+
+_meta_lock = threading.Lock()
+
+
+# ================= 服务器元数据 =================
+
+def _meta_path():
+    return os.path.join(config_mgr.get_data_dir(), "cache", constants.API_META_FILENAME)
+
+
+def _read_meta():
+    try:
+        with open(_meta_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def fetch_api_meta(base_url):
+    """请求 API 根地址并写入缓存；返回元数据字典"""
+    from src.rateLimiter import rate_limiter, PRIORITY_BACKGROUND
+    base_url = base_url.rstrip('/')
+    rate_limiter.acquire(base_url, PRIORITY_BACKGROUND)
+    resp = requests.get(base_url, timeout=(5, 10))
+    rate_limiter.observe(base_url, resp)
+    resp.raise_for_status()
+    meta = resp.json()
+    if not isinstance(meta, dict) or "meta" not in meta:
+        raise ValueError(f"Not a Yggdrasil API root: {base_url}")
+
+    with _meta_lock:
+        data = _read_meta()
+        data[base_url] = {"fetched_at": time.time(), "body": resp.text}
+        path = _meta_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 多个预热进程可能同时写：各自使用唯一的临时文件
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+    return meta
+
+
+def get_prefetched_meta(base_url):
+    """缓存中未过期的元数据 (base64，用于 authlibinjector.yggdrasil.prefetched)；没有返回 None"""
+    entry = _read_meta().get(base_url.rstrip('/'))
+    if not entry or time.time() - entry.get("fetched_at", 0) > constants.API_META_MAX_AGE:
+        return None
+    return base64.b64encode(entry["body"].encode("utf-8")).decode("ascii")
+
+
+# ================= 各项预热 =================
+
+def _warm_accounts(force):
+    from src import accountValidator
+    results = accountValidator.validate_all(refresh_older_than=0 if force else constants.TOKEN_WARM_AGE)
+    failed = [u for u, status in results.items()
+              if status in (accountValidator.STATUS_INVALID, accountValidator.STATUS_UNREACHABLE)]
+    return {"results": results, "failed": failed}
+
+
+def _warm_runtime():
+    from src import runtimeMGR
+    java = runtimeMGR.get_fallback_java()
+    return {
+        "java": java,
+        "injector": runtimeMGR.get_injector_jar(),
+        "fmcmain": runtimeMGR.get_fmcmain_jar(),
+        "failed": [] if java else ["java"],
+    }
+
+
+def _warm_api_meta():
+    fetched, failed = [], {}
+    for base_url in {a["base_url"].rstrip('/') for a in config_mgr.get_api_list()}:
+        try:
+            fetch_api_meta(base_url)
+            fetched.append(base_url)
+        except Exception as e:
+            failed[base_url] = str(e)
+    return {"fetched": sorted(fetched), "failed": failed}
+
+
+def _warm_java():
+    from src import javaScanner
+    candidates = javaScanner.find_java_candidates()
+    current = config_mgr.get_real_java_path()
+    # 与启动流程一致：配置中的 Java 已不存在时自动选择最新的
+    if (not current or not os.path.exists(current)) and candidates:
+        current = candidates[0]["path"]
+        config_mgr.set_real_java_path(current)
+        config_mgr.save()
+    return {"found": len(candidates), "current": current}
+
+
+def run(argv):
+    parser = argparse.ArgumentParser(prog=f"{constants.PROXY_NAME} --yggpro-warm",
+                                     description="refresh tokens and prepare runtime ahead of launch")
+    parser.add_argument("--force", action="store_true", help="刷新全部 Token (默认只刷新较久未刷新的)")
+    parser.add_argument("--skip-java", action="store_true", help="不扫描 Java")
+    args = parser.parse_args(argv)
+
+    config_mgr.load()
+    t0 = time.perf_counter()
+
+    steps = {
+        "accounts": lambda: _warm_accounts(args.force),
+        "runtime": _warm_runtime,
+        "api_meta": _warm_api_meta,
+    }
+    if not args.skip_java:
+        steps["java"] = _warm_java
+
+    report = {}
+    ok = True
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(steps)) as pool:
+        futures = {name: pool.submit(fn) for name, fn in steps.items()}
+        for name, future in futures.items():
+            try:
+                report[name] = future.result()
+                if report[name].get("failed"): ok = False
+            except Exception as e:
+                report[name] = {"error": f"{type(e).__name__}: {e}"}
+                ok = False
+
+    report["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    print(json.dumps({"ok": ok, **report}, ensure_ascii=False))
+    return 0 if ok else 1
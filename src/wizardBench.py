@@ -0,0 +1,156 @@
+# src/wizardBench.py
+"""
+配置向导启动耗时基准。
+
+重复打开 ModernWizard，在可交互后立即关闭，统计：
+  - first_paint_ms  : 骨架界面完成首次绘制
+  - accounts_ms     : 账号列表用本地缓存填充完成
+  - interactive_ms  : 后台任务 (头像检查 / Java 扫描) 已启动、事件循环回到空闲
+需要图形环境。全程使用临时数据目录 (复制一份当前配置作为起点)，并屏蔽账号校验 / 刷新与头像查询的联网请求：
+不会向验证服务器发请求，也不会改动真实的配置与缓存 (头像 / 档案缓存同样复制一份)。--accounts N 会临时加入 N 个合成账号。
+
+用法:
+    python -m src.wizardBench --rounds 5
+    python -m src.wizardBench --rounds 5 --accounts 300 --json
+日常使用中也可设置环境变量 YGGPRO_STARTUP_TRACE=<文件> 记录每次真实启动。
+"""
+import os
+import sys
+import json
+import copy
+import uuid
+import shutil
+import argparse
+import tempfile
+import statistics
+import requests
+from src import constants, authAPI
+from src.configMGR import config_mgr
+from src.procLock import ProcessLock
+
+
+def _synthetic_accounts(count):
+    accounts = {}
+    for i in range(count):
+        acc_uuid = uuid.UUID(int=i + 1).hex
+        accounts[acc_uuid] = {
+            "uuid": acc_uuid,
+            "name": f"Bench_{i:04d}",
+            "accessToken": "",
+            "clientToken": "",
+            "api_name": "Bench",
+        }
+    return accounts
+
+
+def _use_data_dir(data_dir):
+    """把配置与各类缓存改到 data_dir，返回原来的 (数据目录, 配置文件)"""
+    previous = (config_mgr._data_dir, config_mgr._config_file)
+    with config_mgr._lock:
+        config_mgr._data_dir = data_dir
+        config_mgr._config_file = os.path.join(data_dir, constants.CONFIG_FILENAME)
+        config_mgr._file_lock = ProcessLock(config_mgr._config_file + ".lock", timeout=5)
+    return previous
+
+
+def _offline(*args, **kwargs):
+    raise requests.exceptions.ConnectionError("network disabled in wizardBench")
+
+
+def _stub_network(avatar_manager):
+    """屏蔽联网请求，返回还原用的 [(对象, 属性, 原值)]"""
+    stubs = [
+        (authAPI, "validate", lambda *args, **kwargs: True),
+        (authAPI, "refresh", _offline),
+        # 档案缓存过期的账号不做批量查询，单个查询视为没有皮肤 (使用默认 Steve)
+        (avatar_manager, "_batch_lookup", classmethod(lambda cls, *args: None)),
+        (avatar_manager, "_resolve_skin_url", classmethod(lambda cls, *args: None)),
+    ]
+    originals = []
+    for owner, name, stub in stubs:
+        originals.append((owner, name, owner.__dict__[name]))
+        setattr(owner, name, stub)
+    return originals
+
+
+def run_once(guiWizard, extra_accounts):
+    result = {}
+    app = guiWizard.ModernWizard()
+
+    def on_measured(metrics):
+        result.update(metrics)
+        app.after(0, app._on_close)
+
+    app._on_startup_measured = on_measured
+    if extra_accounts:
+        # 构造函数已读取配置；第一阶段在 mainloop 的空闲回调里才执行，此时注入即可生效
+        with config_mgr._lock:
+            config_mgr._config_data.setdefault("accounts", {}).update(extra_accounts)
+            if config_mgr._config_data.get("default_account_uuid") not in config_mgr._config_data["accounts"]:
+                config_mgr._config_data["default_account_uuid"] = next(iter(extra_accounts))
+    app.run()
+    return result
+
+
+def run_benchmark(rounds, accounts):
+    if "src.avatarMGR" in sys.modules:
+        # 头像缓存库的路径在导入时确定，之后再换数据目录已无效
+        raise RuntimeError("wizardBench must run before avatarMGR is imported")
+
+    # 复制配置与头像 / 档案缓存，保持与真实启动相同的本地读取量
+    data_dir = tempfile.mkdtemp(prefix="yggpro-wizardbench-")
+    real_dir = config_mgr.get_data_dir()
+    for name in (constants.CONFIG_FILENAME,
+                 os.path.join("cache", constants.AVATAR_STORE_FILENAME),
+                 os.path.join("cache", constants.PROFILE_CACHE_FILENAME)):
+        if os.path.exists(os.path.join(real_dir, name)):
+            os.makedirs(os.path.dirname(os.path.join(data_dir, name)), exist_ok=True)
+            shutil.copy2(os.path.join(real_dir, name), os.path.join(data_dir, name))
+    previous = _use_data_dir(data_dir)
+
+    from src import guiWizard
+    from src.avatarMGR import AvatarManager
+    originals = _stub_network(AvatarManager)
+
+    extra = _synthetic_accounts(accounts)
+    with config_mgr._lock:
+        backup = copy.deepcopy(config_mgr._config_data)
+    try:
+        samples = [run_once(guiWizard, extra) for _ in range(rounds)]
+    finally:
+        for owner, name, original in originals:
+            setattr(owner, name, original)
+        with config_mgr._lock:
+            config_mgr._config_data = backup
+        config_mgr._data_dir, config_mgr._config_file = previous
+        config_mgr._file_lock = ProcessLock(config_mgr._config_file + ".lock", timeout=5)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    summary = {}
+    for key in ("first_paint_ms", "accounts_ms", "interactive_ms"):
+        values = [s[key] for s in samples if key in s]
+        if values:
+            summary[key] = {"median": statistics.median(values), "min": min(values), "max": max(values)}
+    return {"rounds": rounds, "accounts": samples[0].get("accounts") if samples else 0,
+            "summary": summary, "samples": samples}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="setup wizard startup benchmark")
+    parser.add_argument("--rounds", type=int, default=5, help="打开向导的次数")
+    parser.add_argument("--accounts", type=int, default=0, help="临时加入的合成账号数量")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.rounds, args.accounts)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"rounds: {results['rounds']}  accounts: {results['accounts']}")
+        for key, stat in results["summary"].items():
+            print(f"{key:<16}: median {stat['median']:>8.1f} ms  (min {stat['min']:.1f} / max {stat['max']:.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())